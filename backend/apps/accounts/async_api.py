@@ -0,0 +1,76 @@
+# apps/accounts/async_api.py
+"""
+Plumbing for async (ASGI-native) read endpoints.
+
+DRF views are synchronous, so under ASGI every request to one occupies a thread.
+``async_read_view`` serves GET/HEAD from a coroutine instead and hands every other
+method to the existing DRF view, so a URL keeps its full API. Authentication,
+permission errors, throttling and JSON rendering follow the DRF defaults used
+elsewhere.
+"""
+from functools import wraps
+from asgiref.sync import sync_to_async
+from django.contrib.auth.models import AnonymousUser
+from django.http import HttpResponse
+from rest_framework import exceptions, status
+from rest_framework.request import Request
+from config.renderers import FastJSONRenderer
+from config.throttling import TokenBucketThrottle
+from .authentication import CachedJWTAuthentication
+
+_renderer = FastJSONRenderer()
+_authentication = CachedJWTAuthentication()
+
+def json_response(data, status_code=status.HTTP_200_OK, headers=None):
+    response = HttpResponse(_renderer.render(data), status=status_code, content_type="application/json")
+    for name, value in (headers or {}).items():
+        response[name] = value
+    return response
+
+def error_response(exc):
+    detail = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+    headers = {}
+    if isinstance(exc, (exceptions.NotAuthenticated, exceptions.AuthenticationFailed)):
+        exc.status_code = status.HTTP_401_UNAUTHORIZED
+        headers["WWW-Authenticate"] = _authentication.authenticate_header(None)
+    if getattr(exc, "wait", None):
+        headers["Retry-After"] = "%d" % exc.wait
+    return json_response(detail, exc.status_code, headers)
+
+async def authenticate(request):
+    # Test clients' force_authenticate() sets this, as DRF honours it too.
+    forced = getattr(request, "_force_auth_user", None)
+    if forced is not None:
+        return forced
+    result = await _authentication.aauthenticate(request)
+    return result[0] if result is not None else AnonymousUser()
+
+def async_read_view(sync_view, login_required=False):
+    """
+    Serve GET/HEAD with the decorated coroutine ``handler(request, *args, **kwargs)``
+    and delegate other methods to ``sync_view``. The handler receives a DRF
+    ``Request`` (for query_params and serializer context) with ``user`` set.
+    """
+    delegate = sync_to_async(sync_view)
+
+    def decorator(handler):
+        @wraps(handler)
+        async def view(request, *args, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return await delegate(request, *args, **kwargs)
+            try:
+                user = await authenticate(request)
+                if login_required and not user.is_authenticated:
+                    raise exceptions.NotAuthenticated()
+                drf_request = Request(request, authenticators=())
+                drf_request.user = user
+                throttle = TokenBucketThrottle()
+                if not await throttle.aallow_request(drf_request, "read"):
+                    raise exceptions.Throttled(throttle.wait())
+                return await handler(drf_request, *args, **kwargs)
+            except exceptions.APIException as exc:
+                return error_response(exc)
+
+        view.csrf_exempt = True  # as for every DRF view; token auth is not cookie based
+        return view
+    return decorator
@@ -0,0 +1,89 @@
+# apps/accounts/authentication.py
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .token import revoked_key
+
+USER_CACHE_KEY = "auth:user:{id}"
+
+def user_cache_key(user_id):
+    return USER_CACHE_KEY.format(id=user_id)
+
+def invalidate_user(user_id):
+    caches["shared"].delete(user_cache_key(user_id))
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    SimpleJWT authentication that serves the user from the "shared" cache.
+
+    The user row is cached for ``AUTH_USER_CACHE_TIMEOUT`` seconds and dropped
+    whenever the user is saved or deleted, so password changes and deactivation
+    take effect on the next request, in every worker reading the same cache. (A
+    per-process cache only drops the saving worker's copy; the others keep
+    serving the old row until the timeout, which is why ``check --deploy``
+    rejects one.) The revocation check for the token id is fetched in the same
+    cache round trip; hot read endpoints run no auth query.
+    """
+
+    def get_user(self, validated_token):
+        user = self.get_cached_user(validated_token)
+        return user if user is not None else self.load_user(validated_token)
+
+    async def aauthenticate(self, request):
+        """
+        ``authenticate()`` for async views: token checks run on the event loop, the
+        cache is read with the async cache API and only a cache miss goes to the
+        database (in a thread).
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        user = await self.aget_cached_user(validated_token)
+        if user is None:
+            user = await sync_to_async(self.load_user)(validated_token)
+        return user, validated_token
+
+    def cache_keys(self, validated_token):
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+        return user_cache_key(user_id), revoked_key(validated_token.get(api_settings.JTI_CLAIM))
+
+    def get_cached_user(self, validated_token):
+        """Return the cached user for the token (None on a miss); rejects revoked tokens."""
+        keys = self.cache_keys(validated_token)
+        return self.check_cached_user(validated_token, *keys, caches["shared"].get_many(keys))
+
+    async def aget_cached_user(self, validated_token):
+        keys = self.cache_keys(validated_token)
+        return self.check_cached_user(validated_token, *keys, await caches["shared"].aget_many(keys))
+
+    def check_cached_user(self, validated_token, user_key, jti_key, cached):
+        if cached.get(jti_key):
+            raise AuthenticationFailed("Token has been revoked.", code="token_revoked")
+        user = cached.get(user_key)
+        if user is None:
+            return None
+
+        # Same checks as JWTAuthentication.get_user, against the cached row.
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != get_md5_hash_password(user.password):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        return user
+
+    def load_user(self, validated_token):
+        user = super().get_user(validated_token)
+        caches["shared"].set(user_cache_key(user.pk), user, getattr(settings, "AUTH_USER_CACHE_TIMEOUT", 300))
+        return user
@@ -0,0 +1,45 @@
+# apps/accounts/checks.py
+from django.conf import settings
+from django.core.checks import Error, Tags, Warning, register
+
+# Backends whose entries only the process that wrote them can see.
+PER_PROCESS_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+# Backends that drop entries once MAX_ENTRIES is reached.
+CULLING_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.filebased.FileBasedCache",
+    "django.core.cache.backends.db.DatabaseCache",
+)
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """Token revocations, cached users and replica/response-cache state must be visible to every worker."""
+    backend = settings.CACHES.get("shared", {}).get("BACKEND")
+    if backend not in PER_PROCESS_CACHES:
+        return []
+    return [Error(
+        f"CACHES['shared'] uses {backend}, which each worker process keeps to itself: a logout, "
+        "refresh rotation, password change or deactivation is only seen by the worker that handled it, "
+        "as are read-your-writes windows and response cache invalidations.",
+        hint="Set SHARED_CACHE_BACKEND / SHARED_CACHE_LOCATION (or CACHE_BACKEND) to a cache all workers "
+             "share, e.g. django.core.cache.backends.redis.RedisCache. A single server process may ignore this.",
+        id="accounts.E001",
+    )]
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache_store(app_configs, **kwargs):
+    """Response cache entries must not be able to evict token revocations."""
+    default, shared = settings.CACHES.get("default", {}), settings.CACHES.get("shared", {})
+    if shared.get("BACKEND") not in CULLING_CACHES:
+        return []
+    if (shared.get("BACKEND"), shared.get("LOCATION")) != (default.get("BACKEND"), default.get("LOCATION")):
+        return []
+    return [Warning(
+        "CACHES['shared'] is the same store as the default (response) cache: once it fills up, "
+        "cached pages evict token revocations and a logged-out token is accepted again.",
+        hint="Point SHARED_CACHE_LOCATION at a store of its own.",
+        id="accounts.W001",
+    )]
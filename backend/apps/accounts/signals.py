@@ -0,0 +1,15 @@
+# apps/accounts/signals.py
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .authentication import invalidate_user
+
+# Password changes, deactivation and profile edits must not be served from a stale cached user.
+# Drop it now and again on commit, in case a concurrent request re-cached the old row meanwhile.
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_user(pk)
+    transaction.on_commit(lambda: invalidate_user(pk))
@@ -0,0 +1,81 @@
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.core.management import call_command
+from django.core.management.base import SystemCheckError
+from django.test import override_settings
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+class TokenAuthenticationTests(TestCase):
+    def setUp(self):
+        caches["shared"].clear()
+        self.user = User.objects.create_user(username="alice", password="secret-pass")
+        self.client = APIClient()
+        self.tokens = self.login("secret-pass")
+
+    def login(self, password):
+        response = self.client.post("/api/auth/login/", {"username": "alice", "password": password}, format="json")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.json()['access']}")
+        return response.json()
+
+    def get_status(self):
+        return self.client.get("/api/properties/user/").status_code
+
+    def test_user_is_cached_between_requests(self):
+        self.assertEqual(self.get_status(), 200)
+        with CaptureQueriesContext(connection) as ctx:
+            self.assertEqual(self.get_status(), 200)
+        self.assertFalse([q for q in ctx.captured_queries if q["sql"].startswith('SELECT "auth_user"')])
+
+    def test_rotated_refresh_token_is_revoked(self):
+        refresh = {"refresh": self.tokens["refresh"]}
+        response = self.client.post("/api/auth/token/refresh/", refresh, format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("refresh", response.json())
+        self.assertEqual(self.client.post("/api/auth/token/refresh/", refresh, format="json").status_code, 401)
+
+    def test_password_change_and_deactivation_invalidate_tokens(self):
+        self.assertEqual(self.get_status(), 200)
+        self.user.set_password("new-secret-pass")
+        self.user.save()
+        self.assertEqual(self.get_status(), 401)
+
+        self.login("new-secret-pass")
+        self.assertEqual(self.get_status(), 200)
+        self.user.is_active = False
+        self.user.save()
+        self.assertEqual(self.get_status(), 401)
+
+    def test_logout_revokes_tokens(self):
+        response = self.client.post("/api/auth/logout/", {"refresh": self.tokens["refresh"]}, format="json")
+        self.assertEqual(response.status_code, 205)
+        self.assertEqual(self.get_status(), 401)
+        refresh = {"refresh": self.tokens["refresh"]}
+        self.assertEqual(self.client.post("/api/auth/token/refresh/", refresh, format="json").status_code, 401)
+
+    def test_revocation_outlives_a_full_response_cache(self):
+        self.client.post("/api/auth/logout/", {"refresh": self.tokens["refresh"]}, format="json")
+        response_cache = caches["default"]
+        for i in range(400):  # past LocMem's default of 300 entries
+            response_cache.set(f"properties:list:1:{i}", {"data": [], "etag": '"x"', "last_modified": None})
+        self.assertEqual(self.get_status(), 401)
+
+    @override_settings(CACHES={
+        "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+        "shared": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+    })
+    def test_deploy_check_requires_a_shared_cache(self):
+        with self.assertRaisesMessage(SystemCheckError, "accounts.E001"):
+            call_command("check", "--deploy", "--tag", "caches")
+        with override_settings(CACHES={
+            "default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"},
+            "shared": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": "redis://localhost:6379"},
+        }):
+            call_command("check", "--deploy", "--tag", "caches")
+        same_store = {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "cache_table"}
+        with override_settings(CACHES={"default": same_store, "shared": same_store}):
+            with self.assertRaisesMessage(SystemCheckError, "accounts.W001"):
+                call_command("check", "--deploy", "--tag", "caches", "--fail-level", "WARNING")
@@ -1,8 +1,60 @@
 # apps/accounts/token.py
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+import time
+from django.core.cache import caches
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken as BaseAccessToken, RefreshToken as BaseRefreshToken
+
+# Revoked token ids live in the "shared" cache until the token would have expired anyway, so
+# the check is a single key lookup instead of the blacklist app's database tables. Every worker
+# must read the same cache for a revocation to hold everywhere (see CACHES in settings).
+REVOKED_KEY = "auth:revoked:{jti}"
+
+def revoked_key(jti):
+    return REVOKED_KEY.format(jti=jti)
+
+def revoke(token):
+    """Reject ``token`` (access or refresh) from now until its expiry."""
+    remaining = int(token["exp"] - time.time()) + 1
+    if remaining > 0:
+        caches["shared"].set(revoked_key(token[api_settings.JTI_CLAIM]), True, remaining)
+
+def is_revoked(jti):
+    return caches["shared"].get(revoked_key(jti), False)
+
+class RevocableTokenMixin:
+    def blacklist(self):
+        revoke(self)
+
+    def check_blacklist(self):
+        if is_revoked(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError("Token is blacklisted")
+
+    def outstand(self):
+        # Only revoked ids are tracked; issued tokens need no record (and the
+        # blacklist app's OutstandingToken table is not installed).
+        return None
+
+class AccessToken(RevocableTokenMixin, BaseAccessToken):
+    # Revocation of access tokens is checked by CachedJWTAuthentication together with the user lookup.
+    pass
+
+class RefreshToken(RevocableTokenMixin, BaseRefreshToken):
+    access_token_class = AccessToken
+
+    def verify(self, *args, **kwargs):
+        self.check_blacklist()
+        super().verify(*args, **kwargs)
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    token_class = RefreshToken
+
     def validate(self, attrs):
         data = super().validate(attrs)
         data["username"] = self.user.username  # Include username in the response
         return data
+
+# Refresh with rotation; BLACKLIST_AFTER_ROTATION revokes the old refresh token via RefreshToken.blacklist().
+class CustomTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = RefreshToken
@@ -1,13 +1,13 @@
 # apps/accounts/urls.py
 from django.urls import path
-from .views import SignupView, CustomTokenObtainPairView
-from rest_framework_simplejwt.views import TokenRefreshView
+from .views import SignupView, CustomTokenObtainPairView, CustomTokenRefreshView, LogoutView
 
 urlpatterns = [
     path('signup/', SignupView.as_view(), name='signup'),
     path('login/', CustomTokenObtainPairView.as_view(), name='login'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', CustomTokenRefreshView.as_view(), name='token_refresh'),
+    path('logout/', LogoutView.as_view(), name='logout'),
     # Optionally, you can also include:
     path("api/token/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
-    path("api/token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("api/token/refresh/", CustomTokenRefreshView.as_view(), name="token_refresh"),
 ]
@@ -3,14 +3,17 @@ from rest_framework import generics, status
 from rest_framework.response import Response
 from django.contrib.auth.models import User
 from .serializers import UserSignupSerializer
-from rest_framework.permissions import AllowAny
-from rest_framework_simplejwt.views import TokenObtainPairView
-from .token import CustomTokenObtainPairSerializer
+from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.views import APIView
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
+from .token import CustomTokenObtainPairSerializer, CustomTokenRefreshSerializer, RefreshToken, revoke
 
 class SignupView(generics.CreateAPIView):
     queryset = User.objects.all()
     serializer_class = UserSignupSerializer
     permission_classes = [AllowAny]
+    throttle_scope = "auth"
 
     def post(self, request, *args, **kwargs):
         serializer = self.get_serializer(data=request.data)
@@ -25,3 +28,22 @@ class SignupView(generics.CreateAPIView):
 # Custom token view using our serializer
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_scope = "auth"  # password guessing is limited per client IP
+
+# Refresh view whose rotated-out refresh tokens are revoked (cache-backed blacklist)
+class CustomTokenRefreshView(TokenRefreshView):
+    serializer_class = CustomTokenRefreshSerializer
+
+# Revoke the current access token and, if given, the refresh token
+class LogoutView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        refresh = request.data.get("refresh")
+        if refresh:
+            try:
+                RefreshToken(refresh).blacklist()
+            except TokenError:
+                pass  # already expired or revoked
+        revoke(request.auth)
+        return Response(status=status.HTTP_205_RESET_CONTENT)
@@ -0,0 +1,25 @@
+from rest_framework.exceptions import NotFound
+from apps.accounts.async_api import async_read_view, json_response
+from .models import ChatMessage, ChatRoom
+from .serializers import ChatRoomSerializer
+from .views import (
+    ChatRoomDetailView, ChatRoomListView, chatroom_list_queryset, chatrooms_for, message_rows, room_rows,
+    serialize_room_rows,
+)
+
+# Async list of the logged-in user's chatrooms, with last message and unread count
+@async_read_view(ChatRoomListView.as_view(), login_required=True)
+async def chatroom_list(request):
+    rooms = [room async for room in chatroom_list_queryset(request.user).values(*room_rows.columns)]
+    message_ids = [room["last_message_id"] for room in rooms if room["last_message_id"]]
+    messages = [m async for m in ChatMessage.objects.filter(id__in=message_ids).values(*message_rows.columns)]
+    return json_response(serialize_room_rows(rooms, messages))
+
+# Async retrieve of a single chatroom
+@async_read_view(ChatRoomDetailView.as_view(), login_required=True)
+async def chatroom_detail(request, pk):
+    try:
+        room = await chatrooms_for(request.user).aget(pk=pk)
+    except ChatRoom.DoesNotExist:
+        raise NotFound("No ChatRoom matches the given query.")
+    return json_response(ChatRoomSerializer(room, context={"request": request}).data)
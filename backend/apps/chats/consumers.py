@@ -0,0 +1,70 @@
+# apps/chats/consumers.py
+import math
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.db.models import Q
+from config.throttling import atake, bucket_key
+from .models import ChatRoom, ChatMessage
+from .serializers import ChatMessageSerializer
+
+def room_group_name(room_id):
+    return f"chat_{room_id}"
+
+class ChatConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Pushes message events for one chatroom to its participants.
+
+    Server -> client events: ``{"type": "message.created", "message": {...}}`` and
+    ``{"type": "message.deleted", "message_id": <id>}``. Clients may also send
+    ``{"type": "message.send", "message": "..."}`` instead of POSTing to the REST API.
+    The message is validated by the same serializer as REST sends; a blank or
+    too long one is answered with ``{"type": "error", "code": "invalid", "errors": {...}}``.
+    Sends share the "chat" throttle budget, and one over it is answered with
+    ``{"type": "error", "code": "throttled", "retry_after": <seconds>}``.
+    """
+
+    async def connect(self):
+        user = self.scope.get("user")
+        self.room_id = int(self.scope["url_route"]["kwargs"]["room_id"])
+        if user is None or not user.is_authenticated or not await self.is_participant(user):
+            await self.close(code=4403)
+            return
+        self.group_name = room_group_name(self.room_id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+
+    async def disconnect(self, code):
+        if hasattr(self, "group_name"):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if content.get("type") != "message.send":
+            return
+        serializer = ChatMessageSerializer(data={"message": str(content.get("message", ""))})
+        if not serializer.is_valid():
+            await self.send_json({"type": "error", "code": "invalid", "errors": serializer.errors})
+            return
+        wait = await atake("chat", bucket_key("chat", self.scope["user"]))
+        if wait:
+            await self.send_json({"type": "error", "code": "throttled", "retry_after": math.ceil(wait)})
+            return
+        # Broadcasting happens from the post_save signal, same as for REST sends.
+        await self.create_message(serializer.validated_data["message"])
+
+    # Group event handlers (dispatched on the event "type")
+    async def chat_message_created(self, event):
+        await self.send_json({"type": "message.created", "message": event["message"]})
+
+    async def chat_message_deleted(self, event):
+        await self.send_json({"type": "message.deleted", "message_id": event["message_id"]})
+
+    @database_sync_to_async
+    def is_participant(self, user):
+        return ChatRoom.objects.filter(Q(buyer=user) | Q(seller=user), pk=self.room_id).exists()
+
+    @database_sync_to_async
+    def create_message(self, text):
+        message = ChatMessage.objects.create(
+            chatroom_id=self.room_id, sender=self.scope["user"], message=text
+        )
+        return ChatMessageSerializer(message).data
@@ -0,0 +1,54 @@
+"""
+Denormalized ``ChatRoom.message_count`` / ``last_message_at``.
+
+Each message insert or delete updates its room with one F-expression UPDATE, so
+the inbox can show and sort by activity without counting messages.
+``reconcile_room_counters`` repairs drift (e.g. after bulk inserts).
+"""
+from django.db.models import Count, F, IntegerField, Max, OuterRef, Q, Subquery, Value
+from django.db.models.functions import Coalesce, Greatest
+from .models import ChatMessage, ChatRoom
+
+def _latest_timestamp():
+    return Subquery(
+        ChatMessage.objects.filter(chatroom=OuterRef("pk")).order_by("-timestamp").values("timestamp")[:1]
+    )
+
+def _message_count():
+    counts = (
+        ChatMessage.objects.filter(chatroom=OuterRef("pk")).order_by()
+        .values("chatroom").annotate(n=Count("id")).values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+def message_added(message):
+    ChatRoom.objects.filter(pk=message.chatroom_id).update(
+        message_count=F("message_count") + 1,
+        # Greatest() is NULL if any argument is, hence the Coalesce for a room's first message.
+        last_message_at=Greatest(Coalesce(F("last_message_at"), Value(message.timestamp)), Value(message.timestamp)),
+    )
+
+def message_removed(message):
+    ChatRoom.objects.filter(pk=message.chatroom_id, message_count__gt=0).update(
+        message_count=F("message_count") - 1,
+    )
+    if message.timestamp is not None:
+        # Only the newest message's removal moves last_message_at.
+        ChatRoom.objects.filter(pk=message.chatroom_id, last_message_at__lte=message.timestamp).update(
+            last_message_at=_latest_timestamp(),
+        )
+
+def reconcile_room_counters(fix=True):
+    """Find rooms whose counters drifted from their messages; fix them unless ``fix`` is False."""
+    drifted = list(
+        ChatRoom.objects.annotate(actual=Count("messages"), actual_last=Max("messages__timestamp"))
+        .filter(~Q(message_count=F("actual")) | ~Q(last_message_at=F("actual_last"))
+                | Q(last_message_at__isnull=True, actual_last__isnull=False)
+                | Q(last_message_at__isnull=False, actual_last__isnull=True))
+        .values_list("pk", "message_count", "actual")
+    )
+    if fix and drifted:
+        ChatRoom.objects.filter(pk__in=[pk for pk, *_ in drifted]).update(
+            message_count=_message_count(), last_message_at=_latest_timestamp(),
+        )
+    return drifted
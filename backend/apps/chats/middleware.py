@@ -0,0 +1,29 @@
+# apps/chats/middleware.py
+from urllib.parse import parse_qs
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.contrib.auth.models import AnonymousUser
+from apps.accounts.authentication import CachedJWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken, TokenError
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    auth = CachedJWTAuthentication()
+    try:
+        return auth.get_user(auth.get_validated_token(raw_token))
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """
+    Authenticate websocket connections with the same SimpleJWT access tokens as the REST API.
+
+    Browsers cannot set an Authorization header on a websocket handshake, so the token is
+    read from the ``token`` query string parameter (``ws://.../?token=<access>``).
+    """
+
+    async def __call__(self, scope, receive, send):
+        query = parse_qs(scope.get("query_string", b"").decode())
+        token = query.get("token", [None])[0]
+        scope["user"] = await get_user_for_token(token) if token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
@@ -0,0 +1,37 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:39
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_messages(apps, schema_editor):
+    ChatRoom = apps.get_model('chats', 'ChatRoom')
+    ChatMessage = apps.get_model('chats', 'ChatMessage')
+    messages = ChatMessage.objects.filter(chatroom=OuterRef('pk')).order_by()
+    counts = messages.values('chatroom').annotate(n=Count('id')).values('n')
+    ChatRoom.objects.update(
+        message_count=Coalesce(Subquery(counts, output_field=models.IntegerField()), Value(0)),
+        last_message_at=Subquery(messages.order_by('-timestamp').values('timestamp')[:1]),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('chats', '0003_chatroom_last_read_chatmessage_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='chatroom',
+            name='last_message_at',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddField(
+            model_name='chatroom',
+            name='message_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(count_messages, migrations.RunPython.noop),
+    ]
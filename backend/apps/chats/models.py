@@ -9,6 +9,12 @@ class ChatRoom(models.Model):
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chatrooms_as_seller')
     buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name='chatrooms_as_buyer')
     created_at = models.DateTimeField(auto_now_add=True)
+    # Id of the newest message each participant has read; drives unread counts.
+    buyer_last_read_id = models.PositiveBigIntegerField(default=0)
+    seller_last_read_id = models.PositiveBigIntegerField(default=0)
+    # Denormalized from the room's messages by apps.chats.counters.
+    message_count = models.PositiveIntegerField(default=0, editable=False)
+    last_message_at = models.DateTimeField(null=True, blank=True, editable=False)
 
     class Meta:
         unique_together = (('buyer', 'seller'),)  # Only one chatroom per buyer and seller
@@ -22,5 +28,10 @@ class ChatMessage(models.Model):
     message = models.TextField()
     timestamp = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=["chatroom", "timestamp"], name="chatmessage_room_time_idx"),
+        ]
+
     def __str__(self):
         return f"Message from {self.sender.username} at {self.timestamp}"
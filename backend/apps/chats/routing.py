@@ -0,0 +1,7 @@
+# apps/chats/routing.py
+from django.urls import re_path
+from .consumers import ChatConsumer
+
+websocket_urlpatterns = [
+    re_path(r"^ws/chats/rooms/(?P<room_id>\d+)/$", ChatConsumer.as_asgi()),
+]
@@ -3,28 +3,56 @@ from rest_framework import serializers
 from django.contrib.auth.models import User
 from .models import ChatRoom, ChatMessage
 from apps.properties.serializers import PropertySerializer
+from config.row_serializers import RowSerializer
 
 class UserSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ['id', 'username']
 
+# Longest message a participant may send, over REST or the websocket.
+MAX_MESSAGE_LENGTH = 4000
+
 class ChatMessageSerializer(serializers.ModelSerializer):
     sender = UserSerializer(read_only=True)
     class Meta:
         model = ChatMessage
         fields = ['id', 'sender', 'message', 'timestamp']
+        extra_kwargs = {'message': {'max_length': MAX_MESSAGE_LENGTH}}
 
 class ChatRoomSerializer(serializers.ModelSerializer):
     property = PropertySerializer(read_only=True)
     seller = UserSerializer(read_only=True)
     buyer = UserSerializer(read_only=True)
-    messages = serializers.SerializerMethodField()
 
     class Meta:
         model = ChatRoom
-        fields = ['id', 'property', 'seller', 'buyer', 'created_at', 'messages']
+        fields = ['id', 'property', 'seller', 'buyer', 'message_count', 'last_message_at', 'created_at']
+
+class ChatRoomListSerializer(ChatRoomSerializer):
+    """Room summary for the inbox: last message preview and unread count instead of the full history."""
+    last_message = serializers.SerializerMethodField()
+    unread_count = serializers.IntegerField(read_only=True)
+
+    class Meta(ChatRoomSerializer.Meta):
+        fields = ChatRoomSerializer.Meta.fields + ['last_message', 'unread_count']
+
+    def get_last_message(self, obj):
+        # The view loads all last messages in one query and passes them in the context.
+        message = self.context.get("last_messages", {}).get(obj.last_message_id)
+        return ChatMessageSerializer(message).data if message else None
+
+class ChatMessageRowSerializer(RowSerializer):
+    """``ChatMessageSerializer`` for ``.values()`` rows (see config.row_serializers)."""
+    serializer_class = ChatMessageSerializer
+
+class ChatRoomListRowSerializer(RowSerializer):
+    """
+    ``ChatRoomListSerializer`` for ``.values()`` rows. The caller loads the last
+    messages and puts each serialized one in its row under ``last_message``.
+    """
+    serializer_class = ChatRoomListSerializer
+    method_columns = {"last_message": ("last_message_id",)}
 
-    def get_messages(self, obj):
-        msgs = obj.messages.all().order_by("timestamp")
-        return ChatMessageSerializer(msgs, many=True).data
+    def get_last_message(self, row, prefix):
+        return row.get(prefix + "last_message")
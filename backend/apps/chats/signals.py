@@ -0,0 +1,37 @@
+# apps/chats/signals.py
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .consumers import room_group_name
+from .counters import message_added, message_removed
+from .models import ChatMessage
+from .serializers import ChatMessageSerializer
+
+def broadcast(room_id, event):
+    channel_layer = get_channel_layer()
+    if channel_layer is not None:
+        async_to_sync(channel_layer.group_send)(room_group_name(room_id), event)
+
+# Push message events to connected participants once the write is committed.
+@receiver(post_save, sender=ChatMessage)
+def message_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        event = {"type": "chat.message.created", "message": ChatMessageSerializer(instance).data}
+        transaction.on_commit(lambda: broadcast(instance.chatroom_id, event))
+
+@receiver(post_delete, sender=ChatMessage)
+def message_deleted(sender, instance, **kwargs):
+    event = {"type": "chat.message.deleted", "message_id": instance.pk}
+    transaction.on_commit(lambda: broadcast(instance.chatroom_id, event))
+
+# Keep the room's message_count / last_message_at in step.
+@receiver(post_save, sender=ChatMessage)
+def count_message_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        message_added(instance)
+
+@receiver(post_delete, sender=ChatMessage)
+def count_message_removed(sender, instance, **kwargs):
+    message_removed(instance)
@@ -1,3 +1,203 @@
-from django.test import TestCase
+import json
+from asgiref.sync import sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+from django.core.cache import cache
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIRequestFactory, force_authenticate
+from config.testing import ApiTestCase, QueryCountTestCase, call_async_view
+from . import async_views
+from .consumers import room_group_name
+from .counters import reconcile_room_counters
+from .middleware import JWTAuthMiddleware
+from .models import ChatRoom, ChatMessage
+from .routing import websocket_urlpatterns
+from .serializers import MAX_MESSAGE_LENGTH, ChatRoomListSerializer
+from .views import ChatRoomDetailView, ChatRoomListView, chatroom_list_queryset
 
-# Create your tests here.
+class ChatQueryCountTests(QueryCountTestCase):
+    def test_chatroom_list(self):
+        self.assertConstantQueries("/api/chats/rooms/", self.add_rooms)
+
+    def test_chatroom_detail(self):
+        seller = self.make_seller()
+        room = ChatRoom.objects.create(property=self.make_property(seller), seller=seller, buyer=self.user)
+
+        def populate(n):
+            for _ in range(n):
+                ChatMessage.objects.create(chatroom=room, sender=seller, message="Hi")
+        self.assertConstantQueries(f"/api/chats/rooms/{room.pk}/", populate)
+
+    def test_chatroom_messages(self):
+        seller = self.make_seller()
+        room = ChatRoom.objects.create(property=self.make_property(seller), seller=seller, buyer=self.user)
+
+        def populate(n):
+            for _ in range(n):
+                ChatMessage.objects.create(chatroom=room, sender=seller, message="Hi")
+        self.assertConstantQueries(f"/api/chats/rooms/{room.pk}/messages/", populate)
+
+class ChatMessagesTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.make_seller()
+        self.room = ChatRoom.objects.create(seller=self.seller, buyer=self.user)
+        self.messages = [
+            ChatMessage.objects.create(chatroom=self.room, sender=self.seller, message=f"m{i}")
+            for i in range(5)
+        ]
+        self.url = f"/api/chats/rooms/{self.room.pk}/messages/"
+
+    def ids(self, response):
+        return [m["id"] for m in response.json()["results"]]
+
+    def test_pages_backwards_in_order(self):
+        response = self.client.get(self.url, {"limit": 3})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[2:]])
+        self.assertTrue(response.json()["has_more"])
+        response = self.client.get(self.url, {"limit": 3, "before": self.messages[2].id})
+        self.assertEqual(self.ids(response), [m.id for m in self.messages[:2]])
+        self.assertFalse(response.json()["has_more"])
+
+    def test_after_returns_only_new_messages(self):
+        response = self.client.get(self.url, {"after": self.messages[3].id})
+        self.assertEqual(self.ids(response), [self.messages[4].id])
+
+    def test_unread_count_and_last_message(self):
+        room = self.client.get("/api/chats/rooms/").json()[0]
+        self.assertEqual(room["unread_count"], 5)
+        self.assertEqual(room["last_message"]["id"], self.messages[-1].id)
+        self.client.get(self.url)
+        self.assertEqual(self.client.get("/api/chats/rooms/").json()[0]["unread_count"], 0)
+
+class AsyncViewTests(ApiTestCase):
+    """The async read views must answer exactly like the DRF views they stand in for."""
+
+    def assertSameAsSync(self, url, async_view, view, **kwargs):
+        response = call_async_view(async_view, url, self.user, **kwargs)
+        cache.clear()
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.user)
+        expected = view.as_view()(request, **kwargs).render()
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_matches_sync_views(self):
+        self.add_rooms(3)
+        room = ChatRoom.objects.first()
+        self.assertSameAsSync("/api/chats/rooms/", async_views.chatroom_list, ChatRoomListView)
+        self.assertSameAsSync(f"/api/chats/rooms/{room.pk}/", async_views.chatroom_detail, ChatRoomDetailView, pk=room.pk)
+
+    def test_requires_authentication(self):
+        response = call_async_view(async_views.chatroom_list, "/api/chats/rooms/")
+        self.assertEqual(response.status_code, 401)
+        self.assertIn("WWW-Authenticate", response)
+
+class CounterTests(ApiTestCase):
+    def test_message_count_and_last_message_at(self):
+        seller = self.make_seller()
+        room = ChatRoom.objects.create(property=self.make_property(seller), seller=seller, buyer=self.user)
+        for text in ("one", "two"):
+            self.client.post("/api/chats/messages/send/", {"chatroom": room.id, "message": text})
+        first, last = ChatMessage.objects.order_by("id")
+        room.refresh_from_db()
+        self.assertEqual((room.message_count, room.last_message_at), (2, last.timestamp))
+
+        last.delete()
+        room.refresh_from_db()
+        self.assertEqual((room.message_count, room.last_message_at), (1, first.timestamp))
+        first.delete()
+        room.refresh_from_db()
+        self.assertEqual((room.message_count, room.last_message_at), (0, None))
+
+    def test_reconcile_fixes_drift(self):
+        seller = self.make_seller()
+        room = ChatRoom.objects.create(property=self.make_property(seller), seller=seller, buyer=self.user)
+        ChatMessage.objects.bulk_create([ChatMessage(chatroom=room, sender=seller, message="Hi")])
+        self.assertEqual(reconcile_room_counters(), [(room.id, 0, 1)])
+        self.assertEqual(reconcile_room_counters(fix=False), [])
+        room.refresh_from_db()
+        self.assertEqual(room.last_message_at, ChatMessage.objects.get().timestamp)
+
+class RowSerializerTests(ApiTestCase):
+    """The chat room list fast path must render exactly the bytes of ChatRoomListSerializer."""
+
+    def test_chatroom_list(self):
+        self.add_rooms(2)
+        ChatRoom.objects.create(property=self.make_property(self.make_seller()), seller=self.user, buyer=self.make_seller())
+        rooms = list(chatroom_list_queryset(self.user))
+        last_messages = ChatMessage.objects.select_related("sender").in_bulk([room.last_message_id for room in rooms])
+        expected = ChatRoomListSerializer(rooms, many=True, context={"last_messages": last_messages}).data
+        response = self.client.get("/api/chats/rooms/")
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+class ConsumerTests(ApiTestCase):
+    application = JWTAuthMiddleware(URLRouter(websocket_urlpatterns))
+
+    def setUp(self):
+        super().setUp()
+        self.seller = self.make_seller()
+        self.room = ChatRoom.objects.create(property=self.make_property(self.seller), seller=self.seller, buyer=self.user)
+
+    def communicator(self, user=None, room=None):
+        path = f"/ws/chats/rooms/{(room or self.room).pk}/"
+        if user is not None:
+            path += f"?token={AccessToken.for_user(user)}"
+        return WebsocketCommunicator(self.application, path)
+
+    async def test_connect_requires_a_participant(self):
+        outsider = await sync_to_async(self.make_seller)()
+        for user in (None, outsider):
+            communicator = self.communicator(user)
+            connected, code = await communicator.connect()
+            self.assertFalse(connected)
+            self.assertEqual(code, 4403)
+        communicator = self.communicator(self.seller)
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        await communicator.disconnect()
+
+    async def test_send_and_broadcast(self):
+        buyer, seller = self.communicator(self.user), self.communicator(self.seller)
+        await buyer.connect()
+        await seller.connect()
+        # The consumer writes on the main thread; capture (then run) its broadcast there.
+        capture = self.captureOnCommitCallbacks(execute=True)
+        await sync_to_async(capture.__enter__)()
+        await buyer.send_json_to({"type": "message.send", "message": "  Is it available?  "})
+        self.assertTrue(await buyer.receive_nothing())
+        await sync_to_async(capture.__exit__)(None, None, None)
+        message = await ChatMessage.objects.aget(chatroom=self.room)
+        self.assertEqual(message.message, "Is it available?")
+        for communicator in (buyer, seller):
+            event = await communicator.receive_json_from()
+            self.assertEqual(event["type"], "message.created")
+            self.assertEqual(event["message"]["id"], message.pk)
+        await get_channel_layer().group_send(
+            room_group_name(self.room.pk), {"type": "chat.message.deleted", "message_id": message.pk}
+        )
+        self.assertEqual(await seller.receive_json_from(), {"type": "message.deleted", "message_id": message.pk})
+        await buyer.disconnect()
+        await seller.disconnect()
+
+    async def test_invalid_messages(self):
+        communicator = self.communicator(self.user)
+        await communicator.connect()
+        for text in ("   ", "x" * (MAX_MESSAGE_LENGTH + 1)):
+            await communicator.send_json_to({"type": "message.send", "message": text})
+            event = await communicator.receive_json_from()
+            self.assertEqual(event["type"], "error")
+            self.assertEqual(event["code"], "invalid")
+            self.assertIn("message", event["errors"])
+        self.assertFalse(await ChatMessage.objects.filter(chatroom=self.room).aexists())
+        await communicator.disconnect()
+
+    def test_rest_sends_share_the_cap(self):
+        response = self.client.post(
+            "/api/chats/messages/send/", {"chatroom": self.room.pk, "message": "x" * (MAX_MESSAGE_LENGTH + 1)},
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("message", response.json())
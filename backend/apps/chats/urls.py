@@ -1,11 +1,23 @@
 # apps/chats/urls.py
+from django.conf import settings
 from django.urls import path
-from .views import CreateChatRoomView, ChatRoomListView, ChatRoomDetailView, SendMessageView, DeleteMessageView
+from . import async_views
+from .views import (
+    CreateChatRoomView, ChatRoomListView, ChatRoomDetailView, ChatRoomMessagesView,
+    SendMessageView, DeleteMessageView,
+)
+
+# Reads are served by async views when ASYNC_VIEWS is on
+if settings.ASYNC_VIEWS:
+    room_list_view, room_detail_view = async_views.chatroom_list, async_views.chatroom_detail
+else:
+    room_list_view, room_detail_view = ChatRoomListView.as_view(), ChatRoomDetailView.as_view()
 
 urlpatterns = [
-    path("rooms/", ChatRoomListView.as_view(), name="chatroom-list"),
+    path("rooms/", room_list_view, name="chatroom-list"),
     path("rooms/create/", CreateChatRoomView.as_view(), name="create-chatroom"),
-    path("rooms/<int:pk>/", ChatRoomDetailView.as_view(), name="chatroom-detail"),
+    path("rooms/<int:pk>/", room_detail_view, name="chatroom-detail"),
+    path("rooms/<int:pk>/messages/", ChatRoomMessagesView.as_view(), name="chatroom-messages"),
     path("messages/send/", SendMessageView.as_view(), name="send-message"),
     path("messages/delete/<int:message_id>/", DeleteMessageView.as_view(), name="delete-message"),
 ]
@@ -1,9 +1,50 @@
 from rest_framework import generics, permissions, serializers
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db.models import Q, F, Case, When, Count, OuterRef, Subquery
+from django.utils.dateparse import parse_datetime
+from rest_framework.response import Response
 from apps.properties.models import Property
 from .models import ChatRoom, ChatMessage
-from .serializers import ChatRoomSerializer, ChatMessageSerializer
+from .serializers import (
+    ChatRoomSerializer, ChatRoomListSerializer, ChatMessageSerializer, ChatMessageRowSerializer,
+    ChatRoomListRowSerializer,
+)
+
+def chatrooms_for(user):
+    """Chatrooms the user takes part in, with everything ChatRoomSerializer reads joined."""
+    return (
+        ChatRoom.objects.filter(Q(buyer=user) | Q(seller=user))
+        .select_related("property__seller", "seller", "buyer")
+    )
+
+def chatroom_list_queryset(user):
+    """The user's chatrooms annotated with their last message id and unread count."""
+    last_message = ChatMessage.objects.filter(chatroom=OuterRef("pk")).order_by("-id").values("id")[:1]
+    last_read = Case(
+        When(buyer=user, then=F("buyer_last_read_id")),
+        default=F("seller_last_read_id"),
+    )
+    return chatrooms_for(user).annotate(
+        last_message_id=Subquery(last_message),
+        unread_count=Count(
+            "messages",
+            filter=Q(messages__id__gt=last_read) & ~Q(messages__sender=user),
+        ),
+    )
+
+room_rows = ChatRoomListRowSerializer()
+message_rows = ChatMessageRowSerializer()
+
+def serialize_room_rows(rooms, messages):
+    """Serialize ``chatroom_list_queryset`` rows (``.values(*room_rows.columns)``) with their last message rows."""
+    messages = list(messages)
+    last_messages = {message["id"]: data for message, data in zip(messages, message_rows.many(messages))}
+    for room in rooms:
+        room["last_message"] = last_messages.get(room["last_message_id"])
+    return room_rows.many(rooms)
+
+def last_read_field(chatroom, user):
+    return "buyer_last_read_id" if chatroom.buyer_id == user.id else "seller_last_read_id"
 
 # Create or get an existing chatroom between buyer and seller
 class CreateChatRoomView(generics.CreateAPIView):
@@ -12,16 +53,15 @@ class CreateChatRoomView(generics.CreateAPIView):
 
     def perform_create(self, serializer):
         property_id = self.request.data.get("property")
-        property_obj = get_object_or_404(Property, id=property_id)
+        property_obj = get_object_or_404(Property.objects.select_related("seller"), id=property_id)
 
         # Prevent seller from creating a chatroom with themselves
-        if property_obj.seller == self.request.user:
+        if property_obj.seller_id == self.request.user.id:
             raise serializers.ValidationError("You cannot contact yourself.")
 
         # Check if a chatroom already exists between these two users (regardless of property)
-        chatroom = ChatRoom.objects.filter(
-            Q(buyer=self.request.user, seller=property_obj.seller) |
-            Q(buyer=property_obj.seller, seller=self.request.user)
+        chatroom = chatrooms_for(self.request.user).filter(
+            Q(buyer_id=property_obj.seller_id) | Q(seller_id=property_obj.seller_id)
         ).first()
 
         if chatroom:
@@ -38,33 +78,88 @@ class CreateChatRoomView(generics.CreateAPIView):
 
 # List all chatrooms for the logged-in user (either as buyer or seller)
 class ChatRoomListView(generics.ListAPIView):
-    serializer_class = ChatRoomSerializer
+    serializer_class = ChatRoomListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        return ChatRoom.objects.filter(Q(buyer=user) | Q(seller=user))
+        return chatroom_list_queryset(self.request.user)
+
+    def list(self, request, *args, **kwargs):
+        # Read-only fast path: rows straight from .values(), same output as ChatRoomListSerializer.
+        rooms = list(self.filter_queryset(self.get_queryset()).values(*room_rows.columns))
+        message_ids = [room["last_message_id"] for room in rooms if room["last_message_id"]]
+        messages = ChatMessage.objects.filter(id__in=message_ids).values(*message_rows.columns)
+        return Response(serialize_room_rows(rooms, messages))
 
-# Retrieve a single chatroom along with its messages
+# Retrieve a single chatroom (messages are paged through ChatRoomMessagesView)
 class ChatRoomDetailView(generics.RetrieveAPIView):
     serializer_class = ChatRoomSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        user = self.request.user
-        return ChatRoom.objects.filter(Q(buyer=user) | Q(seller=user))
+        return chatrooms_for(self.request.user)
+
+# Page through a chatroom's messages by id (?before= / ?after=) or time (?since=)
+class ChatRoomMessagesView(generics.ListAPIView):
+    serializer_class = ChatMessageSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    page_size = 50
+    max_page_size = 200
+
+    def list(self, request, *args, **kwargs):
+        user = request.user
+        chatroom = get_object_or_404(ChatRoom.objects.filter(Q(buyer=user) | Q(seller=user)), pk=self.kwargs["pk"])
+        params = request.query_params
+        try:
+            limit = min(max(int(params.get("limit", self.page_size)), 1), self.max_page_size)
+            before = int(params["before"]) if params.get("before") else None
+            after = int(params["after"]) if params.get("after") else None
+        except ValueError:
+            raise serializers.ValidationError({"detail": "limit, before and after must be integers."})
+        since = None
+        if params.get("since"):
+            since = parse_datetime(params["since"])
+            if since is None:
+                raise serializers.ValidationError({"since": "Expected an ISO 8601 datetime."})
+
+        qs = ChatMessage.objects.filter(chatroom=chatroom).select_related("sender")
+        if after is not None or since is not None:
+            # Catching up: oldest first, starting right after what the client already has.
+            if after is not None:
+                qs = qs.filter(id__gt=after)
+            if since is not None:
+                qs = qs.filter(timestamp__gt=since)
+            messages = list(qs.order_by("id")[: limit + 1])
+            has_more = len(messages) > limit
+            messages = messages[:limit]
+        else:
+            # Scrolling back: newest first from the top of the history (or from ?before=).
+            if before is not None:
+                qs = qs.filter(id__lt=before)
+            messages = list(qs.order_by("-id")[: limit + 1])
+            has_more = len(messages) > limit
+            messages = messages[:limit][::-1]
+
+        if messages:
+            newest = messages[-1].id
+            field = last_read_field(chatroom, user)
+            ChatRoom.objects.filter(pk=chatroom.pk, **{f"{field}__lt": newest}).update(**{field: newest})
+
+        serializer = self.get_serializer(messages, many=True)
+        return Response({"results": serializer.data, "has_more": has_more})
 
 # Send a message in a chatroom
 class SendMessageView(generics.CreateAPIView):
     serializer_class = ChatMessageSerializer
     permission_classes = [permissions.IsAuthenticated]
+    throttle_scope = "chat"
 
     def perform_create(self, serializer):
         chatroom_id = self.request.data.get("chatroom")
         chatroom = get_object_or_404(ChatRoom, id=chatroom_id)
 
         # Ensure the user is a participant in this chatroom
-        if chatroom.buyer != self.request.user and chatroom.seller != self.request.user:
+        if self.request.user.id not in (chatroom.buyer_id, chatroom.seller_id):
             raise serializers.ValidationError("You are not a participant in this chatroom.")
 
         serializer.save(chatroom=chatroom, sender=self.request.user)
@@ -78,7 +173,7 @@ class DeleteMessageView(generics.DestroyAPIView):
         message = get_object_or_404(ChatMessage, id=self.kwargs["message_id"])
 
         # Ensure only the sender can delete their message
-        if message.sender != self.request.user:
+        if message.sender_id != self.request.user.id:
             raise serializers.ValidationError("You can only delete your own messages.")
 
         return message
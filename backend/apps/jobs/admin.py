@@ -0,0 +1,14 @@
+from django.contrib import admin
+from .models import Job
+
+class JobAdmin(admin.ModelAdmin):
+    list_display = ("id", "name", "status", "priority", "attempts", "run_after", "locked_by", "created_at")
+    list_filter = ("status", "name")
+    search_fields = ("name", "last_error")
+    actions = ["requeue"]
+
+    @admin.action(description="Requeue selected jobs")
+    def requeue(self, request, queryset):
+        queryset.update(status="queued", attempts=0, locked_by="", locked_at=None)
+
+admin.site.register(Job, JobAdmin)
@@ -0,0 +1,40 @@
+import signal
+import threading
+from datetime import timedelta
+from django.core.management.base import BaseCommand
+from apps.jobs.queue import TASKS, work
+
+class Command(BaseCommand):
+    help = "Run background job workers. Start several processes to scale out; no broker is needed."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=1, help="Worker threads in this process.")
+        parser.add_argument("--tasks", help="Comma separated task names to run (default: all).")
+        parser.add_argument("--poll-interval", type=float, default=1.0, help="Seconds to sleep when idle.")
+        parser.add_argument("--stale-after", type=int, default=600, help="Requeue jobs locked longer than this (seconds).")
+        parser.add_argument("--burst", action="store_true", help="Exit once the queue is empty.")
+
+    def handle(self, *args, **options):
+        names = options["tasks"].split(",") if options["tasks"] else None
+        stop = threading.Event()
+        if threading.current_thread() is threading.main_thread():
+            # Finish the job in hand, then exit.
+            for sig in (signal.SIGINT, signal.SIGTERM):
+                signal.signal(sig, lambda *_: stop.set())
+
+        self.stdout.write(f"Worker started ({options['threads']} thread(s)); tasks: {', '.join(names or sorted(TASKS))}")
+        counts = []
+        kwargs = {
+            "names": names, "poll_interval": options["poll_interval"],
+            "stale_after": timedelta(seconds=options["stale_after"]), "burst": options["burst"],
+        }
+        threads = [
+            threading.Thread(target=lambda: counts.append(work(stop, **kwargs)), daemon=True)
+            for _ in range(options["threads"])
+        ]
+        for thread in threads:
+            thread.start()
+        while any(thread.is_alive() for thread in threads):
+            for thread in threads:
+                thread.join(0.5)
+        self.stdout.write(self.style.SUCCESS(f"Worker stopped after {sum(counts)} job(s)."))
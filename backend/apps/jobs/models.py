@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils import timezone
+
+JOB_STATUS_CHOICES = (
+    ('queued', 'Queued'),
+    ('running', 'Running'),
+    ('failed', 'Failed'),
+)
+
+class Job(models.Model):
+    # Registered task name (see apps.jobs.queue.task) and its JSON-serializable arguments.
+    name = models.CharField(max_length=100)
+    args = models.JSONField(default=list, blank=True)
+    priority = models.SmallIntegerField(default=0)  # higher runs first
+    status = models.CharField(max_length=10, choices=JOB_STATUS_CHOICES, default='queued')
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    locked_by = models.CharField(max_length=100, blank=True)
+    locked_at = models.DateTimeField(blank=True, null=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            # Workers pick the next due job by (status, priority, run_after).
+            models.Index(fields=["status", "-priority", "run_after"], name="job_queue_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,142 @@
+"""
+Database-backed background job queue.
+
+Side-effect work is registered with ``@task("name")`` and queued with
+``enqueue("name", *args)``. The job row is inserted in the caller's
+transaction, so workers only see it once that transaction commits, and a
+rolled-back request leaves no job behind. ``run_jobs`` worker processes claim
+due jobs in priority order with a conditional UPDATE (no broker and no
+``SKIP LOCKED`` needed, so this works on MySQL and SQLite alike), retry
+failures with exponential backoff and keep jobs that ran out of attempts
+as ``failed`` for inspection. Finished jobs are deleted.
+
+With ``JOBS_RUN_IMMEDIATELY`` set, ``enqueue`` runs the task in-process right
+after commit instead, which is handy for local development without a worker.
+It still runs in its own transaction, and a failure is logged rather than
+raised into the request that already committed.
+"""
+import logging
+import os
+import socket
+import threading
+import time
+import traceback
+from datetime import timedelta
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+from .models import Job
+
+logger = logging.getLogger(__name__)
+
+TASKS = {}
+PRIORITY_HIGH, PRIORITY_DEFAULT, PRIORITY_LOW = 10, 0, -10
+RETRY_BASE_SECONDS = 5
+RETRY_MAX_SECONDS = 3600
+CLAIM_BATCH = 10
+
+def task(name, priority=PRIORITY_DEFAULT, max_attempts=3):
+    """Register the decorated function as job ``name``; arguments must be JSON-serializable."""
+    def register(func):
+        TASKS[name] = {"func": func, "priority": priority, "max_attempts": max_attempts}
+        return func
+    return register
+
+def enqueue(name, *args, priority=None, delay=None, max_attempts=None):
+    """Queue ``name(*args)``; it runs after the current transaction commits."""
+    spec = TASKS[name]
+    if getattr(settings, "JOBS_RUN_IMMEDIATELY", False):
+        transaction.on_commit(lambda: run_immediately(name, args))
+        return None
+    return Job.objects.create(
+        name=name,
+        args=list(args),
+        priority=spec["priority"] if priority is None else priority,
+        max_attempts=spec["max_attempts"] if max_attempts is None else max_attempts,
+        run_after=timezone.now() + (delay or timedelta()),
+    )
+
+def retry_delay(attempts):
+    return timedelta(seconds=min(RETRY_BASE_SECONDS * 2 ** (attempts - 1), RETRY_MAX_SECONDS))
+
+def requeue_stale(timeout):
+    """Return jobs whose worker died mid-run (locked longer than ``timeout``) to the queue."""
+    cutoff = timezone.now() - timeout
+    return Job.objects.filter(status="running", locked_at__lt=cutoff).update(
+        status="queued", locked_by="", locked_at=None,
+    )
+
+def claim(worker_id, names=None):
+    """Lock and return the next due job, or None when the queue is empty."""
+    now = timezone.now()
+    candidates = Job.objects.filter(status="queued", run_after__lte=now)
+    if names:
+        candidates = candidates.filter(name__in=names)
+    for pk in candidates.order_by("-priority", "run_after", "id").values_list("id", flat=True)[:CLAIM_BATCH]:
+        # Whoever flips the status first owns the job; the others move on to the next id.
+        if Job.objects.filter(pk=pk, status="queued").update(status="running", locked_by=worker_id, locked_at=now):
+            return Job.objects.get(pk=pk)
+    return None
+
+def execute(spec, args):
+    """Run a task the way a worker does: inside a transaction of its own."""
+    with transaction.atomic():
+        spec["func"](*args)
+
+def run_immediately(name, args):
+    """Run ``name(*args)`` in-process; there is no job row, so a failure is only logged."""
+    try:
+        execute(TASKS[name], args)
+    except Exception:
+        logger.exception("Job %s%r failed", name, tuple(args))
+        return False
+    return True
+
+def run_job(job):
+    """Execute a claimed job and record the outcome. Returns True on success."""
+    spec = TASKS.get(job.name)
+    job.attempts += 1
+    try:
+        if spec is None:
+            raise LookupError(f"No task registered as '{job.name}'.")
+        execute(spec, job.args)
+    except Exception:
+        job.last_error = traceback.format_exc()[-4000:]
+        job.locked_by, job.locked_at = "", None
+        if job.attempts >= job.max_attempts:
+            job.status = "failed"
+            logger.error("Job %s failed permanently:\n%s", job, job.last_error)
+        else:
+            job.status = "queued"
+            job.run_after = timezone.now() + retry_delay(job.attempts)
+            logger.warning("Job %s failed (attempt %d), retrying at %s", job, job.attempts, job.run_after)
+        job.save(update_fields=["attempts", "last_error", "status", "run_after", "locked_by", "locked_at"])
+        return False
+    job.delete()
+    return True
+
+def default_worker_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+
+def work(stop, names=None, poll_interval=1.0, stale_after=timedelta(minutes=10), burst=False):
+    """
+    Worker loop: run jobs until ``stop`` (a threading.Event) is set. With ``burst``,
+    return as soon as the queue is empty. Returns the number of jobs processed.
+    """
+    worker_id = default_worker_id()
+    processed, last_stale_check = 0, 0.0
+    while not stop.is_set():
+        close_old_connections()
+        if time.monotonic() - last_stale_check > 60:
+            requeue_stale(stale_after)
+            last_stale_check = time.monotonic()
+        job = claim(worker_id, names)
+        if job is None:
+            if burst:
+                break
+            stop.wait(poll_interval)
+            continue
+        run_job(job)
+        processed += 1
+    close_old_connections()
+    return processed
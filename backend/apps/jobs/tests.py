@@ -0,0 +1,76 @@
+import threading
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase, override_settings
+from apps.properties.models import Property
+from apps.properties.search import search
+from .models import Job
+from .queue import TASKS, claim, enqueue, run_job, task, work
+
+calls = []
+
+@task("tests.record")
+def record(value):
+    calls.append(value)
+
+@task("tests.flaky", max_attempts=2)
+def flaky():
+    raise RuntimeError("boom")
+
+@task("tests.atomic_depth")
+def atomic_depth():
+    calls.append(len(connection.atomic_blocks))
+
+class JobQueueTests(TestCase):
+    def setUp(self):
+        calls.clear()
+
+    def drain(self):
+        return work(threading.Event(), burst=True)
+
+    def test_jobs_run_by_priority(self):
+        enqueue("tests.record", "low", priority=-1)
+        enqueue("tests.record", "high", priority=5)
+        enqueue("tests.record", "default")
+        self.assertEqual(self.drain(), 3)
+        self.assertEqual(calls, ["high", "default", "low"])
+        self.assertFalse(Job.objects.exists())
+
+    def test_failures_are_retried_then_kept(self):
+        job = enqueue("tests.flaky")
+        self.assertFalse(run_job(claim("w1")))
+        job.refresh_from_db()
+        self.assertEqual((job.status, job.attempts), ("queued", 1))
+        self.assertIsNone(claim("w1"))  # backing off
+        Job.objects.filter(pk=job.pk).update(run_after=job.created_at)
+        run_job(claim("w1"))
+        job.refresh_from_db()
+        self.assertEqual(job.status, "failed")
+        self.assertIn("boom", job.last_error)
+
+    def test_claimed_job_is_not_handed_out_twice(self):
+        enqueue("tests.record", 1)
+        self.assertIsNotNone(claim("w1"))
+        self.assertIsNone(claim("w2"))
+
+    def test_listing_is_indexed_by_worker(self):
+        self.assertIn("properties.index_property", TASKS)
+        seller = User.objects.create_user(username="seller", password="secret-pass")
+        Property.objects.create(
+            seller=seller, name="Lake view villa", location="Pune", description="Quiet",
+            price="9000000.00", property_type="villa",
+        )
+        self.assertEqual(search("lake"), [])
+        self.drain()
+        self.assertEqual([p.name for p in search("lake")], ["Lake view villa"])
+
+    @override_settings(JOBS_RUN_IMMEDIATELY=True)
+    def test_immediate_jobs_run_in_a_transaction_after_commit(self):
+        depth = len(connection.atomic_blocks)
+        with self.assertLogs("apps.jobs.queue", "ERROR") as logs, self.captureOnCommitCallbacks(execute=True):
+            self.assertIsNone(enqueue("tests.atomic_depth"))
+            enqueue("tests.flaky")  # logged, not raised into the committed request
+            self.assertEqual(calls, [])
+        self.assertIn("boom", logs.output[0])
+        self.assertEqual(calls, [depth + 1])
+        self.assertFalse(Job.objects.exists())
@@ -0,0 +1,528 @@
+"""
+Reproducible API benchmarks.
+
+``seed`` fills the configured database with a deterministic synthetic data set
+(users, listings, wishlists, chat rooms and messages, all owned by ``bench_*``
+users). ``run`` then drives a weighted mix of read endpoints with concurrent
+clients, in-process through the Django test client (WSGI or ASGI handler) or
+over HTTP against a running server, and returns a JSON-serializable report with
+latency percentiles, throughput and SQL queries per request. ``compare`` lists the
+regressions of one report against a baseline. ``serializer_timings`` is a
+microbenchmark of the DRF serializers against their ``.values()`` fast paths.
+"""
+import asyncio
+import http.client
+import itertools
+import platform
+import random
+import re
+import subprocess
+import threading
+import time
+from contextlib import ExitStack
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from urllib.parse import urlsplit
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import connection, connections
+from django.db.models import Count, Max, OuterRef, Q, Subquery
+from django.test import AsyncClient, Client, override_settings
+from apps.accounts.token import AccessToken
+from apps.chats.counters import reconcile_room_counters
+from apps.chats.models import ChatMessage, ChatRoom
+from apps.properties.bulk import insert_properties
+from apps.properties.counters import reconcile_wishlist_counts
+from apps.properties.geo import GAZETTEER
+from apps.properties.models import Property, SearchTerm, Wishlist
+from .metrics import RequestStats
+
+USER_PREFIX = "bench_"
+PROPERTY_TYPES = ("apartment", "villa", "house", "plot", "commercial")
+FURNISHED = ("furnished", "semi-furnished", "unfurnished")
+AMENITIES = ("parking", "gym", "pool", "lift", "garden", "power backup", "clubhouse", "security")
+ADJECTIVES = ("Spacious", "Cozy", "Modern", "Sunny", "Quiet", "Luxury", "Renovated", "Airy")
+WORDS = ("bedroom", "balcony", "kitchen", "view", "metro", "school", "park", "market", "hospital", "road")
+
+def _user_ids():
+    return list(User.objects.filter(username__startswith=USER_PREFIX).order_by("id").values_list("id", flat=True))
+
+def flush():
+    """Delete every ``bench_*`` user; their listings, wishlists and chats cascade."""
+    deleted, _ = User.objects.filter(username__startswith=USER_PREFIX).delete()
+    return deleted
+
+def _fake_property(rng, seller, number):
+    city = rng.choice(list(GAZETTEER))
+    property_type = rng.choice(PROPERTY_TYPES)
+    bedrooms = rng.randint(1, 5)
+    return Property(
+        seller=seller,
+        name=f"{rng.choice(ADJECTIVES)} {bedrooms}BHK {property_type} #{number}",
+        location=city,
+        description=" ".join(rng.choices(WORDS, k=12)),
+        price=Decimal(rng.randrange(500_000, 50_000_000, 1000)),
+        property_type=property_type,
+        sell_or_rent=rng.choice(("sell", "sell", "rent")),
+        images=[],
+        furnished_status=rng.choice(FURNISHED),
+        floor_number=rng.randint(0, 20),
+        total_floors=rng.randint(20, 30),
+        property_age=f"{rng.randint(0, 30)} years",
+        amenities=rng.sample(AMENITIES, rng.randint(0, 4)),
+        security_features=[],
+    )
+
+def seed(users=100, properties=1000, wishlists=5, rooms=200, messages=20, random_seed=42, batch_size=500):
+    """
+    Create the synthetic data set and return the number of rows per table.
+
+    ``wishlists`` is per user and ``messages`` per chat room. The same arguments
+    always produce the same data (apart from timestamps and primary keys).
+    """
+    rng = random.Random(random_seed)
+    password = make_password("bench-password")
+    start = User.objects.filter(username__startswith=USER_PREFIX).count()
+    User.objects.bulk_create(
+        [User(username=f"{USER_PREFIX}{start + i}", password=password) for i in range(users)],
+        batch_size=batch_size,
+    )
+    user_ids = _user_ids()
+
+    by_seller = {}
+    for number in range(properties):
+        seller_id = rng.choice(user_ids)
+        by_seller.setdefault(seller_id, []).append(_fake_property(rng, User(id=seller_id), number))
+    for seller_id, instances in sorted(by_seller.items()):
+        for offset in range(0, len(instances), batch_size):
+            insert_properties(instances[offset:offset + batch_size], User(id=seller_id))
+
+    listings = list(Property.objects.filter(seller_id__in=user_ids).values_list("id", "seller_id"))
+    wishlist_rows = []
+    for user_id in user_ids:
+        for property_id, _ in rng.sample(listings, min(wishlists, len(listings))):
+            wishlist_rows.append(Wishlist(user_id=user_id, property_id=property_id))
+    Wishlist.objects.bulk_create(wishlist_rows, batch_size=batch_size, ignore_conflicts=True)
+
+    pairs = set(ChatRoom.objects.values_list("buyer_id", "seller_id"))
+    room_rows = []
+    for _ in range(rooms * 3):
+        if len(room_rows) >= rooms:
+            break
+        property_id, seller_id = rng.choice(listings)
+        buyer_id = rng.choice(user_ids)
+        if buyer_id != seller_id and (buyer_id, seller_id) not in pairs:
+            pairs.add((buyer_id, seller_id))
+            room_rows.append(ChatRoom(property_id=property_id, seller_id=seller_id, buyer_id=buyer_id))
+    last_room = ChatRoom.objects.aggregate(last=Max("id"))["last"] or 0
+    ChatRoom.objects.bulk_create(room_rows, batch_size=batch_size)
+
+    message_rows = []
+    for room in ChatRoom.objects.filter(id__gt=last_room).values("id", "buyer_id", "seller_id"):
+        for _ in range(messages):
+            sender = rng.choice((room["buyer_id"], room["seller_id"]))
+            message_rows.append(ChatMessage(chatroom_id=room["id"], sender_id=sender, message=" ".join(rng.choices(WORDS, k=8))))
+        if len(message_rows) >= batch_size:
+            ChatMessage.objects.bulk_create(message_rows, batch_size=batch_size)
+            message_rows = []
+    ChatMessage.objects.bulk_create(message_rows, batch_size=batch_size)
+    # bulk_create bypasses the counter signals.
+    reconcile_wishlist_counts()
+    reconcile_room_counters()
+    return dataset_summary()
+
+def dataset_summary():
+    user_ids = _user_ids()
+    return {
+        "users": len(user_ids),
+        "properties": Property.objects.filter(seller_id__in=user_ids).count(),
+        "wishlists": Wishlist.objects.filter(user_id__in=user_ids).count(),
+        "chat_rooms": ChatRoom.objects.filter(buyer_id__in=user_ids).count(),
+        "chat_messages": ChatMessage.objects.filter(chatroom__buyer_id__in=user_ids).count(),
+    }
+
+class Fixture:
+    """Ids the scenarios draw from, loaded once before a run."""
+
+    def __init__(self, max_clients):
+        self.user_ids = _user_ids()[:max_clients]
+        if not self.user_ids:
+            raise ValueError("No benchmark data; run the seed_benchmark_data command first.")
+        self.property_ids = list(Property.objects.order_by("-id").values_list("id", flat=True)[:5000])
+        self.rooms = {}
+        for room_id, buyer_id, seller_id in ChatRoom.objects.filter(
+            Q(buyer_id__in=self.user_ids) | Q(seller_id__in=self.user_ids)
+        ).values_list("id", "buyer_id", "seller_id"):
+            self.rooms.setdefault(buyer_id, []).append(room_id)
+            self.rooms.setdefault(seller_id, []).append(room_id)
+        self.terms = list(SearchTerm.objects.order_by("-document_count").values_list("term", flat=True)[:50]) or ["flat"]
+        self.cities = sorted(GAZETTEER)
+
+# Each scenario: (name, URL name the metrics middleware reports, weight, path builder).
+SCENARIOS = [
+    ("property_list", "property_list_create", 25, lambda rng, fx, user: "/api/properties/"),
+    ("property_list_filtered", "property_list_create", 10, lambda rng, fx, user: (
+        f"/api/properties/?location={rng.choice(fx.cities)}&property_type={rng.choice(PROPERTY_TYPES)}"
+    )),
+    ("property_list_amenities", "property_list_create", 5, lambda rng, fx, user: (
+        f"/api/properties/?amenities={','.join(rng.sample(AMENITIES, 2))}"
+    )),
+    ("property_detail", "property_detail", 25, lambda rng, fx, user: f"/api/properties/{rng.choice(fx.property_ids)}/"),
+    ("property_search", "property_search", 10, lambda rng, fx, user: f"/api/properties/search/?q={rng.choice(fx.terms)}"),
+    ("property_trending", "property_trending", 5, lambda rng, fx, user: "/api/properties/trending/"),
+    ("wishlist", "wishlist_list", 10, lambda rng, fx, user: "/api/properties/wishlist/"),
+    ("chat_rooms", "chatroom-list", 10, lambda rng, fx, user: "/api/chats/rooms/"),
+    ("chat_messages", "chatroom-messages", 10, lambda rng, fx, user: (
+        f"/api/chats/rooms/{rng.choice(fx.rooms[user])}/messages/" if fx.rooms.get(user) else None
+    )),
+]
+SCENARIO_NAMES = [scenario[0] for scenario in SCENARIOS]
+
+class InProcessTransport:
+    """Requests through the Django test client; SQL is counted on this thread's connections."""
+    counts_queries = True
+
+    def __init__(self):
+        self.client = Client(SERVER_NAME="localhost")
+
+    def get(self, path, token):
+        stats = RequestStats()
+        with ExitStack() as stack:
+            for conn in connections.all():
+                stack.enter_context(conn.execute_wrapper(stats.execute))
+            response = self.client.get(path, HTTP_AUTHORIZATION=f"Bearer {token}")
+        return response.status_code, stats.queries
+
+    def close(self):
+        connections.close_all()
+
+class ASGITransport:
+    """
+    Requests through Django's ASGI handler. All clients share one event loop, like a
+    single uvicorn/daphne worker; SQL is counted by the metrics middleware.
+    """
+    counts_queries = True
+
+    def __init__(self):
+        self.client = AsyncClient()
+
+    async def get(self, path, token):
+        response = await self.client.get(path, headers={"Authorization": f"Bearer {token}"})
+        stats = getattr(response.asgi_request, "metrics", None)
+        return response.status_code, stats.queries if stats is not None else None
+
+class HTTPTransport:
+    """Requests over a keep-alive HTTP connection to a running server."""
+    counts_queries = False
+
+    def __init__(self, base_url):
+        parts = urlsplit(base_url)
+        connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+        self.connection = connection_class(parts.hostname, parts.port, timeout=30)
+        self.prefix = parts.path.rstrip("/")
+
+    def get(self, path, token):
+        try:
+            self.connection.request("GET", self.prefix + path, headers={"Authorization": f"Bearer {token}"})
+            response = self.connection.getresponse()
+            response.read()
+            return response.status, None
+        except (OSError, http.client.HTTPException):
+            self.connection.close()
+            return 0, None
+
+    def close(self):
+        self.connection.close()
+
+_METRIC_LINE = re.compile(r'^http_request_db_queries_(sum|count)\{view="([^"]*)"\} (\S+)$')
+
+def scrape_query_totals(base_url):
+    """Read per-view query sums and counts from the server's /metrics endpoint, if reachable."""
+    parts = urlsplit(base_url)
+    conn = http.client.HTTPConnection(parts.hostname, parts.port, timeout=10)
+    try:
+        conn.request("GET", parts.path.rstrip("/") + "/metrics")
+        response = conn.getresponse()
+        body = response.read().decode()
+        if response.status != 200:
+            return None
+    except (OSError, http.client.HTTPException):
+        return None
+    finally:
+        conn.close()
+    totals = {}
+    for line in body.splitlines():
+        match = _METRIC_LINE.match(line)
+        if match:
+            kind, view, value = match.groups()
+            totals.setdefault(view, {"sum": 0.0, "count": 0.0})[kind] = float(value)
+    return totals
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+def summarize(samples, elapsed):
+    latencies = sorted(sample[0] for sample in samples)
+    queries = [sample[2] for sample in samples if sample[2] is not None]
+    errors = sum(1 for sample in samples if not 200 <= sample[1] < 400)
+    ms = lambda value: None if value is None else round(value * 1000, 3)
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": ms(sum(latencies) / len(latencies)) if latencies else None,
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1]) if latencies else None,
+        },
+        "queries_per_request": round(sum(queries) / len(queries), 2) if queries else None,
+        "max_queries": max(queries) if queries else None,
+    }
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=5, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def run(duration=30.0, requests=None, concurrency=4, scenarios=None, base_url=None, warmup=20, random_seed=42,
+        asgi=False):
+    """
+    Drive the endpoints with ``concurrency`` clients for ``duration`` seconds (or
+    until ``requests`` requests were made) and return the report dict.
+
+    Each client authenticates as its own ``bench_*`` user. Without ``base_url``
+    requests go through the in-process Django test client: one thread per client,
+    or with ``asgi`` one coroutine per client on a single event loop, so the
+    throughput is that of one ASGI worker.
+    """
+    if asgi and base_url:
+        raise ValueError("--asgi benchmarks in-process; point --base-url at an ASGI server instead.")
+    selected = [s for s in SCENARIOS if scenarios is None or s[0] in scenarios]
+    if not selected:
+        raise ValueError(f"No scenarios selected; choose from {', '.join(SCENARIO_NAMES)}.")
+    fixture = Fixture(max_clients=max(concurrency, 50))
+    tokens = {user.id: str(AccessToken.for_user(user)) for user in User.objects.filter(id__in=fixture.user_ids)}
+    make_transport = (lambda: HTTPTransport(base_url)) if base_url else InProcessTransport
+    weights = [s[2] for s in selected]
+
+    samples = {name: [] for name, *_ in selected}
+    lock = threading.Lock()
+    issued = itertools.count()
+    stop = threading.Event()
+
+    def next_request(rng, limit, deadline):
+        """The next (scenario, path, token) for a client, or None once it should stop."""
+        while not stop.is_set():
+            if limit is not None and next(issued) >= limit:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            user = rng.choice(fixture.user_ids)
+            name, _, _, build = rng.choices(selected, weights)[0]
+            path = build(rng, fixture, user)
+            if path is not None:
+                return name, path, tokens[user]
+        return None
+
+    def client_loop(index, limit, deadline, record):
+        rng = random.Random(random_seed * 1000 + index)
+        transport = make_transport()
+        try:
+            while (request := next_request(rng, limit, deadline)) is not None:
+                name, path, token = request
+                start = time.perf_counter()
+                status, queries = transport.get(path, token)
+                elapsed = time.perf_counter() - start
+                if record:
+                    with lock:
+                        samples[name].append((elapsed, status, queries))
+        finally:
+            transport.close()
+
+    async def async_client_loop(index, limit, deadline, record):
+        rng = random.Random(random_seed * 1000 + index)
+        transport = ASGITransport()
+        while (request := next_request(rng, limit, deadline)) is not None:
+            name, path, token = request
+            start = time.perf_counter()
+            status, queries = await transport.get(path, token)
+            if record:
+                samples[name].append((time.perf_counter() - start, status, queries))
+
+    async def run_async_clients(limit, deadline, record):
+        try:
+            await asyncio.gather(*(async_client_loop(i, limit, deadline, record) for i in range(concurrency)))
+        finally:
+            await sync_to_async(connections.close_all)()
+
+    def run_clients(limit, deadline, record):
+        # In process, the few bench users would soon exhaust their request budgets (config/throttling.py).
+        with override_settings(THROTTLE_RATES={}):
+            run_client_pool(limit, deadline, record)
+
+    def run_client_pool(limit, deadline, record):
+        if asgi:
+            # AsyncClient always sends "Host: testserver".
+            with override_settings(ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"]):
+                asyncio.run(run_async_clients(limit, deadline, record))
+            return
+        if concurrency == 1:
+            client_loop(0, limit, deadline, record)  # no extra thread, so it also runs inside a test transaction
+            return
+        threads = [
+            threading.Thread(target=client_loop, args=(i, limit, deadline, record), daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        try:
+            for thread in threads:
+                thread.join()
+        except KeyboardInterrupt:
+            stop.set()
+            for thread in threads:
+                thread.join()
+
+    if warmup:
+        run_clients(warmup, None, record=False)
+        issued = itertools.count()
+    before = scrape_query_totals(base_url) if base_url else None
+    started = time.perf_counter()
+    run_clients(requests, None if requests else time.monotonic() + duration, record=True)
+    elapsed = time.perf_counter() - started
+    after = scrape_query_totals(base_url) if base_url else None
+
+    report_scenarios = {name: summarize(values, elapsed) for name, values in samples.items()}
+    if before is not None and after is not None:
+        # Over HTTP, queries come from the server's metrics; scenarios sharing a view share the figure.
+        for name, view, *_ in selected:
+            total, prev = after.get(view), before.get(view, {"sum": 0.0, "count": 0.0})
+            if total and total["count"] > prev["count"]:
+                per_request = (total["sum"] - prev["sum"]) / (total["count"] - prev["count"])
+                report_scenarios[name]["queries_per_request"] = round(per_request, 2)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now(dt_timezone.utc).isoformat(timespec="seconds"),
+            "git_commit": _git_commit(),
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "database": connection.vendor,
+            "target": base_url or ("in-process (asgi)" if asgi else "in-process"),
+            "async_views": getattr(settings, "ASYNC_VIEWS", False),
+        },
+        "config": {
+            "duration": None if requests else duration,
+            "requests": requests,
+            "concurrency": concurrency,
+            "warmup": warmup,
+            "random_seed": random_seed,
+            "scenarios": [name for name, *_ in selected],
+        },
+        "dataset": dataset_summary(),
+        "elapsed_seconds": round(elapsed, 3),
+        "overall": summarize([s for values in samples.values() for s in values], elapsed),
+        "scenarios": report_scenarios,
+    }
+
+def compare(baseline, current, tolerance=0.2, min_latency_delta_ms=2.0):
+    """
+    Return human-readable regressions of ``current`` against ``baseline``: p95
+    latency or throughput worse by more than ``tolerance`` (latency also by at least
+    ``min_latency_delta_ms``), more queries per request, or new errors.
+    """
+    problems = []
+    for name, now in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before or not before["requests"] or not now["requests"]:
+            continue
+        old_p95, new_p95 = before["latency_ms"]["p95"], now["latency_ms"]["p95"]
+        if new_p95 > old_p95 * (1 + tolerance) and new_p95 - old_p95 >= min_latency_delta_ms:
+            problems.append(f"{name}: p95 {old_p95} ms -> {new_p95} ms")
+        old_rps, new_rps = before["throughput_rps"], now["throughput_rps"]
+        if old_rps and new_rps < old_rps * (1 - tolerance):
+            problems.append(f"{name}: throughput {old_rps} -> {new_rps} req/s")
+        old_queries, new_queries = before["queries_per_request"], now["queries_per_request"]
+        if old_queries is not None and new_queries is not None and new_queries > old_queries + 0.5:
+            problems.append(f"{name}: queries per request {old_queries} -> {new_queries}")
+        if now["errors"] > before["errors"]:
+            problems.append(f"{name}: errors {before['errors']} -> {now['errors']}")
+    return problems
+
+def _best_ms(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def serializer_timings(rows=1000, repeat=5):
+    """
+    Time serializing and rendering ``rows`` rows of each hot list endpoint with the
+    DRF serializer and with its row serializer (best of ``repeat``; the queries run
+    once, untimed). Returns ``{endpoint: {"rows", "drf_ms", "fast_ms", ...}}``.
+    """
+    from rest_framework.renderers import JSONRenderer
+    from apps.chats.serializers import ChatRoomListSerializer
+    from apps.chats.views import message_rows, room_rows, serialize_room_rows
+    from apps.properties.serializers import (
+        CARD_FIELDS, PropertyCardSerializer, WishlistSerializer, card_row_serializer,
+    )
+    from apps.properties.views import listing_queryset, listing_rows, wishlist_rows
+    from config.renderers import FastJSONRenderer
+
+    cards = card_row_serializer(CARD_FIELDS)
+    last_message = ChatMessage.objects.filter(chatroom=OuterRef("pk")).order_by("-id").values("id")[:1]
+    # All rooms rather than one user's, annotated as chatroom_list_queryset does.
+    rooms = ChatRoom.objects.select_related("property__seller", "seller", "buyer").annotate(
+        last_message_id=Subquery(last_message), unread_count=Count("messages"),
+    ).order_by("id")[:rows]
+    wishlists = Wishlist.objects.select_related("property__seller").order_by("id")[:rows]
+    listings = listing_queryset({}, CARD_FIELDS).order_by("-created_at", "-id")[:rows]
+
+    room_objects = list(rooms)
+    messages = ChatMessage.objects.select_related("sender").in_bulk([room.last_message_id for room in room_objects])
+    room_values = list(rooms.values(*room_rows.columns))
+    message_values = list(ChatMessage.objects.filter(id__in=list(messages)).values(*message_rows.columns))
+    cases = {
+        "property_list": (
+            lambda objs=list(listings): PropertyCardSerializer(objs, many=True).data,
+            lambda values=list(listing_rows({}, cards).order_by("-created_at", "-id")[:rows]): cards.many(values),
+        ),
+        "wishlist": (
+            lambda objs=list(wishlists): WishlistSerializer(objs, many=True).data,
+            lambda values=list(wishlists.values(*wishlist_rows.columns)): wishlist_rows.many(values),
+        ),
+        "chat_rooms": (
+            lambda: ChatRoomListSerializer(room_objects, many=True, context={"last_messages": messages}).data,
+            lambda: serialize_room_rows([dict(room) for room in room_values], message_values),
+        ),
+    }
+    report = {}
+    for name, (drf, fast) in cases.items():
+        drf_data, fast_data = drf(), fast()
+        drf_ms, fast_ms = _best_ms(drf, repeat), _best_ms(fast, repeat)
+        render_ms = _best_ms(lambda: JSONRenderer().render(drf_data), repeat)
+        fast_render_ms = _best_ms(lambda: FastJSONRenderer().render(fast_data), repeat)
+        report[name] = {
+            "rows": len(drf_data),
+            "identical": JSONRenderer().render(drf_data) == FastJSONRenderer().render(fast_data),
+            "drf_ms": round(drf_ms, 2), "fast_ms": round(fast_ms, 2),
+            "render_ms": round(render_ms, 2), "fast_render_ms": round(fast_render_ms, 2),
+            "speedup": round((drf_ms + render_ms) / (fast_ms + fast_render_ms), 1) if fast_ms + fast_render_ms else None,
+        }
+    return report
@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+from apps.monitoring.benchmark import serializer_timings
+
+class Command(BaseCommand):
+    help = (
+        "Microbenchmark the hot list endpoints' DRF serializers against their .values() fast paths "
+        "(serialize + render, per --rows rows; run seed_benchmark_data first)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=5, help="Best of this many runs.")
+
+    def handle(self, *args, **options):
+        report = serializer_timings(rows=options["rows"], repeat=options["repeat"])
+        self.stdout.write(f"{'endpoint':<16}{'rows':>6}{'drf':>9}{'fast':>9}{'render':>9}{'orjson':>9}{'speedup':>9}  same bytes")
+        for name, row in report.items():
+            self.stdout.write(
+                f"{name:<16}{row['rows']:>6}{row['drf_ms']:>9.2f}{row['fast_ms']:>9.2f}"
+                f"{row['render_ms']:>9.2f}{row['fast_render_ms']:>9.2f}{row['speedup'] or 0:>8.1f}x  {row['identical']}"
+            )
+        self.stdout.write("Times in ms; speedup compares serialize + render.")
@@ -0,0 +1,66 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from apps.monitoring.benchmark import SCENARIO_NAMES, compare, run
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the API read endpoints with concurrent clients and report latency "
+        "percentiles, throughput and SQL queries per request."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--duration", type=float, default=30, help="Seconds to run (ignored with --requests).")
+        parser.add_argument("--requests", type=int, help="Stop after this many requests instead.")
+        parser.add_argument("--concurrency", type=int, default=4)
+        parser.add_argument("--warmup", type=int, default=20, help="Untimed requests made first.")
+        parser.add_argument("--scenarios", help=f"Comma separated subset of: {', '.join(SCENARIO_NAMES)}.")
+        parser.add_argument("--base-url", help="Benchmark a running server (e.g. http://127.0.0.1:8000) instead of in-process.")
+        parser.add_argument(
+            "--asgi", action="store_true",
+            help="Go through the ASGI handler, all clients on one event loop (throughput of one worker). "
+                 "Set ASYNC_VIEWS=True to measure the async read views, as config.asgi does.",
+        )
+        parser.add_argument("--seed", type=int, default=42, help="Random seed for the request mix.")
+        parser.add_argument("--output", help="Write the JSON report to this file.")
+        parser.add_argument("--compare", help="Baseline report; fail if this run regresses against it.")
+        parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown (default 0.2).")
+
+    def handle(self, *args, **options):
+        scenarios = options["scenarios"].split(",") if options["scenarios"] else None
+        unknown = set(scenarios or ()) - set(SCENARIO_NAMES)
+        if unknown:
+            raise CommandError(f"Unknown scenarios: {', '.join(sorted(unknown))}.")
+        try:
+            report = run(
+                duration=options["duration"], requests=options["requests"], concurrency=options["concurrency"],
+                scenarios=scenarios, base_url=options["base_url"], warmup=options["warmup"],
+                random_seed=options["seed"], asgi=options["asgi"],
+            )
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        self.stdout.write(f"{'scenario':<24}{'reqs':>7}{'err':>5}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'queries':>9}")
+        for name, row in [*report["scenarios"].items(), ("overall", report["overall"])]:
+            latency = row["latency_ms"]
+            self.stdout.write(
+                f"{name:<24}{row['requests']:>7}{row['errors']:>5}{row['throughput_rps'] or 0:>9.1f}"
+                + "".join(f"{latency[p] or 0:>9.1f}" for p in ("p50", "p95", "p99"))
+                + f"{'-' if row['queries_per_request'] is None else row['queries_per_request']:>9}"
+            )
+
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as stream:
+                json.dump(report, stream, indent=2)
+            self.stdout.write(f"Report written to {options['output']}")
+
+        if options["compare"]:
+            with open(options["compare"], encoding="utf-8") as stream:
+                baseline = json.load(stream)
+            for name, row in [*report["scenarios"].items(), ("overall", report["overall"])]:
+                before = baseline["overall"] if name == "overall" else baseline["scenarios"].get(name)
+                if before and before["throughput_rps"] and row["throughput_rps"]:
+                    self.stdout.write(f"{name:<24}{row['throughput_rps'] / before['throughput_rps']:>6.2f}x baseline req/s")
+            problems = compare(baseline, report, tolerance=options["tolerance"])
+            if problems:
+                raise CommandError("Regressions against baseline:\n  " + "\n  ".join(problems))
+            self.stdout.write(self.style.SUCCESS("No regressions against baseline."))
@@ -0,0 +1,25 @@
+from django.core.management.base import BaseCommand
+from apps.monitoring.benchmark import USER_PREFIX, flush, seed
+
+class Command(BaseCommand):
+    help = f"Seed a deterministic synthetic data set for benchmarks (owned by '{USER_PREFIX}*' users)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=100)
+        parser.add_argument("--properties", type=int, default=1000)
+        parser.add_argument("--wishlists", type=int, default=5, help="Wishlist entries per user.")
+        parser.add_argument("--rooms", type=int, default=200, help="Chat rooms between benchmark users.")
+        parser.add_argument("--messages", type=int, default=20, help="Messages per chat room.")
+        parser.add_argument("--seed", type=int, default=42, help="Random seed.")
+        parser.add_argument("--flush", action="store_true", help="Delete existing benchmark data first.")
+
+    def handle(self, *args, **options):
+        if options["flush"]:
+            self.stdout.write(f"Deleted {flush()} rows of previous benchmark data.")
+        summary = seed(
+            users=options["users"], properties=options["properties"], wishlists=options["wishlists"],
+            rooms=options["rooms"], messages=options["messages"], random_seed=options["seed"],
+        )
+        self.stdout.write(self.style.SUCCESS(
+            "Benchmark data set: " + ", ".join(f"{count} {name}" for name, count in summary.items())
+        ))
@@ -0,0 +1,185 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+``MetricsMiddleware`` records, per view: a latency histogram, SQL query counts and
+time (through an execute wrapper on every connection), time spent producing serializer
+``.data`` (or ``RowSerializer.many`` output) and response bytes. Recording is a handful of dict updates under a
+lock, cheap enough to leave on in production. Each worker process keeps its own
+registry, so scrape every worker (or aggregate per process label) as usual.
+"""
+import bisect
+import threading
+import time
+from contextvars import ContextVar
+from rest_framework.serializers import BaseSerializer
+from config.row_serializers import RowSerializer
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+MAX_CAPTURED_STATEMENTS = 200
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+class RequestStats:
+    """Per-request accumulator, reachable through ``current_stats`` while a request runs."""
+    __slots__ = ("queries", "sql_seconds", "serializer_seconds", "serializer_depth", "statements")
+
+    def __init__(self, capture_sql=False):
+        self.queries = 0
+        self.sql_seconds = 0.0
+        self.serializer_seconds = 0.0
+        self.serializer_depth = 0
+        self.statements = [] if capture_sql else None
+
+    def execute(self, execute, sql, params, many, context):
+        """``connection.execute_wrapper`` hook counting and timing every statement."""
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - start
+            self.queries += 1
+            self.sql_seconds += elapsed
+            if self.statements is not None and len(self.statements) < MAX_CAPTURED_STATEMENTS:
+                self.statements.append((elapsed, sql))
+
+current_stats = ContextVar("request_metrics", default=None)
+
+def record_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection. It charges the query to
+    the request in ``current_stats``; context variables follow async views into the
+    threads their ORM calls run in, so async requests are measured too.
+    """
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    return stats.execute(execute, sql, params, many, context)
+
+def install_query_recorder(sender, connection, **kwargs):
+    """``connection_created`` receiver."""
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra=""):
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._collectors = []
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}
+            self.latency = {}
+            self.queries = {}
+            self.sql_seconds = {}
+            self.serializer_seconds = {}
+            self.response_bytes = {}
+
+    def register_collector(self, collector):
+        """Add a callable returning extra exposition lines, evaluated at scrape time."""
+        self._collectors.append(collector)
+
+    def observe_request(self, view, method, status, duration, stats, size):
+        with self._lock:
+            key = (view, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            hist = self.latency.get((view, method))
+            if hist is None:
+                hist = self.latency[(view, method)] = Histogram(LATENCY_BUCKETS)
+            hist.observe(duration)
+            hist = self.queries.get(view)
+            if hist is None:
+                hist = self.queries[view] = Histogram(QUERY_COUNT_BUCKETS)
+            hist.observe(stats.queries)
+            self.sql_seconds[view] = self.sql_seconds.get(view, 0.0) + stats.sql_seconds
+            self.serializer_seconds[view] = self.serializer_seconds.get(view, 0.0) + stats.serializer_seconds
+            self.response_bytes[view] = self.response_bytes.get(view, 0) + size
+
+    def _histogram_lines(self, name, label_names, series):
+        lines = [f"# TYPE {name} histogram"]
+        for labels, hist in sorted(series.items()):
+            labels = labels if isinstance(labels, tuple) else (labels,)
+            cumulative = 0
+            for bound, count in zip(hist.buckets, hist.counts):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{name}_bucket{_labels(label_names, labels, le)} {hist.count}")
+            lines.append(f"{name}_sum{_labels(label_names, labels)} {hist.sum}")
+            lines.append(f"{name}_count{_labels(label_names, labels)} {hist.count}")
+        return lines
+
+    @staticmethod
+    def _counter_lines(name, label_names, series):
+        lines = [f"# TYPE {name} counter"]
+        for labels, value in sorted(series.items()):
+            labels = labels if isinstance(labels, tuple) else (labels,)
+            lines.append(f"{name}{_labels(label_names, labels)} {value}")
+        return lines
+
+    def render(self):
+        with self._lock:
+            lines = []
+            lines += self._counter_lines("http_requests_total", ("view", "method", "status"), self.requests)
+            lines += self._histogram_lines("http_request_duration_seconds", ("view", "method"), self.latency)
+            lines += self._histogram_lines("http_request_db_queries", ("view",), self.queries)
+            lines += self._counter_lines("http_request_db_seconds_total", ("view",), self.sql_seconds)
+            lines += self._counter_lines("http_request_serializer_seconds_total", ("view",), self.serializer_seconds)
+            lines += self._counter_lines("http_response_bytes_total", ("view",), self.response_bytes)
+        for collector in self._collectors:
+            lines += collector()
+        return "\n".join(lines) + "\n"
+
+registry = MetricsRegistry()
+
+def _timed(func):
+    """Wrap ``func`` to add its run time to the request's serializer time; nested calls count once."""
+    def timed(*args, **kwargs):
+        stats = current_stats.get()
+        if stats is None or stats.serializer_depth:
+            return func(*args, **kwargs)
+        stats.serializer_depth += 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            stats.serializer_seconds += time.perf_counter() - start
+            stats.serializer_depth -= 1
+
+    timed._instrumented = True
+    return timed
+
+def instrument_serializers():
+    """
+    Time serializer ``.data`` and the ``RowSerializer.many`` fast path for the running
+    request. Nested and list serializers call ``.data`` recursively, so only the
+    outermost access is measured.
+    """
+    original = BaseSerializer.data
+    if getattr(original.fget, "_instrumented", False):
+        return
+    BaseSerializer.data = property(_timed(original.fget))
+    RowSerializer.many = _timed(RowSerializer.many)
@@ -0,0 +1,73 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .metrics import RequestStats, current_stats, registry
+
+slow_logger = logging.getLogger("apps.monitoring.slow_requests")
+
+def view_label(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return "<unresolved>"
+    return match.view_name or match._func_path
+
+class MetricsMiddleware:
+    """
+    Record latency, SQL query count/time, serializer time and response size per view.
+
+    With ``SLOW_REQUEST_THRESHOLD_MS`` set, requests slower than the threshold are
+    logged to ``apps.monitoring.slow_requests`` together with their slowest SQL.
+    Works for sync and async views alike, so it never forces async views onto a thread.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.slow_threshold = getattr(settings, "SLOW_REQUEST_THRESHOLD_MS", 0) / 1000
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        stats, token, start = self.begin(request)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    async def __acall__(self, request):
+        stats, token, start = self.begin(request)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        self.finish(request, response, stats, start)
+        return response
+
+    def begin(self, request):
+        stats = RequestStats(capture_sql=bool(self.slow_threshold))
+        request.metrics = stats
+        return stats, current_stats.set(stats), time.perf_counter()
+
+    def finish(self, request, response, stats, start):
+        duration = time.perf_counter() - start
+        view = view_label(request)
+        size = 0 if response.streaming else len(response.content)
+        registry.observe_request(view, request.method, response.status_code, duration, stats, size)
+        if self.slow_threshold and duration >= self.slow_threshold:
+            self.log_slow_request(request, view, duration, stats)
+
+    def log_slow_request(self, request, view, duration, stats):
+        slowest = sorted(stats.statements, key=lambda item: item[0], reverse=True)[:10]
+        slow_logger.warning(
+            "Slow request %s %s (%s): %.1f ms, %d queries, %.1f ms SQL\n%s",
+            request.method, request.get_full_path(), view, duration * 1000,
+            stats.queries, stats.sql_seconds * 1000,
+            "\n".join(f"  {elapsed * 1000:.1f} ms  {sql}" for elapsed, sql in slowest),
+        )
@@ -0,0 +1,138 @@
+import copy
+import re
+import time
+from asgiref.sync import async_to_sync, sync_to_async
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.test import AsyncClient, RequestFactory, TestCase, override_settings
+from rest_framework.test import APIClient
+from . import benchmark
+from apps.chats.views import room_rows
+from apps.properties.serializers import CARD_FIELDS, card_row_serializer
+from .metrics import QUERY_COUNT_BUCKETS, RequestStats, current_stats, registry
+from .middleware import MetricsMiddleware
+
+# name{labels} value, as in the Prometheus text exposition format.
+SAMPLE_RE = re.compile(r'^[a-z_]+(\{([a-z_]+="([^"\\]|\\.)*",?)+\})? [0-9.e+-]+$')
+
+class BenchmarkTests(TestCase):
+    def test_seed_and_run(self):
+        summary = benchmark.seed(users=5, properties=20, wishlists=2, rooms=4, messages=3)
+        self.assertEqual(summary["properties"], 20)
+        self.assertEqual(summary["chat_messages"], summary["chat_rooms"] * 3)
+
+        report = benchmark.run(requests=40, concurrency=1, warmup=0)
+        self.assertTrue(0 < report["overall"]["requests"] <= 40)
+        self.assertEqual(report["overall"]["errors"], 0)
+        for scenario in report["scenarios"].values():
+            if scenario["requests"]:
+                self.assertIsNotNone(scenario["latency_ms"]["p95"])
+                self.assertIsNotNone(scenario["queries_per_request"])
+
+        self.assertEqual(benchmark.compare(report, report), [])
+        slower = copy.deepcopy(report)
+        slower["scenarios"]["property_list"]["queries_per_request"] = 50
+        self.assertTrue(any("property_list" in p for p in benchmark.compare(report, slower)))
+
+class MetricsMiddlewareTests(TestCase):
+    view = "property_list_create"
+
+    def setUp(self):
+        registry.reset()
+        cache.clear()  # a cached list page would be served without SQL
+        self.user = User.objects.create_user(username="buyer", password="secret-pass")
+
+    def assertRecorded(self, response, view=None):
+        view = view or self.view
+        self.assertEqual(registry.requests[(view, "GET", str(response.status_code))], 1)
+        self.assertEqual(registry.latency[(view, "GET")].count, 1)
+        queries = registry.queries[view]
+        self.assertEqual(queries.count, 1)
+        self.assertGreater(queries.sum, 0)
+        self.assertGreater(registry.sql_seconds[view], 0)
+
+    def test_sync_requests(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get("/api/properties/")
+        self.assertRecorded(response)
+        self.assertEqual(registry.response_bytes[self.view], len(response.content))
+        self.assertIn(self.view, registry.serializer_seconds)
+
+    def test_row_serializers_are_timed(self):
+        # The hot list endpoints serialize .values() rows without BaseSerializer.data.
+        for rows in (card_row_serializer(tuple(CARD_FIELDS)), room_rows):
+            stats = RequestStats()
+            token = current_stats.set(stats)
+            try:
+                self.assertEqual(rows.many([]), [])
+            finally:
+                current_stats.reset(token)
+            self.assertGreater(stats.serializer_seconds, 0)
+
+    async def test_async_requests(self):
+        # The ASGI handler runs the middleware as a coroutine; the view's queries run in a thread.
+        response = await AsyncClient().get("/api/properties/")
+        self.assertEqual(response.status_code, 200)
+        self.assertRecorded(response)
+
+    def test_async_middleware_counts_queries_in_threads(self):
+        async def view(request):
+            await sync_to_async(lambda: list(User.objects.all()))()
+            await User.objects.acount()
+            return HttpResponse("ok")
+
+        middleware = MetricsMiddleware(view)
+        response = async_to_sync(middleware)(RequestFactory().get("/anywhere/"))
+        self.assertEqual(response.content, b"ok")
+        self.assertEqual(registry.queries["<unresolved>"].sum, 2)
+        self.assertEqual(registry.response_bytes["<unresolved>"], 2)
+
+    @override_settings(SLOW_REQUEST_THRESHOLD_MS=1)
+    def test_slow_requests_are_logged_with_their_sql(self):
+        def view(request):
+            User.objects.count()
+            time.sleep(0.005)
+            return HttpResponse()
+
+        with self.assertLogs("apps.monitoring.slow_requests", "WARNING") as logs:
+            MetricsMiddleware(view)(RequestFactory().get("/slow/"))
+        self.assertIn("1 queries", logs.output[0])
+        self.assertIn("auth_user", logs.output[0])
+
+class MetricsEndpointTests(TestCase):
+    def setUp(self):
+        registry.reset()
+        registry.observe_request('say "hi"\n', "GET", 200, 0.03, type("Stats", (), {
+            "queries": 3, "sql_seconds": 0.01, "serializer_seconds": 0.002,
+        })(), 120)
+
+    def test_exposition_format(self):
+        response = self.client.get("/metrics")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/plain; version=0.0.4; charset=utf-8")
+        lines = response.content.decode().splitlines()
+        for line in lines:
+            if line.startswith("#"):
+                self.assertRegex(line, r"^# TYPE [a-z_]+ (counter|histogram)$")
+            else:
+                self.assertRegex(line, SAMPLE_RE)
+        label = 'view="say \\"hi\\"\\n"'
+        self.assertIn(f'http_requests_total{{{label},method="GET",status="200"}} 1', lines)
+        self.assertIn(f'http_response_bytes_total{{{label}}} 120', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{label},method="GET",le="0.025"}} 0', lines)
+        self.assertIn(f'http_request_duration_seconds_bucket{{{label},method="GET",le="0.05"}} 1', lines)
+        self.assertIn(f'http_request_duration_seconds_count{{{label},method="GET"}} 1', lines)
+        buckets = [line for line in lines if line.startswith("http_request_db_queries_bucket")]
+        self.assertEqual(len(buckets), len(QUERY_COUNT_BUCKETS) + 1)
+        counts = [int(line.rsplit(" ", 1)[1]) for line in buckets]
+        self.assertEqual(counts, sorted(counts))  # cumulative
+        self.assertTrue(buckets[-1].endswith('le="+Inf"} 1'))
+        self.assertIn("# TYPE property_response_cache_requests_total counter", lines)
+
+    def test_access(self):
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.9").status_code, 403)
+        staff = User.objects.create_user(username="ops", password="secret-pass", is_staff=True)
+        self.client.force_login(staff)
+        self.assertEqual(self.client.get("/metrics", REMOTE_ADDR="10.0.0.9").status_code, 200)
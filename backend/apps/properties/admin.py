@@ -1,6 +1,6 @@
 from django.contrib import admin
-from django.db.models import Max, Min, Avg
 from .models import Property, Wishlist
+from .stats import read_stats
 
 class PropertyAdmin(admin.ModelAdmin):
     list_display = ("id", "name", "seller", "price", "property_type", "created_at")
@@ -9,6 +9,12 @@ class PropertyAdmin(admin.ModelAdmin):
     change_list_template = "admin/properties_change_list.html"
     read_only_fields = ("seller",)
 
+    def changelist_view(self, request, extra_context=None):
+        # Price summaries come from the precomputed PropertyStats table, not live aggregates.
+        extra_context = extra_context or {}
+        extra_context["property_stats"] = read_stats()
+        return super().changelist_view(request, extra_context=extra_context)
+
     def save_model(self, request, obj, form, change):
         if not change and not obj.seller:
             # Automatically assign the seller as the current user (admin)
@@ -3,3 +3,9 @@ from django.apps import AppConfig
 class PropertiesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.properties'
+
+    def ready(self):
+        from . import signals, tasks  # noqa: F401
+        from apps.monitoring.metrics import registry
+        from .cache import prometheus_lines
+        registry.register_collector(prometheus_lines)
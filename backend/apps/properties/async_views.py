@@ -0,0 +1,53 @@
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotFound
+from apps.accounts.async_api import async_read_view, json_response
+from .cache import acached_response, adetail_cache_key, alist_cache_key
+from .counters import arecord_view
+from .filters import parse_geo_query
+from .models import Property
+from .pagination import KeysetPagination
+from .serializers import PropertySerializer, amark_wishlisted, card_row_serializer, sparse_fields
+from .views import PropertyDetailView, PropertyListCreateView, listing_rows
+
+property_list_create_view = PropertyListCreateView.as_view()
+property_detail_view = PropertyDetailView.as_view()
+
+# ✅ Async property list (same filters, cursor pages and cache as PropertyListCreateView); POST creates
+@async_read_view(property_list_create_view)
+async def property_list_create(request):
+    params = request.query_params
+    if parse_geo_query(params) is not None:
+        # Distance-sorted spatial pages are computed in Python; leave them to the sync view.
+        return await sync_to_async(property_list_create_view)(request._request)
+
+    async def build():
+        rows = card_row_serializer(sparse_fields(params))
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(listing_rows(params, rows), request)
+        data = rows.many(page)
+        return {"next": paginator.get_next_link(), "results": data}
+
+    async def personalize(data):
+        results, variant = await amark_wishlisted(data["results"], request.user)
+        return {**data, "results": results}, variant
+
+    return await acached_response(
+        request, await alist_cache_key(request), build, PropertyListCreateView.cache_timeout,
+        json_response, personalize=personalize,
+    )
+
+# ✅ Async property detail; PUT / PATCH / DELETE go to PropertyDetailView
+@async_read_view(property_detail_view)
+async def property_detail(request, pk):
+    async def build():
+        try:
+            prop = await Property.objects.select_related("seller").aget(pk=pk)
+        except Property.DoesNotExist:
+            raise NotFound("No Property matches the given query.")
+        return PropertySerializer(prop, context={"request": request}).data
+
+    response = await acached_response(
+        request, await adetail_cache_key(pk), build, PropertyDetailView.cache_timeout, json_response,
+    )
+    await arecord_view(pk)
+    return response
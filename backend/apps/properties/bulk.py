@@ -0,0 +1,174 @@
+"""
+Bulk import and streaming export of listings (CSV or JSON Lines).
+
+Imports are validated row by row through ``PropertySerializer`` and inserted one
+chunk at a time with ``bulk_create``; invalid rows are reported and skipped
+without aborting the rest of the file. A file that cannot be decoded stops the
+import at that point (``UnreadableFile``); the rows before it stay imported.
+Exports iterate the table with a
+server-side cursor and yield one encoded row at a time.
+"""
+import csv
+import json
+from django.db import connection, transaction
+from django.db.models import Max
+from apps.jobs.queue import enqueue
+from .cache import invalidate_list
+from .models import Property
+from .features import sync_features
+from .search import index_new_properties
+from .stats import apply_changes
+from .serializers import PropertySerializer
+from .streaming import iter_batches
+
+FORMATS = ("csv", "jsonl")
+EXPORT_FIELDS = [
+    "id", "seller", "name", "location", "description", "price", "property_type", "sell_or_rent",
+    "images", "furnished_status", "floor_number", "total_floors", "property_age",
+    "nearby_landmarks", "parking_availability", "security_features", "amenities",
+    "latitude", "longitude", "created_at",
+]
+JSON_FIELDS = ("images", "security_features", "amenities")
+DEFAULT_CHUNK_SIZE = 500
+MAX_REPORTED_ERRORS = 1000
+
+class UnreadableFile(Exception):
+    """The upload stopped decoding part way; ``report`` covers the rows imported before that."""
+
+    def __init__(self, message, report):
+        super().__init__(message)
+        self.report = report
+
+def detect_format(filename, requested=None):
+    fmt = (requested or filename.rsplit(".", 1)[-1]).lower()
+    if fmt == "ndjson":
+        fmt = "jsonl"
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported format '{fmt}'; expected one of {', '.join(FORMATS)}.")
+    return fmt
+
+def _csv_rows(stream):
+    for row in csv.DictReader(stream):
+        cleaned = {}
+        for key, value in row.items():
+            if key is None or value is None or value.strip() == "":
+                continue  # blank optional columns fall back to model defaults
+            if key in JSON_FIELDS:
+                try:
+                    value = json.loads(value)
+                except ValueError:
+                    pass  # left as text so validation reports it against the row
+            cleaned[key] = value
+        yield cleaned
+
+def _jsonl_rows(stream):
+    for line in stream:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else {"__invalid__": line[:200]}
+
+def read_rows(stream, fmt):
+    """Yield one dict per record of a text ``stream``."""
+    return _csv_rows(stream) if fmt == "csv" else _jsonl_rows(stream)
+
+def insert_properties(instances, seller):
+    """
+    ``bulk_create`` unsaved listings of one ``seller`` and apply what the save
+    signals would have: geocoding, search indexing, feature links, statistics
+    and (queued) embedding for similar listings.
+    """
+    for instance in instances:
+        instance.geocode()  # bulk_create bypasses Property.save()
+    with transaction.atomic():
+        before = Property.objects.filter(seller=seller).aggregate(last=Max("id"))["last"] or 0
+        created = Property.objects.bulk_create(instances)
+        if not connection.features.can_return_rows_from_bulk_insert:
+            # MySQL does not hand back primary keys. Reload this batch's rows by their creation
+            # stamps and names, so listings the seller saves concurrently are not picked up.
+            batch = {(prop.created_at, prop.name) for prop in instances}
+            created = [
+                prop for prop in Property.objects.filter(
+                    seller=seller, id__gt=before, created_at__in={stamp for stamp, _ in batch},
+                )
+                if (prop.created_at, prop.name) in batch
+            ]
+        index_new_properties(created)
+        sync_features(created)
+        apply_changes(added=[prop.stats_entry() for prop in created])
+        enqueue("properties.embed_properties", [prop.pk for prop in created])
+    return len(instances)
+
+def import_rows(rows, seller, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Validate and insert ``rows`` for ``seller``.
+
+    Returns ``{"created": int, "failed": int, "errors": [{"row": n, "errors": ...}]}``
+    with row numbers starting at 1. Raises ``UnreadableFile`` when the stream is not
+    UTF-8 text or not parseable CSV; the valid rows before that point are imported.
+    """
+    created, failed, errors, chunk, number = 0, 0, [], [], 0
+    try:
+        for number, row in enumerate(rows, start=1):
+            if "__invalid__" in row:
+                serializer_errors = {"detail": ["Row is not a JSON object."]}
+            else:
+                serializer = PropertySerializer(data=row)
+                if serializer.is_valid():
+                    chunk.append(Property(seller=seller, **serializer.validated_data))
+                    if len(chunk) >= chunk_size:
+                        created += insert_properties(chunk, seller)
+                        chunk = []
+                    continue
+                serializer_errors = serializer.errors
+            failed += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": number, "errors": serializer_errors})
+    except (UnicodeDecodeError, csv.Error) as exc:
+        unreadable = exc
+    else:
+        unreadable = None
+    if chunk:
+        created += insert_properties(chunk, seller)
+    if created:
+        invalidate_list()
+    report = {"created": created, "failed": failed, "errors": errors}
+    if unreadable is not None:
+        reason = "is not UTF-8 text" if isinstance(unreadable, UnicodeDecodeError) else f"is not valid CSV ({unreadable})"
+        raise UnreadableFile(f"The file {reason}; the import stopped after row {number}.", report)
+    return report
+
+class _Echo:
+    """File-like object whose write() returns the value, for streaming csv.writer output."""
+
+    def write(self, value):
+        return value
+
+def _export_value(value):
+    if isinstance(value, (list, dict)):
+        return json.dumps(value)
+    return "" if value is None else value
+
+def export_rows(queryset, fmt, chunk_size=2000):
+    """Yield the encoded lines of ``queryset`` one row at a time, ``chunk_size`` rows per query."""
+    rows = iter_batches(queryset.values(*EXPORT_FIELDS), chunk_size)
+    if fmt == "csv":
+        writer = csv.writer(_Echo())
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow([_export_value(row[f]) for f in EXPORT_FIELDS])
+    else:
+        for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+
+def text_stream(binary_file):
+    """
+    Decode a binary file line by line, tolerating a UTF-8 BOM. Lines are decoded as
+    they are read, so a bad byte raises UnicodeDecodeError at its own row.
+    """
+    for number, line in enumerate(binary_file):
+        yield line.decode("utf-8-sig" if number == 0 else "utf-8")
@@ -0,0 +1,221 @@
+"""
+Response cache for the public property list and detail endpoints.
+
+Entries live in the default Django cache (local memory by default, a shared
+backend when ``CACHES`` points at one). Keys embed a version number: listing pages
+share one version and each detail payload has its own, and saving or deleting a
+``Property`` bumps the affected versions. Versions live in the "shared" cache, so a
+bump by any worker retires the entries of all of them even when each keeps its
+own entries. Versions are read before the database,
+so a response computed from stale rows can never land under a current key. With
+read replicas, responses are built from the primary for a short while after a
+bump, as a lagging replica could otherwise still return the old rows.
+
+The async views use the ``a``-prefixed helpers, which go through Django's async
+cache API so the cache round trips never block the event loop.
+"""
+import hashlib
+import time
+from contextlib import nullcontext
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.utils.http import http_date, parse_http_date_safe
+from rest_framework import status
+from rest_framework.response import Response
+from config.db_router import use_primary
+from config.renderers import dumps
+
+LIST_VERSION_KEY = "properties:list:version"
+DETAIL_VERSION_KEY = "properties:detail:{pk}:version"
+STATS_KEYS = {"hits": "properties:cache:hits", "misses": "properties:cache:misses"}
+RECENT_CHANGE_KEY = "properties:changed"
+
+def _get_version(key):
+    shared = caches["shared"]
+    version = shared.get(key)
+    if version is None:
+        # Start from a timestamp so an evicted version never reuses an old number.
+        shared.add(key, time.time_ns(), None)
+        version = shared.get(key)
+    return version
+
+async def _aget_version(key):
+    shared = caches["shared"]
+    version = await shared.aget(key)
+    if version is None:
+        await shared.aadd(key, time.time_ns(), None)
+        version = await shared.aget(key)
+    return version
+
+def _bump_version(key):
+    shared = caches["shared"]
+    try:
+        shared.incr(key)
+    except ValueError:
+        shared.set(key, time.time_ns(), None)
+    if settings.DATABASE_REPLICAS:
+        shared.set(RECENT_CHANGE_KEY, True, settings.DB_REPLICA_STICKY_SECONDS)
+
+def _build_context():
+    if settings.DATABASE_REPLICAS and caches["shared"].get(RECENT_CHANGE_KEY) is not None:
+        return use_primary()
+    return nullcontext()
+
+async def _abuild_context():
+    if settings.DATABASE_REPLICAS and await caches["shared"].aget(RECENT_CHANGE_KEY) is not None:
+        return use_primary()
+    return nullcontext()
+
+def invalidate_list():
+    """Drop all cached listing pages."""
+    _bump_version(LIST_VERSION_KEY)
+
+def invalidate_property(pk):
+    """Drop every cached response that may include listing ``pk``."""
+    invalidate_list()
+    _bump_version(DETAIL_VERSION_KEY.format(pk=pk))
+
+def _count(name):
+    key = STATS_KEYS[name]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+async def _acount(name):
+    key = STATS_KEYS[name]
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+def get_stats():
+    values = cache.get_many(STATS_KEYS.values())
+    stats = {name: values.get(key, 0) for name, key in STATS_KEYS.items()}
+    total = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / total, 4) if total else None
+    return stats
+
+def _list_key(version, request):
+    query = request.query_params
+    normalized = "&".join(f"{k}={v}" for k in sorted(query) for v in sorted(query.getlist(k)))
+    digest = hashlib.md5(normalized.encode()).hexdigest()
+    return f"properties:list:{version}:{digest}"
+
+def list_cache_key(request):
+    return _list_key(_get_version(LIST_VERSION_KEY), request)
+
+async def alist_cache_key(request):
+    return _list_key(await _aget_version(LIST_VERSION_KEY), request)
+
+def detail_cache_key(pk):
+    version = _get_version(DETAIL_VERSION_KEY.format(pk=pk))
+    return f"properties:detail:{pk}:{version}"
+
+async def adetail_cache_key(pk):
+    version = await _aget_version(DETAIL_VERSION_KEY.format(pk=pk))
+    return f"properties:detail:{pk}:{version}"
+
+def _not_modified(request, entry):
+    if_none_match = request.headers.get("If-None-Match")
+    if if_none_match:
+        return entry["etag"] in (tag.strip() for tag in if_none_match.split(",")) or if_none_match.strip() == "*"
+    if entry["last_modified"] is None:
+        return False
+    since = parse_http_date_safe(request.headers.get("If-Modified-Since", ""))
+    return since is not None and int(entry["last_modified"]) <= since
+
+def _load(key):
+    entry = cache.get(key)
+    _count("misses" if entry is None else "hits")
+    return entry
+
+async def _aload(key):
+    entry = await cache.aget(key)
+    await _acount("misses" if entry is None else "hits")
+    return entry
+
+def _entry(data):
+    body = dumps(data)
+    return {
+        "data": data,
+        "etag": f'"{hashlib.md5(body).hexdigest()}"',
+        "last_modified": time.time(),
+    }
+
+def _store(key, data, timeout):
+    entry = _entry(data)
+    cache.set(key, entry, timeout)
+    return entry
+
+async def _astore(key, data, timeout):
+    entry = _entry(data)
+    await cache.aset(key, entry, timeout)
+    return entry
+
+def _personalized(entry, variant):
+    return {"etag": f'{entry["etag"][:-1]}-{variant}"', "last_modified": None}
+
+def _respond(request, entry, data, cache_state, make_response):
+    if _not_modified(request, entry):
+        response = make_response(None, status.HTTP_304_NOT_MODIFIED)
+    else:
+        response = make_response(data, status.HTTP_200_OK)
+    response["ETag"] = entry["etag"]
+    if entry["last_modified"] is not None:
+        response["Last-Modified"] = http_date(entry["last_modified"])
+    else:
+        response["Vary"] = "Authorization"
+    response["X-Cache"] = cache_state
+    return response
+
+def cached_response(request, key, build, timeout, personalize=None):
+    """
+    Serve ``key`` from the cache, or call ``build()`` to produce a Response and
+    cache it when it is a 200. Cached responses carry ETag / Last-Modified and
+    answer conditional requests with 304.
+
+    ``personalize(data)`` may return ``(data, variant)`` to add per-user fields on
+    top of the shared entry; ``variant`` is folded into the ETag, and Last-Modified
+    is left out because it cannot see per-user changes.
+    """
+    entry, cache_state = _load(key), "HIT"
+    if entry is None:
+        with _build_context():
+            response = build()
+        if response.status_code != status.HTTP_200_OK:
+            return response
+        entry, cache_state = _store(key, response.data, timeout), "MISS"
+    data = entry["data"]
+    if personalize is not None:
+        data, variant = personalize(data)
+        entry = _personalized(entry, variant)
+    return _respond(request, entry, data, cache_state, lambda body, code: Response(body, status=code))
+
+async def acached_response(request, key, build, timeout, make_response, personalize=None):
+    """
+    ``cached_response`` for async views: ``build()`` and ``personalize(data)`` are
+    coroutines, ``build`` returns the data to cache (or raises), and
+    ``make_response(data, status)`` creates the HttpResponse.
+    """
+    entry, cache_state = await _aload(key), "HIT"
+    if entry is None:
+        with await _abuild_context():
+            data = await build()
+        entry, cache_state = await _astore(key, data, timeout), "MISS"
+    data = entry["data"]
+    if personalize is not None:
+        data, variant = await personalize(data)
+        entry = _personalized(entry, variant)
+    return _respond(request, entry, data, cache_state, make_response)
+
+def prometheus_lines():
+    """Response cache counters for the /metrics endpoint."""
+    stats = get_stats()
+    return [
+        "# TYPE property_response_cache_requests_total counter",
+        f'property_response_cache_requests_total{{result="hit"}} {stats["hits"]}',
+        f'property_response_cache_requests_total{{result="miss"}} {stats["misses"]}',
+    ]
@@ -0,0 +1,151 @@
+"""
+Denormalized listing counters.
+
+``Property.wishlist_count`` follows wishlist inserts and deletes with single-row
+``UPDATE ... SET wishlist_count = wishlist_count + n`` statements, so concurrent
+writers never lose an increment and no COUNT runs on read.
+
+Views are far more frequent, and a popular listing would serialize every detail
+request on its row lock. They are counted in a per-process buffer instead and
+flushed as one background job every ``PROPERTY_VIEW_FLUSH_SECONDS`` (or once
+``PROPERTY_VIEW_FLUSH_SIZE`` listings are pending). A crashed process loses at
+most one interval of views.
+
+Counter updates bypass ``save()``, so they neither re-index the listing nor
+invalidate cached responses; cached payloads show them with up to the cache
+timeout's delay. ``reconcile_wishlist_counts`` repairs drift.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, IntegrityError, connections, transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+from apps.jobs.queue import enqueue, task
+from .models import Property, PropertyViewBucket, Wishlist
+
+logger = logging.getLogger(__name__)
+
+def adjust_wishlist_counts(property_ids, delta):
+    """Add ``delta`` to the wishlist count of each listing in ``property_ids``."""
+    if not property_ids:
+        return
+    qs = Property.objects.filter(pk__in=property_ids)
+    if delta < 0:
+        qs = qs.filter(wishlist_count__gte=-delta)
+    qs.update(wishlist_count=F("wishlist_count") + delta)
+
+class ViewBuffer:
+    """Thread-safe per-process tally of listing views awaiting a flush."""
+
+    def __init__(self, interval, max_pending):
+        self.interval = interval
+        self.max_pending = max_pending
+        self.lock = threading.Lock()
+        self.pending = {}
+        self.database = None  # name of the database the pending views were counted against
+        self.last_flush = time.monotonic()
+
+    def record(self, property_id):
+        """Count a view; returns the batch to flush when one is due, else None."""
+        with self.lock:
+            if not self.pending:
+                self.database = current_database()
+            self.pending[property_id] = self.pending.get(property_id, 0) + 1
+            due = len(self.pending) >= self.max_pending or time.monotonic() - self.last_flush >= self.interval
+            return self.take() if due else None
+
+    def take(self):
+        batch = {str(pk): n for pk, n in self.pending.items()}
+        self.pending = {}
+        self.last_flush = time.monotonic()
+        return batch
+
+    def clear(self):
+        with self.lock:
+            self.take()
+
+    def flush(self):
+        """
+        Queue whatever is pending; called at interpreter exit. Views counted against
+        another database than the current one (a test database the runner has torn
+        down since) are dropped rather than written to the configured database.
+        """
+        with self.lock:
+            database, batch = self.database, self.take()
+        if not batch:
+            return
+        if database != current_database():
+            logger.info("Dropped view counts of %d listings at exit: their database %s is gone.", len(batch), database)
+            return
+        try:
+            queue_flush(batch)
+        except DatabaseError as exc:
+            logger.warning("Dropped view counts of %d listings at exit: %s", len(batch), exc)
+
+def current_database():
+    return connections[DEFAULT_DB_ALIAS].settings_dict["NAME"]
+
+view_buffer = ViewBuffer(settings.PROPERTY_VIEW_FLUSH_SECONDS, settings.PROPERTY_VIEW_FLUSH_SIZE)
+atexit.register(view_buffer.flush)
+
+def queue_flush(batch):
+    enqueue("properties.flush_view_counts", batch, timezone.now().isoformat())
+
+def record_view(property_id):
+    batch = view_buffer.record(property_id)
+    if batch:
+        queue_flush(batch)
+
+async def arecord_view(property_id):
+    batch = view_buffer.record(property_id)
+    if batch:
+        await sync_to_async(queue_flush)(batch)
+
+@task("properties.flush_view_counts")
+def flush_view_counts(counts, viewed_at=None):
+    """
+    Apply a batch of buffered ``{property_id: views}`` in id order: bump each
+    listing's view_count and its hourly PropertyViewBucket (used for trending).
+    """
+    viewed_at = datetime.fromisoformat(viewed_at) if viewed_at else timezone.now()
+    hour = viewed_at.replace(minute=0, second=0, microsecond=0)
+    for pk, n in sorted(counts.items(), key=lambda item: int(item[0])):
+        if not Property.objects.filter(pk=int(pk)).update(view_count=F("view_count") + n):
+            continue  # deleted since
+        bucket = PropertyViewBucket.objects.filter(property_id=int(pk), hour=hour)
+        if not bucket.update(views=F("views") + n):
+            try:
+                with transaction.atomic():
+                    PropertyViewBucket.objects.create(property_id=int(pk), hour=hour, views=n)
+            except IntegrityError:
+                bucket.update(views=F("views") + n)
+
+def wishlist_count_subquery():
+    counts = (
+        Wishlist.objects.filter(property=OuterRef("pk")).order_by()
+        .values("property").annotate(n=Count("id")).values("n")
+    )
+    return Coalesce(Subquery(counts, output_field=IntegerField()), Value(0))
+
+def recount_wishlist_counts(property_ids):
+    """Set the wishlist count of each listing in ``property_ids`` from its wishlist rows."""
+    if property_ids:
+        # Counted inside the UPDATE, so rows added concurrently are included rather than counted twice.
+        Property.objects.filter(pk__in=property_ids).update(wishlist_count=wishlist_count_subquery())
+
+def reconcile_wishlist_counts(fix=True):
+    """Find listings whose ``wishlist_count`` drifted from their wishlist rows; fix them unless ``fix`` is False."""
+    drifted = list(
+        Property.objects.annotate(actual=Count("wishlisted_by")).exclude(wishlist_count=F("actual"))
+        .values_list("pk", "wishlist_count", "actual")
+    )
+    if fix:
+        # Recount inside the UPDATE, so wishlist changes since the scan are not overwritten.
+        recount_wishlist_counts([pk for pk, *_ in drifted])
+    return drifted
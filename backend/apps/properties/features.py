@@ -0,0 +1,93 @@
+"""
+Amenity and security-feature lookup tables.
+
+``Property.amenities`` and ``security_features`` stay the JSON lists the API
+reads and writes; ``ListingFeature`` / ``PropertyFeature`` mirror them as
+normalized, indexed rows, so "has parking and gym" is a few index seeks instead
+of a scan over every listing's JSON. ``sync_features`` keeps the mirror in step
+from the save signal and bulk imports; rows cascade with their listing.
+"""
+import json
+from django.db.models import Exists, OuterRef, Q
+from .models import ListingFeature, PropertyFeature
+
+# JSON list field -> ListingFeature.kind
+FIELD_KINDS = {"amenities": "amenity", "security_features": "security"}
+MAX_NAME_LENGTH = 100
+
+def normalize(value):
+    name = str(value).strip().lower()[:MAX_NAME_LENGTH] if value is not None else ""
+    return name or None
+
+def labels(values):
+    """The distinct normalized names in a JSON list (anything that is not a list counts as empty)."""
+    if isinstance(values, str):
+        # Multipart form posts store the list as its JSON text.
+        try:
+            values = json.loads(values)
+        except ValueError:
+            return set()
+    if not isinstance(values, list):
+        return set()
+    return {name for name in map(normalize, values) if name}
+
+def feature_ids(pairs):
+    """
+    Map each ``(kind, name)`` to its ListingFeature id, creating the missing ones.
+    A pair without a row is left out.
+    """
+    if not pairs:
+        return {}
+    ListingFeature.objects.bulk_create(
+        [ListingFeature(kind=kind, name=name) for kind, name in pairs], ignore_conflicts=True,
+    )
+    query = Q()
+    for kind in {kind for kind, _ in pairs}:
+        query |= Q(kind=kind, name__in=[name for k, name in pairs if k == kind])
+    rows = ListingFeature.objects.filter(query).values_list("id", "kind", "name")
+    ids = {(kind, name): pk for pk, kind, name in rows if (kind, name) in pairs}
+    for kind, name in set(pairs) - ids.keys():
+        # The column's collation found the name equal to a stored spelling (MySQL's
+        # accent-insensitive default: "café" = "cafe"), so no row of its own was made.
+        # Share that row, as the feature filters would match it for this name anyway.
+        pk = ListingFeature.objects.filter(kind=kind, name=name).values_list("id", flat=True).first()
+        if pk is not None:
+            ids[kind, name] = pk
+    return ids
+
+def sync_features(props):
+    """Bring the feature links of ``props`` in line with their JSON lists."""
+    wanted = {
+        prop.pk: {(kind, name) for field, kind in FIELD_KINDS.items() for name in labels(getattr(prop, field))}
+        for prop in props
+    }
+    ids = feature_ids(set().union(*wanted.values()))
+    wanted = {pk: {ids[pair] for pair in pairs if pair in ids} for pk, pairs in wanted.items()}
+    existing = {}
+    for pk, feature_id in PropertyFeature.objects.filter(property_id__in=wanted).values_list("property_id", "feature_id"):
+        existing.setdefault(pk, set()).add(feature_id)
+    stale = Q()
+    for pk, features in existing.items():
+        if features - wanted[pk]:
+            stale |= Q(property_id=pk, feature_id__in=features - wanted[pk])
+    if stale:
+        PropertyFeature.objects.filter(stale).delete()
+    PropertyFeature.objects.bulk_create(
+        [
+            PropertyFeature(property_id=pk, feature_id=feature_id)
+            for pk, features in wanted.items() for feature_id in features - existing.get(pk, set())
+        ],
+        batch_size=1000, ignore_conflicts=True,
+    )
+
+def filter_by_features(qs, kind, values, match_all=True):
+    """Keep listings having every one (``match_all``) or any of the ``kind`` features in ``values``."""
+    names = sorted(labels(values))
+    if not names:
+        return qs
+    links = PropertyFeature.objects.filter(property=OuterRef("pk"), feature__kind=kind)
+    if not match_all:
+        return qs.filter(Exists(links.filter(feature__name__in=names)))
+    for name in names:
+        qs = qs.filter(Exists(links.filter(feature__name=name)))
+    return qs
@@ -0,0 +1,134 @@
+from decimal import Decimal, InvalidOperation
+from functools import reduce
+import math
+import operator
+from django.db.models import ExpressionWrapper, F, FloatField, Q, Value
+from rest_framework import serializers
+from .features import FIELD_KINDS, filter_by_features
+from .geo import covering_cells, haversine_km, radius_bbox, to_decimal
+
+def _split_list(value):
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def _parse_price(params, key):
+    value = params.get(key)
+    if value in (None, ""):
+        return None
+    try:
+        return Decimal(value)
+    except InvalidOperation:
+        raise serializers.ValidationError({key: "Enter a valid number."})
+
+def filter_properties(qs, params):
+    """
+    Apply the public listing filters from the query string:
+
+    ``location`` (substring), ``property_type``, ``sell_or_rent``, ``furnished_status``,
+    ``min_price`` / ``max_price``, and ``amenities`` / ``security_features`` (comma
+    separated, all required; the ``amenities_any`` / ``security_features_any`` variants
+    require at least one).
+    """
+    location = params.get("location", "").strip()
+    if location:
+        qs = qs.filter(location__icontains=location)
+
+    property_type = params.get("property_type", "").strip()
+    if property_type:
+        qs = qs.filter(property_type__iexact=property_type)
+
+    sell_or_rent = params.get("sell_or_rent", "").strip()
+    if sell_or_rent:
+        qs = qs.filter(sell_or_rent=sell_or_rent.lower())
+
+    furnished_status = params.get("furnished_status", "").strip()
+    if furnished_status:
+        qs = qs.filter(furnished_status__iexact=furnished_status)
+
+    min_price = _parse_price(params, "min_price")
+    if min_price is not None:
+        qs = qs.filter(price__gte=min_price)
+    max_price = _parse_price(params, "max_price")
+    if max_price is not None:
+        qs = qs.filter(price__lte=max_price)
+
+    for field, kind in FIELD_KINDS.items():
+        qs = filter_by_features(qs, kind, _split_list(params.get(field, "")))
+        qs = filter_by_features(qs, kind, _split_list(params.get(f"{field}_any", "")), match_all=False)
+
+    return qs
+
+MAX_RADIUS_KM = 500
+# Candidates read per result; covers the approximate SQL ordering drifting from great-circle distance.
+GEO_OVERFETCH = 4
+
+def _parse_floats(params, keys):
+    values = []
+    for key in keys:
+        value = params.get(key)
+        if value in (None, ""):
+            raise serializers.ValidationError({key: "This parameter is required."})
+        try:
+            values.append(float(value))
+        except ValueError:
+            raise serializers.ValidationError({key: "Enter a valid number."})
+    return values
+
+def parse_geo_query(params):
+    """
+    Read a spatial query from the query string.
+
+    ``lat`` + ``lng`` + ``radius_km`` selects a circle; ``bbox=min_lng,min_lat,max_lng,max_lat``
+    selects a box. Returns ``(bbox, center, radius_km)`` or ``None`` when no spatial
+    parameters were given.
+    """
+    if "bbox" in params:
+        try:
+            min_lng, min_lat, max_lng, max_lat = (float(part) for part in params["bbox"].split(","))
+        except ValueError:
+            raise serializers.ValidationError({"bbox": "Expected min_lng,min_lat,max_lng,max_lat."})
+        if not (-90 <= min_lat <= max_lat <= 90 and -180 <= min_lng <= max_lng <= 180):
+            raise serializers.ValidationError({"bbox": "Coordinates are out of range."})
+        center = ((min_lat + max_lat) / 2, (min_lng + max_lng) / 2)
+        return (min_lat, min_lng, max_lat, max_lng), center, None
+
+    if "lat" in params or "lng" in params:
+        lat, lng, radius = _parse_floats(params, ("lat", "lng", "radius_km"))
+        if not (-90 <= lat <= 90 and -180 <= lng <= 180):
+            raise serializers.ValidationError({"detail": "lat/lng are out of range."})
+        if not 0 < radius <= MAX_RADIUS_KM:
+            raise serializers.ValidationError({"radius_km": f"Must be between 0 and {MAX_RADIUS_KM}."})
+        return radius_bbox(lat, lng, radius), (lat, lng), radius
+    return None
+
+def geo_search(qs, geo_query, limit):
+    """
+    Run a spatial query on ``qs`` and return up to ``limit`` ``(property, distance_km)``
+    pairs sorted by distance from the query center.
+
+    Only rows in the geohash cells covering the search area are read, via prefix
+    seeks on the indexed ``geohash`` column. The database orders them by an
+    equirectangular approximation of the distance and returns the nearest
+    ``limit * GEO_OVERFETCH`` candidates, so a wide search loads a bounded number
+    of rows; exact containment and distance are checked on those.
+    """
+    bbox, (center_lat, center_lng), radius = geo_query
+    min_lat, min_lng, max_lat, max_lng = bbox
+    cells = covering_cells(bbox)
+    # Degrees of longitude shrink with latitude; scaling them makes the planar distance isotropic.
+    lng_scale = Decimal(str(round(math.cos(math.radians(center_lat)), 6)))
+    d_lat = F("latitude") - Value(to_decimal(center_lat))
+    d_lng = (F("longitude") - Value(to_decimal(center_lng))) * Value(lng_scale)
+    qs = qs.filter(
+        reduce(operator.or_, [Q(geohash__startswith=cell) for cell in cells]),
+        latitude__range=(min_lat, max_lat),
+        longitude__range=(min_lng, max_lng),
+    ).annotate(
+        planar_distance=ExpressionWrapper(d_lat * d_lat + d_lng * d_lng, output_field=FloatField()),
+    ).order_by("planar_distance", "-id")
+    matches = []
+    for prop in qs[:limit * GEO_OVERFETCH]:
+        distance = haversine_km(center_lat, center_lng, prop.latitude, prop.longitude)
+        if radius is None or distance <= radius:
+            matches.append((prop, distance))
+    matches.sort(key=lambda match: (match[1], -match[0].pk))
+    return matches[:limit]
@@ -0,0 +1,158 @@
+"""
+Geospatial helpers: geohash encoding, cell coverings for radius / bounding-box
+queries, and an offline gazetteer used to geocode free-text locations.
+
+Each ``Property`` with coordinates stores its geohash. A spatial query is turned
+into a small set of geohash prefixes covering the search area, and only rows in
+those cells are loaded; exact distances are then computed on the candidates.
+"""
+import math
+import re
+from decimal import Decimal
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+GEOHASH_PRECISION = 9
+MAX_COVER_CELLS = 32
+EARTH_RADIUS_KM = 6371.0088
+
+# Offline gazetteer for normalizing free-text locations: canonical name -> (lat, lng).
+GAZETTEER = {
+    "Ahmedabad": (23.0225, 72.5714),
+    "Bangalore": (12.9716, 77.5946),
+    "Bhopal": (23.2599, 77.4126),
+    "Bhubaneswar": (20.2961, 85.8245),
+    "Chandigarh": (30.7333, 76.7794),
+    "Chennai": (13.0827, 80.2707),
+    "Coimbatore": (11.0168, 76.9558),
+    "Delhi": (28.7041, 77.1025),
+    "Goa": (15.2993, 74.1240),
+    "Gurgaon": (28.4595, 77.0266),
+    "Hyderabad": (17.3850, 78.4867),
+    "Indore": (22.7196, 75.8577),
+    "Jaipur": (26.9124, 75.7873),
+    "Kochi": (9.9312, 76.2673),
+    "Kolkata": (22.5726, 88.3639),
+    "Lucknow": (26.8467, 80.9462),
+    "Madurai": (9.9252, 78.1198),
+    "Mumbai": (19.0760, 72.8777),
+    "Mysore": (12.2958, 76.6394),
+    "Nagpur": (21.1458, 79.0882),
+    "Noida": (28.5355, 77.3910),
+    "Pune": (18.5204, 73.8567),
+    "Surat": (21.1702, 72.8311),
+    "Thiruvananthapuram": (8.5241, 76.9366),
+    "Tiruchirappalli": (10.7905, 78.7047),
+    "Vijayawada": (16.5062, 80.6480),
+    "Visakhapatnam": (17.6868, 83.2185),
+}
+
+# Common alternative spellings mapped onto gazetteer names.
+ALIASES = {
+    "bengaluru": "Bangalore",
+    "bombay": "Mumbai",
+    "calcutta": "Kolkata",
+    "cochin": "Kochi",
+    "gurugram": "Gurgaon",
+    "madras": "Chennai",
+    "mysuru": "Mysore",
+    "new delhi": "Delhi",
+    "trichy": "Tiruchirappalli",
+    "trivandrum": "Thiruvananthapuram",
+    "vizag": "Visakhapatnam",
+}
+
+_LOOKUP = {name.lower(): name for name in GAZETTEER}
+_LOOKUP.update(ALIASES)
+
+def normalize_location(text):
+    """
+    Find a known place in free-text ``text``.
+
+    Returns ``(canonical_name, (lat, lng))`` or ``None``. The most specific
+    (right-most) recognised place wins, so "Adyar, Chennai" resolves to Chennai.
+    """
+    words = re.findall(r"[a-z]+", (text or "").lower())
+    for i in range(len(words) - 1, -1, -1):
+        for size in (2, 1):
+            phrase = " ".join(words[i:i + size])
+            if len(words[i:i + size]) == size and phrase in _LOOKUP:
+                name = _LOOKUP[phrase]
+                return name, GAZETTEER[name]
+    return None
+
+def encode_geohash(lat, lng, precision=GEOHASH_PRECISION):
+    lat_range, lng_range = [-90.0, 90.0], [-180.0, 180.0]
+    bits, bit_count, even, chars = 0, 0, True, []
+    lat, lng = float(lat), float(lng)
+    while len(chars) < precision:
+        rng, value = (lng_range, lng) if even else (lat_range, lat)
+        mid = (rng[0] + rng[1]) / 2
+        if value >= mid:
+            bits = (bits << 1) | 1
+            rng[0] = mid
+        else:
+            bits <<= 1
+            rng[1] = mid
+        even = not even
+        bit_count += 1
+        if bit_count == 5:
+            chars.append(GEOHASH_ALPHABET[bits])
+            bits, bit_count = 0, 0
+    return "".join(chars)
+
+def cell_size(precision):
+    """Return ``(lat_degrees, lng_degrees)`` spanned by a geohash cell of ``precision``."""
+    total_bits = 5 * precision
+    lng_bits = (total_bits + 1) // 2
+    lat_bits = total_bits // 2
+    return 180.0 / (1 << lat_bits), 360.0 / (1 << lng_bits)
+
+def haversine_km(lat1, lng1, lat2, lng2):
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(a))
+
+def radius_bbox(lat, lng, radius_km):
+    """Bounding box ``(min_lat, min_lng, max_lat, max_lng)`` enclosing a circle."""
+    dlat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    dlng = min(math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat)), 180.0)
+    return max(lat - dlat, -90.0), max(lng - dlng, -180.0), min(lat + dlat, 90.0), min(lng + dlng, 180.0)
+
+def _cells(bbox, precision):
+    min_lat, min_lng, max_lat, max_lng = bbox
+    lat_step, lng_step = cell_size(precision)
+    cells = set()
+    lat = min_lat
+    while True:
+        lng = min_lng
+        while True:
+            cells.add(encode_geohash(lat, lng, precision))
+            if len(cells) > MAX_COVER_CELLS:
+                return None
+            if lng >= max_lng:
+                break
+            lng = min(lng + lng_step, max_lng)
+        if lat >= max_lat:
+            break
+        lat = min(lat + lat_step, max_lat)
+    return cells
+
+def covering_cells(bbox):
+    """
+    Return the geohash prefixes covering ``bbox``, at the finest precision that
+    needs no more than ``MAX_COVER_CELLS`` cells.
+    """
+    best = _cells(bbox, 1) or {""}
+    for precision in range(2, GEOHASH_PRECISION + 1):
+        cells = _cells(bbox, precision)
+        if cells is None:
+            break
+        best = cells
+    return best
+
+def to_decimal(value):
+    return Decimal(str(round(float(value), 6)))
@@ -0,0 +1,159 @@
+"""
+Image upload pipeline for listings.
+
+Uploaded files are checked, stored as originals and queued as background jobs;
+a job worker then renders WebP and JPEG variants at a few widths plus a tiny
+blurred placeholder, writes them through the ``property_images`` storage alias,
+and records the URLs on ``Property.image_variants``. Listing grids use the
+smallest variant, the detail page gets every size.
+"""
+import base64
+import io
+import uuid
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.db import transaction
+from PIL import Image, ImageFilter, ImageOps, UnidentifiedImageError
+
+VARIANT_WIDTHS = (320, 640, 1280)
+VARIANT_FORMATS = {"webp": ("WEBP", 80), "jpeg": ("JPEG", 82)}
+THUMBNAIL_FORMAT = "webp"
+PLACEHOLDER_WIDTH = 16
+MAX_UPLOAD_BYTES = 15 * 1024 * 1024
+MAX_PIXELS = 50_000_000
+
+def get_storage():
+    return storages["property_images"]
+
+class InvalidImage(ValueError):
+    pass
+
+def read_upload(upload):
+    """Return the bytes of an uploaded image after a cheap header check."""
+    if upload.size > MAX_UPLOAD_BYTES:
+        raise InvalidImage(f"{upload.name}: images must be under {MAX_UPLOAD_BYTES // (1024 * 1024)} MB.")
+    data = upload.read()
+    try:
+        with Image.open(io.BytesIO(data)) as image:
+            if image.width * image.height > MAX_PIXELS:
+                raise InvalidImage(f"{upload.name}: image dimensions are too large.")
+            image.verify()
+    except Image.DecompressionBombError:
+        # Pillow refuses to open images past twice its own pixel limit.
+        raise InvalidImage(f"{upload.name}: image dimensions are too large.")
+    except (UnidentifiedImageError, OSError, SyntaxError):
+        raise InvalidImage(f"{upload.name}: not a valid image file.")
+    return data
+
+def _encode(image, fmt):
+    pil_format, quality = VARIANT_FORMATS[fmt]
+    buffer = io.BytesIO()
+    image.save(buffer, pil_format, quality=quality, optimize=fmt == "jpeg")
+    return buffer.getvalue()
+
+def _placeholder(image):
+    height = max(1, round(image.height * PLACEHOLDER_WIDTH / image.width))
+    tiny = image.resize((PLACEHOLDER_WIDTH, height), Image.Resampling.BILINEAR)
+    tiny = tiny.filter(ImageFilter.GaussianBlur(1))
+    buffer = io.BytesIO()
+    tiny.save(buffer, "JPEG", quality=40)
+    return "data:image/jpeg;base64," + base64.b64encode(buffer.getvalue()).decode()
+
+def decode(data):
+    """Decode ``data`` into an upright RGB image; raises InvalidImage if it cannot be decoded."""
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            return ImageOps.exif_transpose(original).convert("RGB")
+    except Image.DecompressionBombError:
+        raise InvalidImage("image dimensions are too large.")
+    except (UnidentifiedImageError, OSError, SyntaxError) as exc:
+        raise InvalidImage(f"not a valid image file ({exc}).")
+
+def render_variants(data, prefix):
+    """
+    Render every variant of the image in ``data`` and store it under ``prefix``.
+
+    Returns ``{"width", "height", "placeholder", "sizes": {width: {fmt: url}}}``.
+    """
+    image = decode(data)
+    storage = get_storage()
+    widths = [w for w in VARIANT_WIDTHS if w < image.width] or [image.width]
+    sizes = {}
+    for width in widths:
+        height = max(1, round(image.height * width / image.width))
+        resized = image if width == image.width else image.resize((width, height), Image.Resampling.LANCZOS)
+        sizes[str(width)] = {
+            fmt: storage.url(storage.save(f"{prefix}/{width}.{fmt}", ContentFile(_encode(resized, fmt))))
+            for fmt in VARIANT_FORMATS
+        }
+    return {
+        "width": image.width,
+        "height": image.height,
+        "placeholder": _placeholder(image),
+        "sizes": sizes,
+    }
+
+def thumbnail_url(entry):
+    """URL of the smallest rendered variant of an ``image_variants`` entry, if ready."""
+    sizes = entry.get("sizes")
+    if not sizes:
+        return None
+    return sizes[min(sizes, key=int)][THUMBNAIL_FORMAT]
+
+def largest_url(entry):
+    sizes = entry["sizes"]
+    return sizes[max(sizes, key=int)]["jpeg"]
+
+def queue_uploads(prop, uploads):
+    """
+    Validate ``uploads``, store the originals, register them as pending on
+    ``prop`` and queue one rendering job each. Returns the new image ids.
+    """
+    from apps.jobs.queue import enqueue
+
+    payloads = [read_upload(upload) for upload in uploads]
+    entries = [{"id": uuid.uuid4().hex, "status": "processing"} for _ in payloads]
+    storage = get_storage()
+    originals = [
+        storage.save(f"properties/{prop.pk}/{entry['id']}/original", ContentFile(data))
+        for entry, data in zip(entries, payloads)
+    ]
+    with transaction.atomic():
+        locked = type(prop).objects.select_for_update().get(pk=prop.pk)
+        locked.image_variants = (locked.image_variants or []) + entries
+        locked.save(update_fields=["image_variants"])
+        for entry, original in zip(entries, originals):
+            enqueue("properties.process_image", prop.pk, entry["id"], original)
+    return [entry["id"] for entry in entries]
+
+def process_image(property_id, image_id, original):
+    """
+    Job: render one uploaded original and publish its variants on the listing. An
+    image that does not decode is marked failed; any other error (storage, database)
+    propagates, so the job is retried with the original still in place.
+    """
+    from .models import Property
+
+    storage = get_storage()
+    with storage.open(original) as stream:
+        data = stream.read()
+    try:
+        result = {"status": "ready", **render_variants(data, f"properties/{property_id}/{image_id}")}
+    except InvalidImage as exc:  # a broken image will not render on retry either; surface it on the listing
+        result = {"status": "failed", "error": str(exc)[:200]}
+    with transaction.atomic():
+        prop = Property.objects.select_for_update().filter(pk=property_id).first()
+        if prop is not None:
+            variants = prop.image_variants or []
+            for entry in variants:
+                if entry.get("id") == image_id:
+                    entry.update(result)
+            prop.image_variants = variants
+            update_fields = ["image_variants"]
+            if result["status"] == "ready":
+                # Keep the plain URL list populated for clients that only read ``images``.
+                prop.images = (prop.images or []) + [largest_url(result)]
+                update_fields.append("images")
+            prop.save(update_fields=update_fields)
+    if result["status"] == "ready":
+        storage.delete(original)
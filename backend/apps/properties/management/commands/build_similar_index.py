@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+from apps.properties.similar import rebuild
+
+class Command(BaseCommand):
+    help = "Refit the similar-listings feature space over all listings and re-embed them (e.g. nightly from cron)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Seed of the description projection.")
+
+    def handle(self, *args, **options):
+        count = rebuild(seed=options["seed"])
+        self.stdout.write(self.style.SUCCESS(f"Embedded {count} listings."))
@@ -0,0 +1,31 @@
+import sys
+from django.core.management.base import BaseCommand, CommandError
+from apps.properties.bulk import detect_format, export_rows
+from apps.properties.models import Property
+
+class Command(BaseCommand):
+    help = "Stream listings to a CSV or JSONL file ('-' for stdout)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--seller", help="Only export listings owned by this username.")
+        parser.add_argument("--file-format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        try:
+            file_format = detect_format(path, options["file_format"] or ("csv" if path == "-" else None))
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        qs = Property.objects.all()
+        if options["seller"]:
+            qs = qs.filter(seller__username=options["seller"])
+
+        stream = sys.stdout if path == "-" else open(path, "w", encoding="utf-8", newline="")
+        try:
+            for line in export_rows(qs, file_format):
+                stream.write(line)
+        finally:
+            if stream is not sys.stdout:
+                stream.close()
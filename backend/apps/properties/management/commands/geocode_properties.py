@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from apps.properties.models import Property
+
+class Command(BaseCommand):
+    help = "Fill missing coordinates from the offline gazetteer and recompute geohashes."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        batch_size = options["batch_size"]
+        fields = ["latitude", "longitude", "geohash"]
+        qs = Property.objects.only("id", "location", *fields).order_by("id")
+        batch, updated, unresolved = [], 0, 0
+        for prop in qs.iterator(chunk_size=batch_size):
+            before = (prop.latitude, prop.longitude, prop.geohash)
+            prop.geocode()
+            if prop.geohash is None:
+                unresolved += 1
+            if (prop.latitude, prop.longitude, prop.geohash) != before:
+                batch.append(prop)
+            if len(batch) >= batch_size:
+                updated += Property.objects.bulk_update(batch, fields)
+                batch = []
+        if batch:
+            updated += Property.objects.bulk_update(batch, fields)
+        self.stdout.write(self.style.SUCCESS(
+            f"Updated {updated} properties; {unresolved} locations could not be resolved."
+        ))
@@ -0,0 +1,34 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from apps.properties.bulk import DEFAULT_CHUNK_SIZE, UnreadableFile, detect_format, import_rows, read_rows, text_stream
+
+class Command(BaseCommand):
+    help = "Import listings from a CSV or JSONL file for one seller."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--seller", required=True, help="Username that will own the listings.")
+        parser.add_argument("--file-format", choices=["csv", "jsonl"], help="Defaults to the file extension.")
+        parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        try:
+            seller = User.objects.get(username=options["seller"])
+        except User.DoesNotExist:
+            raise CommandError(f"User '{options['seller']}' does not exist.")
+        try:
+            file_format = detect_format(options["path"], options["file_format"])
+        except ValueError as exc:
+            raise CommandError(str(exc))
+
+        with open(options["path"], "rb") as stream:
+            try:
+                report = import_rows(read_rows(text_stream(stream), file_format), seller, chunk_size=options["chunk_size"])
+            except UnreadableFile as exc:
+                raise CommandError(f"{exc} {exc.report['created']} properties were imported before it.")
+
+        for error in report["errors"]:
+            self.stderr.write(f"row {error['row']}: {error['errors']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {report['created']} properties; {report['failed']} rows failed."
+        ))
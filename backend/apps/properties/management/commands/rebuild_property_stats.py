@@ -0,0 +1,19 @@
+from django.core.management.base import BaseCommand, CommandError
+from apps.properties.stats import rebuild, verify
+
+class Command(BaseCommand):
+    help = "Rebuild the precomputed listing statistics and verify them against live aggregates."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--verify-only", action="store_true", help="Only compare, do not rebuild.")
+
+    def handle(self, *args, **options):
+        if not options["verify_only"]:
+            rows = rebuild()
+            self.stdout.write(f"Rebuilt {rows} statistics rows.")
+        problems = verify()
+        for problem in problems:
+            self.stderr.write(problem)
+        if problems:
+            raise CommandError(f"{len(problems)} statistics rows disagree with live aggregates.")
+        self.stdout.write(self.style.SUCCESS("Statistics match live aggregates."))
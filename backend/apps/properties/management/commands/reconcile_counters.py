@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+from apps.chats.counters import reconcile_room_counters
+from apps.properties.counters import reconcile_wishlist_counts
+
+class Command(BaseCommand):
+    help = "Recount the denormalized wishlist and chat message counters and fix rows that drifted."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Only report drift, do not fix it.")
+
+    def handle(self, *args, **options):
+        fix = not options["dry_run"]
+        listings = reconcile_wishlist_counts(fix=fix)
+        for pk, stored, actual in listings:
+            self.stdout.write(f"property {pk}: wishlist_count {stored} -> {actual}")
+        rooms = reconcile_room_counters(fix=fix)
+        for pk, stored, actual in rooms:
+            self.stdout.write(f"chatroom {pk}: message_count {stored} -> {actual}")
+        verb = "Would fix" if options["dry_run"] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{verb} {len(listings)} listings and {len(rooms)} chat rooms."))
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from apps.properties.trending import refresh
+
+class Command(BaseCommand):
+    help = "Recompute the trending listings feed (schedule it from cron, or let the feed queue it)."
+
+    def handle(self, *args, **options):
+        count = refresh()
+        self.stdout.write(self.style.SUCCESS(f"Ranked {count} trending listings."))
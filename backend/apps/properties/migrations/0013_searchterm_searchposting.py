@@ -0,0 +1,66 @@
+# Generated by Django 5.1.7 on 2026-10-18 19:59
+
+import re
+from collections import Counter
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def index_listings(apps, schema_editor):
+    # search.rebuild_index() as of this migration: existing listings would otherwise never be found.
+    Property = apps.get_model('properties', 'Property')
+    SearchPosting = apps.get_model('properties', 'SearchPosting')
+    SearchTerm = apps.get_model('properties', 'SearchTerm')
+    stop_words = frozenset('a an and are at be by for from in is it of on or the to with'.split())
+    token_re = re.compile(r'[a-z0-9]+')
+    document_counts = Counter()
+    batch = []
+    rows = Property.objects.order_by('id').values_list('id', 'name', 'location', 'description')
+    for pk, *texts in rows.iterator(chunk_size=1000):
+        weights = Counter()
+        for boost, text in zip((3, 2, 1), texts):
+            tokens = [t[:64] for t in token_re.findall((text or '').lower()) if len(t) > 1 and t not in stop_words]
+            for term, tf in Counter(tokens).items():
+                weights[term] += boost * min(tf, 5)
+        for term, weight in weights.items():
+            batch.append(SearchPosting(term=term, property_id=pk, weight=weight))
+            document_counts[term] += 1
+        if len(batch) >= 1000:
+            SearchPosting.objects.bulk_create(batch)
+            batch = []
+    SearchPosting.objects.bulk_create(batch)
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=term, document_count=n) for term, n in document_counts.items()], batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0012_property_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchTerm',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64, unique=True)),
+                ('document_count', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchPosting',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('term', models.CharField(max_length=64)),
+                ('weight', models.PositiveIntegerField()),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_postings', to='properties.property')),
+            ],
+            options={
+                'unique_together': {('term', 'property')},
+            },
+        ),
+        migrations.RunPython(index_listings, migrations.RunPython.noop),
+    ]
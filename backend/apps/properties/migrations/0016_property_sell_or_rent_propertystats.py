@@ -0,0 +1,68 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:15
+
+import math
+from collections import Counter, defaultdict
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def count_listings(apps, schema_editor):
+    # stats.rebuild() as of this migration: existing listings would otherwise never be counted.
+    Property = apps.get_model('properties', 'Property')
+    PropertyStats = apps.get_model('properties', 'PropertyStats')
+    groups = defaultdict(lambda: {'count': 0, 'sum': Decimal(0), 'min': None, 'max': None, 'histogram': Counter()})
+    rows = Property.objects.values_list('price', 'property_type', 'sell_or_rent', 'created_at')
+    for price, property_type, sell_or_rent, created_at in rows.iterator(chunk_size=2000):
+        bucket = -1 if price < 1 else int(math.floor(40 * math.log10(float(price))))
+        for group in (('all', ''), ('type', property_type), ('listing', sell_or_rent), ('month', created_at.strftime('%Y-%m'))):
+            stats = groups[group]
+            stats['count'] += 1
+            stats['sum'] += price
+            stats['min'] = price if stats['min'] is None else min(stats['min'], price)
+            stats['max'] = price if stats['max'] is None else max(stats['max'], price)
+            stats['histogram'][str(bucket)] += 1
+    PropertyStats.objects.bulk_create(
+        (
+            PropertyStats(
+                dimension=dimension, key=key, count=stats['count'], price_sum=stats['sum'],
+                price_min=stats['min'], price_max=stats['max'], histogram=dict(stats['histogram']),
+            )
+            for (dimension, key), stats in groups.items()
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0015_property_image_variants'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='sell_or_rent',
+            field=models.CharField(choices=[('sell', 'Sell'), ('rent', 'Rent')], default='sell', max_length=10),
+        ),
+        migrations.CreateModel(
+            name='PropertyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('all', 'All listings'), ('type', 'Property type'), ('listing', 'Sell / rent'), ('month', 'Month listed')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=64)),
+                ('count', models.PositiveIntegerField(default=0)),
+                ('price_sum', models.DecimalField(decimal_places=2, default=0, max_digits=20)),
+                ('price_min', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('price_max', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('histogram', models.JSONField(default=dict)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name_plural': 'property stats',
+                'unique_together': {('dimension', 'key')},
+            },
+        ),
+        migrations.RunPython(count_listings, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,46 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:39
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
+
+def count_wishlists(apps, schema_editor):
+    Property = apps.get_model('properties', 'Property')
+    Wishlist = apps.get_model('properties', 'Wishlist')
+    counts = (
+        Wishlist.objects.filter(property=OuterRef('pk')).order_by()
+        .values('property').annotate(n=Count('id')).values('n')
+    )
+    Property.objects.update(wishlist_count=Coalesce(Subquery(counts, output_field=models.IntegerField()), Value(0)))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0016_property_sell_or_rent_propertystats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='property',
+            name='view_count',
+            field=models.PositiveBigIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name='property',
+            name='wishlist_count',
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['wishlist_count', 'id'], name='property_wishlist_count_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='property',
+            index=models.Index(fields=['view_count', 'id'], name='property_view_count_idx'),
+        ),
+        migrations.RunPython(count_wishlists, migrations.RunPython.noop),
+    ]
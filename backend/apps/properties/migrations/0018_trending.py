@@ -0,0 +1,40 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:42
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0017_property_counters'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyViewBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('hour', models.DateTimeField()),
+                ('views', models.PositiveIntegerField(default=0)),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='view_buckets', to='properties.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['hour'], name='viewbucket_hour_idx')],
+                'unique_together': {('property', 'hour')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TrendingListing',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('property_type', models.CharField(max_length=50)),
+                ('rank', models.PositiveIntegerField(unique=True)),
+                ('score', models.FloatField()),
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='trending', to='properties.property')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['property_type', 'rank'], name='trending_type_rank_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0018_trending'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SimilaritySpace',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('params', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='PropertyVector',
+            fields=[
+                ('property', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='vector', serialize=False, to='properties.property')),
+                ('vector', models.BinaryField()),
+                ('updated_at', models.DateTimeField(db_index=True)),
+                ('space', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='vectors', to='properties.similarityspace')),
+            ],
+        ),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.1.7 on 2026-10-18 20:48
+
+import django.db.models.deletion
+import json
+from django.db import migrations, models
+
+
+def link_features(apps, schema_editor):
+    # Same normalization as apps.properties.features.
+    Property = apps.get_model('properties', 'Property')
+    ListingFeature = apps.get_model('properties', 'ListingFeature')
+    PropertyFeature = apps.get_model('properties', 'PropertyFeature')
+    kinds = {'amenities': 'amenity', 'security_features': 'security'}
+    feature_ids = {}
+
+    def resolve(pairs):
+        # As features.feature_ids: the collation may fold a name into a stored spelling
+        # ("café" = "cafe" on MySQL), which then shares that row instead of failing the insert.
+        pairs = pairs - feature_ids.keys()
+        if not pairs:
+            return
+        ListingFeature.objects.bulk_create(
+            [ListingFeature(kind=kind, name=name) for kind, name in sorted(pairs)], ignore_conflicts=True,
+        )
+        for kind, name in pairs:
+            pk = ListingFeature.objects.filter(kind=kind, name=name).values_list('id', flat=True).first()
+            if pk is not None:
+                feature_ids[kind, name] = pk
+
+    def link(batch):
+        resolve(set().union(*batch.values()))
+        links = {(pk, feature_ids[pair]) for pk, pairs in batch.items() for pair in pairs if pair in feature_ids}
+        PropertyFeature.objects.bulk_create(
+            [PropertyFeature(property_id=pk, feature_id=feature_id) for pk, feature_id in sorted(links)],
+            ignore_conflicts=True,
+        )
+
+    batch = {}
+    rows = Property.objects.order_by().values_list('id', 'amenities', 'security_features')
+    for pk, *lists in rows.iterator(chunk_size=2000):
+        names = set()
+        for kind, values in zip(kinds.values(), lists):
+            if isinstance(values, str):
+                try:
+                    values = json.loads(values)
+                except ValueError:
+                    continue
+            if isinstance(values, list):
+                names |= {(kind, str(v).strip().lower()[:100]) for v in values if v is not None and str(v).strip()}
+        batch[pk] = names
+        if len(batch) >= 2000:
+            link(batch)
+            batch = {}
+    if batch:
+        link(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0019_similar_vectors'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ListingFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(choices=[('amenity', 'Amenity'), ('security', 'Security feature')], max_length=10)),
+                ('name', models.CharField(max_length=100)),
+            ],
+            options={
+                'unique_together': {('kind', 'name')},
+            },
+        ),
+        migrations.CreateModel(
+            name='PropertyFeature',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feature', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='property_links', to='properties.listingfeature')),
+                ('property', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='feature_links', to='properties.property')),
+            ],
+            options={
+                'unique_together': {('feature', 'property')},
+            },
+        ),
+        migrations.RunPython(link_features, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:22
+
+from django.db import migrations, models
+
+
+def split_histograms(apps, schema_editor):
+    PropertyStats = apps.get_model('properties', 'PropertyStats')
+    PropertyStatsBucket = apps.get_model('properties', 'PropertyStatsBucket')
+    PropertyStatsBucket.objects.bulk_create(
+        (
+            PropertyStatsBucket(dimension=row.dimension, key=row.key, bucket=int(bucket), count=n)
+            for row in PropertyStats.objects.all()
+            for bucket, n in row.histogram.items()
+            if n > 0
+        ),
+        batch_size=2000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0020_listing_features'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PropertyStatsBucket',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('all', 'All listings'), ('type', 'Property type'), ('listing', 'Sell / rent'), ('month', 'Month listed')], max_length=10)),
+                ('key', models.CharField(blank=True, max_length=64)),
+                ('bucket', models.IntegerField()),
+                ('count', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'unique_together': {('dimension', 'key', 'bucket')},
+            },
+        ),
+        migrations.RunPython(split_histograms, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='propertystats',
+            name='histogram',
+        ),
+    ]
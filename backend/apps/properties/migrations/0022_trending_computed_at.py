@@ -0,0 +1,20 @@
+# Generated by Django 5.1.7 on 2026-10-18 21:40
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('properties', '0021_stats_buckets'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='trendinglisting',
+            name='computed_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
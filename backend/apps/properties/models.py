@@ -1,11 +1,17 @@
-from django.db import models
+from django.db import models, transaction
 from django.contrib.auth.models import User
+from .geo import encode_geohash, normalize_location, to_decimal
 
 PROPERTY_CHOICES = (
     ('sell', 'Sell'),
     ('rent', 'Rent'),
 )
 
+# Fields listing statistics (PropertyStats) are computed from.
+STATS_FIELDS = frozenset({'price', 'property_type', 'sell_or_rent', 'created_at'})
+# Fields geocoding compares against their loaded values.
+GEO_FIELDS = frozenset({'location', 'latitude', 'longitude'})
+
 class Property(models.Model):
     seller = models.ForeignKey(User, on_delete=models.CASCADE, related_name='properties')
     name = models.CharField(max_length=255)
@@ -13,7 +19,10 @@ class Property(models.Model):
     description = models.TextField()
     price = models.DecimalField(max_digits=10, decimal_places=2)
     property_type = models.CharField(max_length=50)
+    sell_or_rent = models.CharField(max_length=10, choices=PROPERTY_CHOICES, default='sell')
     images = models.JSONField(blank=True, null=True)
+    # Uploaded images: [{"id", "status", "width", "height", "placeholder", "sizes": {width: {fmt: url}}}]
+    image_variants = models.JSONField(blank=True, null=True, editable=False)
     furnished_status = models.CharField(max_length=50, blank=True, null=True)
     floor_number = models.PositiveIntegerField(blank=True, null=True)
     total_floors = models.PositiveIntegerField(blank=True, null=True)
@@ -22,11 +31,77 @@ class Property(models.Model):
     parking_availability = models.CharField(max_length=50, blank=True, null=True)
     security_features = models.JSONField(blank=True, null=True)
     amenities = models.JSONField(blank=True, null=True)
+    latitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    longitude = models.DecimalField(max_digits=9, decimal_places=6, blank=True, null=True)
+    # Spatial index: geohash of (latitude, longitude); radius/bbox queries seek on its prefixes.
+    geohash = models.CharField(max_length=12, blank=True, null=True, db_index=True, editable=False)
+    # Denormalized counters, kept up to date by apps.properties.counters.
+    wishlist_count = models.PositiveIntegerField(default=0, editable=False)
+    view_count = models.PositiveBigIntegerField(default=0, editable=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Keyset pagination seeks on (ordering column, id).
+            models.Index(fields=["created_at", "id"], name="property_created_id_idx"),
+            models.Index(fields=["price", "id"], name="property_price_id_idx"),
+            models.Index(fields=["property_type", "created_at", "id"], name="property_type_created_idx"),
+            models.Index(fields=["furnished_status", "created_at", "id"], name="property_furnished_idx"),
+            models.Index(fields=["wishlist_count", "id"], name="property_wishlist_count_idx"),
+            models.Index(fields=["view_count", "id"], name="property_view_count_idx"),
+        ]
+
     def __str__(self):
         return self.name
 
+    def geocode(self):
+        """
+        Fill missing coordinates from the offline gazetteer and refresh the geohash.
+        A changed location without new coordinates is geocoded afresh, as the loaded
+        ones belong to the old address.
+        """
+        loaded = getattr(self, "_geo_entry", None)
+        if loaded is not None and self.location != loaded[0] and (self.latitude, self.longitude) == loaded[1:]:
+            self.latitude = self.longitude = None
+        if self.latitude is None or self.longitude is None:
+            match = normalize_location(self.location)
+            if match:
+                _, (lat, lng) = match
+                self.latitude, self.longitude = to_decimal(lat), to_decimal(lng)
+        if self.latitude is not None and self.longitude is not None:
+            self.geohash = encode_geohash(self.latitude, self.longitude)
+        else:
+            self.geohash = None
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the location the stored coordinates were set for.
+        instance._geo_entry = instance.geo_entry() if GEO_FIELDS <= set(field_names) else None
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        # Geocoding compares against the reloaded row from now on, not the one loaded first.
+        if (fields is None or GEO_FIELDS <= set(fields)) and not GEO_FIELDS & self.get_deferred_fields():
+            self._geo_entry = self.geo_entry()
+
+    def geo_entry(self):
+        return (self.location, self.latitude, self.longitude)
+
+    def stats_entry(self):
+        return (self.price, self.property_type, self.sell_or_rent, self.created_at)
+
+    def save(self, *args, **kwargs):
+        self.geocode()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"latitude", "longitude", "location"} & set(update_fields):
+            kwargs["update_fields"] = set(update_fields) | {"latitude", "longitude", "geohash"}
+        # One transaction, so the statistics read the stored row under lock before overwriting it.
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+        self._geo_entry = self.geo_entry()
+
 class Wishlist(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='wishlist_items')
     property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='wishlisted_by')
@@ -37,3 +112,142 @@ class Wishlist(models.Model):
 
     def __str__(self):
         return f"{self.user.username} - {self.property.name}"
+
+class SearchTerm(models.Model):
+    """Vocabulary of the listing search index, with the number of listings containing each term."""
+    term = models.CharField(max_length=64, unique=True)
+    document_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.term
+
+class SearchPosting(models.Model):
+    """One (term, listing) entry of the inverted index; weight combines field boost and term frequency."""
+    term = models.CharField(max_length=64)
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='search_postings')
+    weight = models.PositiveIntegerField()
+
+    class Meta:
+        unique_together = ('term', 'property')
+
+    def __str__(self):
+        return f"{self.term} -> {self.property_id}"
+
+class PropertyStats(models.Model):
+    """
+    Precomputed price statistics for one group of listings (all, a property type,
+    sell/rent or a creation month), maintained incrementally by apps.properties.stats.
+    """
+    DIMENSION_CHOICES = (
+        ('all', 'All listings'),
+        ('type', 'Property type'),
+        ('listing', 'Sell / rent'),
+        ('month', 'Month listed'),
+    )
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.CharField(max_length=64, blank=True)
+    count = models.PositiveIntegerField(default=0)
+    price_sum = models.DecimalField(max_digits=20, decimal_places=2, default=0)
+    price_min = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    price_max = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('dimension', 'key')
+        verbose_name_plural = 'property stats'
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}"
+
+class PropertyStatsBucket(models.Model):
+    """
+    One bucket of a statistics group's log-scale price histogram, used for percentiles.
+    A row per bucket, so writers add to counts with an UPDATE instead of rewriting a blob.
+    """
+    dimension = models.CharField(max_length=10, choices=PropertyStats.DIMENSION_CHOICES)
+    key = models.CharField(max_length=64, blank=True)
+    bucket = models.IntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('dimension', 'key', 'bucket')
+
+    def __str__(self):
+        return f"{self.dimension}:{self.key}:{self.bucket}"
+
+class PropertyViewBucket(models.Model):
+    """Views of a listing within one hour; feeds the trending scores and is pruned by them."""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='view_buckets')
+    hour = models.DateTimeField()
+    views = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('property', 'hour')
+        indexes = [models.Index(fields=["hour"], name="viewbucket_hour_idx")]
+
+    def __str__(self):
+        return f"{self.property_id} @ {self.hour:%Y-%m-%d %H:00}: {self.views}"
+
+class TrendingListing(models.Model):
+    """
+    One row of the precomputed trending feed, rebuilt by apps.properties.trending.
+    ``rank`` 1 is the hottest listing; pages seek on it (per type via property_type).
+    """
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, related_name='trending')
+    property_type = models.CharField(max_length=50)  # lower-cased, for the type filter
+    rank = models.PositiveIntegerField(unique=True)
+    score = models.FloatField()
+    # When the refresh that wrote the feed ran (the same on every row); drives staleness.
+    computed_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [models.Index(fields=["property_type", "rank"], name="trending_type_rank_idx")]
+
+    def __str__(self):
+        return f"#{self.rank} {self.property_id} ({self.score:.2f})"
+
+class SimilaritySpace(models.Model):
+    """Fitted feature space (vocabularies, price scale, IDF) listings are embedded in; the newest is current."""
+    params = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Similarity space #{self.pk} ({self.created_at:%Y-%m-%d %H:%M})"
+
+class PropertyVector(models.Model):
+    """A listing's float32 embedding in a SimilaritySpace (apps.properties.similar)."""
+    property = models.OneToOneField(Property, on_delete=models.CASCADE, primary_key=True, related_name='vector')
+    space = models.ForeignKey(SimilaritySpace, on_delete=models.CASCADE, related_name='vectors')
+    vector = models.BinaryField()
+    updated_at = models.DateTimeField(db_index=True)
+
+    def __str__(self):
+        return f"Vector of {self.property_id}"
+
+FEATURE_KINDS = (
+    ('amenity', 'Amenity'),
+    ('security', 'Security feature'),
+)
+
+class ListingFeature(models.Model):
+    """One amenity or security feature, named in lowercase; the lookup table behind the feature filters."""
+    kind = models.CharField(max_length=10, choices=FEATURE_KINDS)
+    name = models.CharField(max_length=100)
+
+    class Meta:
+        unique_together = ('kind', 'name')
+
+    def __str__(self):
+        return f"{self.kind}: {self.name}"
+
+class PropertyFeature(models.Model):
+    """Links a listing to one of the ListingFeatures in its ``amenities`` / ``security_features``."""
+    property = models.ForeignKey(Property, on_delete=models.CASCADE, related_name='feature_links')
+    feature = models.ForeignKey(ListingFeature, on_delete=models.CASCADE, related_name='property_links')
+
+    class Meta:
+        # Leads with feature, so "listings having feature X" is an index seek.
+        unique_together = ('feature', 'property')
+
+    def __str__(self):
+        return f"{self.property_id} -> {self.feature_id}"
@@ -0,0 +1,123 @@
+import base64
+import json
+from django.core.exceptions import ValidationError as DjangoValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination over ``(ordering_field, id)``.
+
+    Unlike offset pagination, each page is fetched with a ``WHERE`` on the last
+    row of the previous page, so with a matching composite index a deep page
+    costs the same as the first one. The cursor is an opaque base64 token.
+    """
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    ordering_query_param = "ordering"
+    page_size = 20
+    max_page_size = 100
+    # Orderings clients may request; "id" is always appended as a tie-breaker.
+    allowed_orderings = ("-created_at", "created_at", "price", "-price", "-wishlist_count", "-view_count")
+    default_ordering = "-created_at"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.finish_page(list(self.page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request):
+        """``paginate_queryset`` for async views, using the async ORM."""
+        return self.finish_page([obj async for obj in self.page_queryset(queryset, request)])
+
+    def page_queryset(self, queryset, request):
+        """The (unevaluated) query for the requested page plus one lookahead row."""
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(request)
+        field_name = self.ordering.lstrip("-")
+        descending = self.ordering.startswith("-")
+        tie_breaker = "-id" if descending else "id"
+
+        queryset = queryset.order_by(self.ordering, tie_breaker)
+        cursor = self.decode_cursor(request, queryset.model, field_name)
+        if cursor is not None:
+            value, pk = cursor
+            op = "lt" if descending else "gt"
+            queryset = queryset.filter(
+                Q(**{f"{field_name}__{op}": value})
+                | Q(**{field_name: value, f"id__{op}": pk})
+            )
+
+        # Fetch one extra row to know whether another page exists.
+        return queryset[: self.page_size + 1]
+
+    def finish_page(self, results):
+        field_name = self.ordering.lstrip("-")
+        self.has_next = len(results) > self.page_size
+        results = results[: self.page_size]
+        self.next_position = None
+        if self.has_next and results:
+            last = results[-1]
+            if isinstance(last, dict):  # .values() rows
+                self.next_position = (last[field_name], last["id"])
+            else:
+                self.next_position = (getattr(last, field_name), last.pk)
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request):
+        ordering = request.query_params.get(self.ordering_query_param, self.default_ordering)
+        if ordering not in self.allowed_orderings:
+            return self.default_ordering
+        return ordering
+
+    def get_next_link(self):
+        if self.next_position is None:
+            return None
+        value, pk = self.next_position
+        token = json.dumps([str(value), pk, self.ordering]).encode()
+        encoded = base64.urlsafe_b64encode(token).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, encoded)
+
+    def decode_cursor(self, request, model, field_name):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            raw_value, pk, ordering = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            if ordering != self.ordering:
+                raise ValueError("Cursor was issued for a different ordering.")
+            value = model._meta.get_field(field_name).to_python(raw_value)
+            return value, int(pk)
+        except (TypeError, ValueError, DjangoValidationError):
+            raise NotFound("Invalid cursor.")
+
+    def to_html(self):
+        return ""
+
+class TrendingPagination(KeysetPagination):
+    """Keyset pages over the precomputed trending rank (see apps.properties.trending)."""
+    allowed_orderings = ("rank",)
+    default_ordering = "rank"
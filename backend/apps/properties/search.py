@@ -0,0 +1,208 @@
+"""
+Keyword search over listing name, location and description.
+
+Listings are tokenized into a database-backed inverted index (``SearchTerm`` holds
+the vocabulary and document frequencies, ``SearchPosting`` the per-listing entries),
+so a query only reads the postings of its own terms instead of scanning the
+``Property`` table. Postings are updated incrementally from model signals.
+"""
+import difflib
+import math
+import operator
+import re
+from collections import Counter
+from functools import reduce
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, IntegerField, Max, Sum, Value, When
+from django.db.models.functions import Length
+from .models import Property, SearchPosting, SearchTerm
+
+FIELD_WEIGHTS = {"name": 3, "location": 2, "description": 1}
+MAX_TERM_FREQUENCY = 5
+MAX_TERM_LENGTH = 64
+MAX_QUERY_TOKENS = 8
+PREFIX_EXPANSIONS = 10
+FUZZY_EXPANSIONS = 3
+# Spelling fallback compares against at most this many of the most frequent similar terms.
+FUZZY_CANDIDATES = 200
+# The listing count only feeds IDF, so a slightly stale value is fine.
+TOTAL_CACHE_KEY = "properties:search:total"
+TOTAL_CACHE_TIMEOUT = 300
+EXACT_BOOST, PREFIX_BOOST, FUZZY_BOOST = 1.0, 0.6, 0.4
+
+STOP_WORDS = frozenset(
+    "a an and are at be by for from in is it of on or the to with".split()
+)
+TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    """Lowercase ``text`` and split it into index terms, dropping stop words."""
+    return [
+        token[:MAX_TERM_LENGTH]
+        for token in TOKEN_RE.findall((text or "").lower())
+        if len(token) > 1 and token not in STOP_WORDS
+    ]
+
+def document_weights(prop):
+    """Map each term of a listing to its weight (field boost x capped term frequency)."""
+    weights = Counter()
+    for field, boost in FIELD_WEIGHTS.items():
+        for term, tf in Counter(tokenize(getattr(prop, field))).items():
+            weights[term] += boost * min(tf, MAX_TERM_FREQUENCY)
+    return weights
+
+def _adjust_document_counts(terms, delta):
+    if not terms:
+        return
+    rows = SearchTerm.objects.filter(term__in=terms)
+    if delta > 0:
+        SearchTerm.objects.bulk_create(
+            [SearchTerm(term=term) for term in terms], ignore_conflicts=True
+        )
+    else:
+        # Never below zero (an unsigned column on MySQL), even if the counts drifted.
+        rows = rows.filter(document_count__gte=-delta)
+    rows.update(document_count=F("document_count") + delta)
+
+@transaction.atomic
+def index_property(prop):
+    """(Re)index one listing, touching only the postings that changed."""
+    weights = document_weights(prop)
+    existing = dict(
+        SearchPosting.objects.filter(property=prop).values_list("term", "weight")
+    )
+    removed = existing.keys() - weights.keys()
+    added = weights.keys() - existing.keys()
+    changed = [t for t in weights.keys() & existing.keys() if weights[t] != existing[t]]
+
+    if removed:
+        SearchPosting.objects.filter(property=prop, term__in=removed).delete()
+    SearchPosting.objects.bulk_create(
+        [SearchPosting(term=t, property=prop, weight=weights[t]) for t in added]
+    )
+    for term in changed:
+        SearchPosting.objects.filter(property=prop, term=term).update(weight=weights[term])
+    _adjust_document_counts(list(added), 1)
+    _adjust_document_counts(list(removed), -1)
+
+def index_new_properties(props):
+    """Index freshly created listings (no existing postings) with a few bulk queries."""
+    postings, document_counts = [], Counter()
+    for prop in props:
+        for term, weight in document_weights(prop).items():
+            postings.append(SearchPosting(term=term, property_id=prop.pk, weight=weight))
+            document_counts[term] += 1
+    SearchPosting.objects.bulk_create(postings, batch_size=1000, ignore_conflicts=True)
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=term) for term in document_counts], batch_size=1000, ignore_conflicts=True
+    )
+    terms_by_count = {}
+    for term, count in document_counts.items():
+        terms_by_count.setdefault(count, []).append(term)
+    for count, terms in terms_by_count.items():
+        SearchTerm.objects.filter(term__in=terms).update(document_count=F("document_count") + count)
+
+def unindex_property(prop):
+    """Drop a listing's contribution to the vocabulary document counts."""
+    terms = list(SearchPosting.objects.filter(property=prop).values_list("term", flat=True))
+    _adjust_document_counts(terms, -1)
+
+def rebuild_index(batch_size=1000):
+    """Rebuild the whole index from the ``Property`` table. Returns the number of listings indexed."""
+    SearchPosting.objects.all().delete()
+    SearchTerm.objects.all().delete()
+    document_counts = Counter()
+    total = 0
+    qs = Property.objects.only("id", *FIELD_WEIGHTS).order_by("id")
+    batch = []
+    for prop in qs.iterator(chunk_size=batch_size):
+        for term, weight in document_weights(prop).items():
+            batch.append(SearchPosting(term=term, property_id=prop.id, weight=weight))
+            document_counts[term] += 1
+        total += 1
+        if len(batch) >= batch_size:
+            SearchPosting.objects.bulk_create(batch, batch_size=batch_size)
+            batch = []
+    SearchPosting.objects.bulk_create(batch, batch_size=batch_size)
+    SearchTerm.objects.bulk_create(
+        [SearchTerm(term=t, document_count=c) for t, c in document_counts.items()],
+        batch_size=batch_size,
+    )
+    return total
+
+def _expand(token):
+    """
+    Return ``{term: boost}`` for the vocabulary terms a query token should match:
+    the exact term, terms it is a prefix of, and close spellings when nothing matched.
+    """
+    expansions = {}
+    if SearchTerm.objects.filter(term=token, document_count__gt=0).exists():
+        expansions[token] = EXACT_BOOST
+    prefixed = (
+        SearchTerm.objects.filter(term__startswith=token, document_count__gt=0)
+        .exclude(term=token)
+        .order_by("-document_count")
+        .values_list("term", flat=True)[:PREFIX_EXPANSIONS]
+    )
+    for term in prefixed:
+        expansions.setdefault(term, PREFIX_BOOST)
+    if not expansions and len(token) > 3:
+        candidates = (
+            SearchTerm.objects.annotate(length=Length("term"))
+            .filter(
+                term__startswith=token[0],
+                length__gte=len(token) - 1,
+                length__lte=len(token) + 1,
+                document_count__gt=0,
+            )
+            .order_by("-document_count")
+            .values_list("term", flat=True)[:FUZZY_CANDIDATES]
+        )
+        for term in difflib.get_close_matches(token, list(candidates), n=FUZZY_EXPANSIONS, cutoff=0.75):
+            expansions[term] = FUZZY_BOOST
+    return expansions
+
+def search(query, limit=20, offset=0):
+    """
+    Return listings matching ``query`` ranked by relevance.
+
+    Listings that match more of the query tokens come first; ties are broken by a
+    TF-IDF style score summed over the matched terms.
+    """
+    tokens = list(dict.fromkeys(tokenize(query)))[:MAX_QUERY_TOKENS]
+    groups = [g for g in (_expand(token) for token in tokens) if g]
+    if not groups:
+        return []
+
+    boosts = {}
+    for group in groups:
+        for term, boost in group.items():
+            boosts[term] = max(boost, boosts.get(term, 0))
+    document_counts = dict(
+        SearchTerm.objects.filter(term__in=boosts).values_list("term", "document_count")
+    )
+    total = max(cache.get_or_set(TOTAL_CACHE_KEY, Property.objects.count, TOTAL_CACHE_TIMEOUT), 1)
+    idf = {t: math.log(1 + total / max(document_counts.get(t, 1), 1)) + 1 for t in boosts}
+
+    score = Sum(
+        F("weight") * Case(
+            *[When(term=t, then=Value(boosts[t] * idf[t])) for t in boosts],
+            default=Value(0.0),
+            output_field=FloatField(),
+        ),
+        output_field=FloatField(),
+    )
+    matched = reduce(operator.add, [
+        Max(Case(When(term__in=list(group), then=Value(1)), default=Value(0), output_field=IntegerField()))
+        for group in groups
+    ])
+    ranked = (
+        SearchPosting.objects.filter(term__in=list(boosts))
+        .values("property_id")
+        .annotate(matched=matched, score=score)
+        .order_by("-matched", "-score", "-property_id")
+    )[offset:offset + limit]
+    ids = [row["property_id"] for row in ranked]
+    found = Property.objects.select_related("seller").in_bulk(ids)
+    return [found[i] for i in ids if i in found]
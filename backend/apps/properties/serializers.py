@@ -1,5 +1,10 @@
+import hashlib
 import json
+from decimal import ROUND_HALF_UP, Decimal
+from functools import lru_cache
 from rest_framework import serializers
+from config.row_serializers import RowSerializer
+from .images import largest_url, thumbnail_url
 from .models import Property, Wishlist
 
 class JSONListField(serializers.Field):
@@ -21,11 +26,26 @@ class JSONListField(serializers.Field):
     def to_representation(self, value):
         return value
 
+class CoordinateField(serializers.DecimalField):
+    # Map pickers send floats with more precision than we store; round instead of rejecting.
+    def __init__(self, limit, **kwargs):
+        kwargs.setdefault("required", False)
+        kwargs.setdefault("allow_null", True)
+        super().__init__(
+            max_digits=9, decimal_places=6, rounding=ROUND_HALF_UP,
+            min_value=Decimal(-limit), max_value=Decimal(limit), **kwargs
+        )
+
+    def validate_precision(self, value):
+        return value
+
 class PropertySerializer(serializers.ModelSerializer):
     seller_name = serializers.CharField(source="seller.username", read_only=True)
     # Use custom field for images
     images = JSONListField(required=False)
-    
+    latitude = CoordinateField(90)
+    longitude = CoordinateField(180)
+
     class Meta:
         model = Property
         fields = [
@@ -37,6 +57,7 @@ class PropertySerializer(serializers.ModelSerializer):
             "description",
             "price",
             "property_type",
+            "sell_or_rent",
             "images",  # This field now holds multiple image URLs as a list
             "furnished_status",
             "floor_number",
@@ -46,14 +67,136 @@ class PropertySerializer(serializers.ModelSerializer):
             "parking_availability",
             "security_features",
             "amenities",
+            "latitude",
+            "longitude",
+            "image_variants",  # every rendered size of uploaded images
+            "wishlist_count",
+            "view_count",
             "created_at",
         ]
-        read_only_fields = ("seller",)
+        read_only_fields = ("seller", "image_variants")
+
+class PropertyListSerializer(PropertySerializer):
+    """Listing-grid representation: uploaded images are replaced by their thumbnails."""
+
+    def to_representation(self, instance):
+        return use_thumbnails(super().to_representation(instance))
+
+def use_thumbnails(data):
+    """Replace serialized ``images`` by their thumbnails and drop ``image_variants``."""
+    variants = data.pop("image_variants", None) or []
+    thumbnails = {
+        largest_url(entry): thumbnail_url(entry)
+        for entry in variants if entry.get("status") == "ready"
+    }
+    if data.get("images") and thumbnails:
+        data["images"] = [thumbnails.get(url, url) for url in data["images"]]
+    return data
+
+def first_thumbnail(images, variants):
+    """The thumbnail of the first photo (the photo itself while it has none), or None."""
+    if not images:
+        return None
+    for entry in variants or []:
+        if entry.get("status") == "ready" and largest_url(entry) == images[0]:
+            return thumbnail_url(entry)
+    return images[0]
+
+# The list endpoint's default fields; ?fields= / ?expand= pick from PropertyCardSerializer.Meta.fields.
+CARD_FIELDS = ("id", "name", "location", "price", "property_type", "sell_or_rent", "image", "created_at")
+# Model columns computed fields are read from (other fields read the column of their name).
+SOURCE_COLUMNS = {
+    "seller_name": ("seller__username",),
+    "images": ("images", "image_variants"),
+    "image": ("images", "image_variants"),
+}
+
+class PropertyCardSerializer(PropertyListSerializer):
+    """
+    Compact listing-grid representation: ``CARD_FIELDS`` by default, where ``image``
+    is the thumbnail of the first photo. ``fields`` selects any subset of ``Meta.fields``.
+    """
+    image = serializers.SerializerMethodField()
+
+    class Meta(PropertyListSerializer.Meta):
+        fields = [*PropertyListSerializer.Meta.fields, "image"]
+
+    def __init__(self, *args, fields=CARD_FIELDS, **kwargs):
+        super().__init__(*args, **kwargs)
+        for name in set(self.fields) - set(fields):
+            self.fields.pop(name)
+
+    def get_image(self, instance):
+        return first_thumbnail(instance.images, instance.image_variants)
+
+def _split_fields(value):
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+def sparse_fields(params):
+    """
+    The card fields a list request asks for: exactly ``?fields=``, or ``CARD_FIELDS``
+    plus ``?expand=``. ``id`` is always included.
+    """
+    fields, expand = _split_fields(params.get("fields")), _split_fields(params.get("expand"))
+    unknown = set(fields + expand) - set(PropertyCardSerializer.Meta.fields)
+    if unknown:
+        raise serializers.ValidationError({"fields": f"Unknown fields: {', '.join(sorted(unknown))}."})
+    return tuple(dict.fromkeys(["id", *(fields or [*CARD_FIELDS, *expand])]))
+
+def card_columns(fields):
+    """The model columns ``fields`` are serialized from, for ``QuerySet.only()``."""
+    return {column for name in fields for column in SOURCE_COLUMNS.get(name, (name,))}
+
+class PropertyCardRowSerializer(RowSerializer):
+    """``PropertyCardSerializer`` for ``.values()`` rows (see config.row_serializers)."""
+    serializer_class = PropertyCardSerializer
+    method_columns = {"image": ("images", "image_variants")}
+    finishers = {PropertyListSerializer: use_thumbnails}
+
+    def get_image(self, row, prefix):
+        return first_thumbnail(row[prefix + "images"], row[prefix + "image_variants"])
+
+@lru_cache(maxsize=64)
+def card_row_serializer(fields):
+    """The (shared) row serializer for a ``sparse_fields`` tuple."""
+    return PropertyCardRowSerializer(fields=fields)
+
+def _wishlisted_ids(user, items):
+    ids = [item["id"] for item in items]
+    if not user.is_authenticated or not ids:
+        return None
+    return Wishlist.objects.filter(user=user, property_id__in=ids).values_list("property_id", flat=True)
+
+def _flag_wishlisted(items, wishlisted):
+    variant = hashlib.md5(",".join(map(str, sorted(wishlisted))).encode()).hexdigest()[:8]
+    return [{**item, "is_wishlisted": item["id"] in wishlisted} for item in items], variant
+
+def mark_wishlisted(items, user):
+    """
+    Return copies of serialized listings with ``is_wishlisted`` set for ``user``,
+    looked up in a single query, plus a short digest of the flags (for ETags).
+    """
+    query = _wishlisted_ids(user, items)
+    return _flag_wishlisted(items, set(query) if query is not None else set())
+
+async def amark_wishlisted(items, user):
+    query = _wishlisted_ids(user, items)
+    return _flag_wishlisted(items, {pk async for pk in query} if query is not None else set())
+
+class WishlistIdsSerializer(serializers.Serializer):
+    property_ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), allow_empty=False, max_length=500,
+    )
 
 class WishlistSerializer(serializers.ModelSerializer):
-    property = PropertySerializer(read_only=True)
+    property = PropertyListSerializer(read_only=True)
     
     class Meta:
         model = Wishlist
         fields = ["id", "property"]
         read_only_fields = ["user", "created_at"]
+
+class WishlistRowSerializer(RowSerializer):
+    """``WishlistSerializer`` for ``.values()`` rows."""
+    serializer_class = WishlistSerializer
+    finishers = {PropertyListSerializer: use_thumbnails}
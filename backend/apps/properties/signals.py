@@ -0,0 +1,78 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete, pre_save
+from django.dispatch import receiver
+from apps.jobs.queue import enqueue
+from .models import Property, Wishlist
+from .cache import invalidate_property
+from .counters import adjust_wishlist_counts
+from .features import FIELD_KINDS, sync_features
+from .search import FIELD_WEIGHTS, unindex_property
+from .similar import FEATURE_FIELDS
+from .stats import record_deleted, record_saved, remember_entry
+
+# Keep the keyword search index in step with listing changes (re-indexed by a background job).
+@receiver(post_save, sender=Property)
+def update_search_index(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not FIELD_WEIGHTS.keys() & update_fields):
+        return
+    enqueue("properties.index_property", instance.pk)
+
+# Mirror amenities / security features into the lookup tables the list filters use. Done
+# inline, not queued, so a listing matches the filters as soon as it is saved.
+@receiver(post_save, sender=Property)
+def update_features(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not FIELD_KINDS.keys() & set(update_fields)):
+        return
+    sync_features([instance])
+
+# Re-embed the listing for the similar-listings index when a feature it is built from changes.
+@receiver(post_save, sender=Property)
+def update_similar_vector(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or (update_fields is not None and not set(FEATURE_FIELDS) & set(update_fields)):
+        return
+    enqueue("properties.embed_properties", [instance.pk])
+
+@receiver(pre_delete, sender=Property)
+def remove_from_search_index(sender, instance, **kwargs):
+    # Postings cascade with the listing; only the vocabulary counts need fixing up.
+    unindex_property(instance)
+
+# Cached list pages and the listing's detail payload are stale after a write. Bump the
+# versions now and again on commit, so a response read before the commit that got cached
+# under the first bump is discarded as well.
+@receiver(post_save, sender=Property)
+@receiver(post_delete, sender=Property)
+def invalidate_cached_responses(sender, instance, **kwargs):
+    pk = instance.pk
+    invalidate_property(pk)
+    transaction.on_commit(lambda: invalidate_property(pk))
+
+# Fold listing changes into the precomputed statistics. The stored values are read first,
+# inside the write's transaction, so the right old entry is subtracted.
+@receiver(pre_save, sender=Property)
+def remember_stats_entry(sender, instance, raw=False, update_fields=None, **kwargs):
+    if not raw:
+        remember_entry(instance, update_fields)
+
+@receiver(pre_delete, sender=Property)
+def remember_stats_entry_on_delete(sender, instance, **kwargs):
+    remember_entry(instance)
+
+@receiver(post_save, sender=Property)
+def update_stats(sender, instance, created, raw=False, **kwargs):
+    if not raw:
+        record_saved(instance, created)
+
+@receiver(post_delete, sender=Property)
+def remove_from_stats(sender, instance, **kwargs):
+    record_deleted(instance)
+
+# Keep Property.wishlist_count in step (bulk_create in the bulk wishlist view adjusts it itself).
+@receiver(post_save, sender=Wishlist)
+def count_wishlist_added(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        adjust_wishlist_counts([instance.property_id], 1)
+
+@receiver(post_delete, sender=Wishlist)
+def count_wishlist_removed(sender, instance, **kwargs):
+    adjust_wishlist_counts([instance.property_id], -1)
@@ -0,0 +1,305 @@
+"""
+Content-based "similar listings".
+
+Every listing is embedded as one float32 vector built from blocks of features:
+log price (soft-binned around the catalogue mean), property type, sell/rent,
+furnished status, floor position and building height, amenities and security
+features (multi-hot) and the TF-IDF of its description, randomly projected down
+to ``TEXT_DIMENSIONS``. Each block is L2-normalized and scaled by the square
+root of its ``BLOCK_WEIGHTS`` entry, and the whole vector is normalized, so the
+dot product of two vectors is a weighted cosine similarity.
+
+The vocabularies, price scale and IDF table a vector depends on form a
+``SimilaritySpace``, fitted over the whole catalogue by ``rebuild`` (``manage.py
+build_similar_index``, e.g. nightly from cron). Listings saved in between are
+embedded in the current space by the ``properties.embed_properties`` job; values
+the space has not seen (a new amenity or description word) simply do not count
+until the next rebuild.
+
+Each process keeps all vectors in one NumPy matrix (``SimilarIndex``), loaded
+once and then topped up with the vectors updated since the last sync, so a
+query is a single matrix-vector product plus ``argpartition`` with no database
+scan. The matrix takes ``4 * dimensions`` bytes per listing (under 1 KB).
+Deleted listings stay in the matrix until the next rebuild or restart; the
+view over-fetches and drops them when it loads the matches.
+"""
+import math
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+from .features import labels, normalize
+from .models import Property, PropertyVector, SimilaritySpace
+from .search import tokenize
+
+# Fields the embedding is computed from; saving any of them re-embeds the listing.
+FEATURE_FIELDS = (
+    "id", "price", "property_type", "sell_or_rent", "furnished_status", "floor_number", "total_floors",
+    "amenities", "security_features", "description",
+)
+BLOCK_WEIGHTS = {
+    "price": 3.0, "type": 2.0, "listing": 2.0, "furnished": 1.0, "floors": 1.0,
+    "amenities": 1.5, "security": 1.0, "text": 2.0,
+}
+MAX_CATEGORIES = 32
+MAX_TERMS = 2048
+MIN_TERM_LISTINGS = 2
+TEXT_DIMENSIONS = 48
+PRICE_CENTERS = np.linspace(-3, 3, 13)
+FLOOR_RATIO_CENTERS = np.linspace(0, 1, 5)
+BUILDING_HEIGHT_CENTERS = np.linspace(0, math.log1p(80), 6)
+# Incremental syncs re-read this much history, so vectors committed late are not missed.
+SYNC_OVERLAP = timedelta(seconds=60)
+OVERFETCH = 10
+BATCH_SIZE = 1000
+
+def soft_bins(value, centers):
+    """Gaussian memberships of ``value`` in evenly spaced ``centers``, so nearby values overlap."""
+    width = centers[1] - centers[0]
+    return np.exp(-0.5 * ((value - centers) / width) ** 2)
+
+def top_labels(counter):
+    return sorted(label for label, _ in counter.most_common(MAX_CATEGORIES))
+
+class FeatureSpace:
+    """Turns listing rows (dicts of ``FEATURE_FIELDS``) into vectors; built from a ``SimilaritySpace``'s params."""
+
+    def __init__(self, params):
+        self.params = params
+        self.price_mean, self.price_std = params["price_mean"], params["price_std"] or 1.0
+        self.vocabularies = {
+            block: {label: i for i, label in enumerate(params[block])}
+            for block in ("type", "listing", "furnished", "amenities", "security")
+        }
+        self.terms = {term: i for i, term in enumerate(params["terms"])}
+        self.idf = np.asarray(params["idf"], dtype=np.float32)
+        rng = np.random.default_rng(params["seed"])
+        self.projection = rng.standard_normal((len(self.terms), TEXT_DIMENSIONS)).astype(np.float32)
+
+    @classmethod
+    def fit(cls, rows, seed=0):
+        """Learn vocabularies, price scale and IDF from an iterable of listing rows."""
+        counters = {block: Counter() for block in ("type", "listing", "furnished", "amenities", "security")}
+        document_frequency = Counter()
+        total = price_sum = price_squares = 0
+        for row in rows:
+            total += 1
+            log_price = math.log1p(max(float(row["price"] or 0), 0))
+            price_sum += log_price
+            price_squares += log_price ** 2
+            for block, value in cls.categories(row).items():
+                counters[block].update(value)
+            document_frequency.update(set(tokenize(row["description"])))
+        mean = price_sum / total if total else 0.0
+        std = math.sqrt(max(price_squares / total - mean ** 2, 0)) if total else 1.0
+        common = [
+            (term, df) for term, df in document_frequency.most_common(MAX_TERMS) if df >= MIN_TERM_LISTINGS
+        ]
+        common.sort()
+        params = {block: top_labels(counter) for block, counter in counters.items()}
+        params.update(
+            price_mean=mean, price_std=std, seed=seed, listings=total,
+            terms=[term for term, _ in common],
+            idf=[math.log((1 + total) / (1 + df)) + 1 for _, df in common],
+        )
+        return cls(params)
+
+    @staticmethod
+    def categories(row):
+        return {
+            "type": {label for label in [normalize(row["property_type"])] if label},
+            "listing": {label for label in [normalize(row["sell_or_rent"])] if label},
+            "furnished": {label for label in [normalize(row["furnished_status"])] if label},
+            "amenities": labels(row["amenities"]),
+            "security": labels(row["security_features"]),
+        }
+
+    @property
+    def dimensions(self):
+        categorical = sum(len(vocabulary) for vocabulary in self.vocabularies.values())
+        return len(PRICE_CENTERS) + categorical + len(FLOOR_RATIO_CENTERS) + len(BUILDING_HEIGHT_CENTERS) + TEXT_DIMENSIONS
+
+    def embed(self, row):
+        z = (math.log1p(max(float(row["price"] or 0), 0)) - self.price_mean) / self.price_std
+        blocks = [("price", soft_bins(min(max(z, -3.0), 3.0), PRICE_CENTERS))]
+        for block, values in self.categories(row).items():
+            vocabulary = self.vocabularies[block]
+            vector = np.zeros(len(vocabulary))
+            vector[[vocabulary[value] for value in values if value in vocabulary]] = 1.0
+            blocks.append((block, vector))
+        blocks.append(("floors", self.floors(row["floor_number"], row["total_floors"])))
+        blocks.append(("text", self.text(row["description"])))
+        parts = []
+        for block, vector in blocks:
+            norm = np.linalg.norm(vector)
+            parts.append(vector * (math.sqrt(BLOCK_WEIGHTS[block]) / norm) if norm else vector)
+        vector = np.concatenate(parts).astype(np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def floors(self, floor_number, total_floors):
+        ratio = np.zeros(len(FLOOR_RATIO_CENTERS))
+        height = np.zeros(len(BUILDING_HEIGHT_CENTERS))
+        if total_floors:
+            height = soft_bins(math.log1p(total_floors), BUILDING_HEIGHT_CENTERS)
+            if floor_number is not None:
+                ratio = soft_bins(min(floor_number / total_floors, 1.0), FLOOR_RATIO_CENTERS)
+        return np.concatenate([ratio, height])
+
+    def text(self, description):
+        counts = Counter(term for term in tokenize(description) if term in self.terms)
+        if not counts:
+            return np.zeros(TEXT_DIMENSIONS)
+        rows = [self.terms[term] for term in counts]
+        weights = np.log1p(np.fromiter(counts.values(), dtype=np.float32)) * self.idf[rows]
+        return weights @ self.projection[rows]
+
+def feature_rows(qs=None):
+    qs = Property.objects.all() if qs is None else qs
+    return qs.order_by().values(*FEATURE_FIELDS).iterator(chunk_size=BATCH_SIZE)
+
+def current_space():
+    """The newest ``SimilaritySpace`` as ``(id, FeatureSpace)``, or ``(None, None)`` before the first rebuild."""
+    space = SimilaritySpace.objects.order_by("-id").first()
+    return (space.pk, FeatureSpace(space.params)) if space else (None, None)
+
+def rebuild(seed=0):
+    """Fit a new space over all listings and re-embed every listing in it. Returns the listing count."""
+    space = FeatureSpace.fit(feature_rows(), seed=seed)
+    now = timezone.now()
+    with transaction.atomic():
+        # One vector per listing: replace them all, then drop the old spaces.
+        PropertyVector.objects.all().delete()
+        record = SimilaritySpace.objects.create(params=space.params)
+        batch, count = [], 0
+        for row in feature_rows():
+            batch.append(PropertyVector(
+                property_id=row["id"], space=record, vector=space.embed(row).tobytes(), updated_at=now,
+            ))
+            if len(batch) >= BATCH_SIZE:
+                PropertyVector.objects.bulk_create(batch)
+                count += len(batch)
+                batch = []
+        PropertyVector.objects.bulk_create(batch)
+        SimilaritySpace.objects.exclude(pk=record.pk).delete()
+    return count + len(batch)
+
+def embed_properties(property_ids):
+    """Embed the given listings in the current space (no-op before the first rebuild)."""
+    space_id, space = current_space()
+    if space is None:
+        return 0
+    now = timezone.now()
+    vectors = [
+        PropertyVector(property_id=row["id"], space_id=space_id, vector=space.embed(row).tobytes(), updated_at=now)
+        for row in feature_rows(Property.objects.filter(pk__in=property_ids))
+    ]
+    with transaction.atomic():
+        existing = set(
+            PropertyVector.objects.select_for_update()
+            .filter(property_id__in=[v.property_id for v in vectors]).values_list("property_id", flat=True)
+        )
+        PropertyVector.objects.bulk_update(
+            [v for v in vectors if v.property_id in existing], ["space", "vector", "updated_at"], batch_size=BATCH_SIZE,
+        )
+        PropertyVector.objects.bulk_create([v for v in vectors if v.property_id not in existing], batch_size=BATCH_SIZE)
+    return len(vectors)
+
+class SimilarIndex:
+    """This process's copy of all listing vectors, synced from ``PropertyVector`` at most every ``SIMILAR_SYNC_SECONDS``."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset(None, None)
+        self.checked_at = None
+
+    def reset(self, space_id, space):
+        self.space_id, self.space = space_id, space
+        dimensions = space.dimensions if space else 0
+        self.matrix = np.zeros((0, dimensions), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.rows = {}
+        self.size = 0
+        self.synced_until = None
+
+    def sync(self, force=False):
+        with self.lock:
+            now = time.monotonic()
+            if not force and self.checked_at is not None and now - self.checked_at < settings.SIMILAR_SYNC_SECONDS:
+                return
+            self.checked_at = now
+            space_id = SimilaritySpace.objects.order_by("-id").values_list("id", flat=True).first()
+            if space_id != self.space_id:
+                self.reset(*current_space())
+            if self.space is None:
+                return
+            started = timezone.now()
+            vectors = PropertyVector.objects.filter(space_id=self.space_id)
+            if self.synced_until is not None:
+                vectors = vectors.filter(updated_at__gte=self.synced_until - SYNC_OVERLAP)
+            for pk, vector in vectors.values_list("property_id", "vector").iterator(chunk_size=5000):
+                self.put(pk, np.frombuffer(bytes(vector), dtype=np.float32))
+            self.synced_until = started
+
+    def put(self, pk, vector):
+        if vector.shape[0] != self.matrix.shape[1]:
+            return
+        row = self.rows.get(pk)
+        if row is None:
+            if self.size == self.matrix.shape[0]:
+                # Grow by doubling, so loading n vectors copies the matrix O(log n) times.
+                capacity = max(1024, 2 * self.size)
+                matrix = np.zeros((capacity, self.matrix.shape[1]), dtype=np.float32)
+                matrix[:self.size] = self.matrix[:self.size]
+                ids = np.zeros(capacity, dtype=np.int64)
+                ids[:self.size] = self.ids[:self.size]
+                self.matrix, self.ids = matrix, ids
+            row = self.rows[pk] = self.size
+            self.ids[row] = pk
+            self.size += 1
+        self.matrix[row] = vector
+
+    def neighbours(self, pk, k):
+        """
+        The ``k`` listings nearest to listing ``pk`` as ``[(id, similarity)]``, best
+        first. A listing without a vector yet is embedded on the fly; returns None
+        when it does not exist.
+        """
+        with self.lock:
+            space, row = self.space, self.rows.get(pk)
+            if row is not None:
+                return self.nearest(self.matrix[row], k, exclude=row)
+        if space is None:
+            return [] if Property.objects.filter(pk=pk).exists() else None
+        listing = next(feature_rows(Property.objects.filter(pk=pk)), None)
+        if listing is None:
+            return None
+        query = space.embed(listing)
+        with self.lock:
+            return self.nearest(query, k) if self.space is space else []
+
+    def nearest(self, query, k, exclude=None):
+        scores = self.matrix[:self.size] @ query
+        if exclude is not None:
+            scores[exclude] = -np.inf
+        k = min(k, self.size - (exclude is not None))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(self.ids[i]), float(scores[i])) for i in top]
+
+index = SimilarIndex()
+
+def similar_properties(pk, limit):
+    """Up to ``limit`` ``(Property, similarity)`` pairs for listing ``pk``, or None if it does not exist."""
+    index.sync()
+    matches = index.neighbours(pk, limit + OVERFETCH)
+    if matches is None:
+        return None
+    found = Property.objects.select_related("seller").in_bulk([pk for pk, _ in matches])
+    return [(found[pk], score) for pk, score in matches if pk in found][:limit]
@@ -0,0 +1,245 @@
+"""
+Incrementally maintained listing statistics.
+
+Every listing contributes to four ``PropertyStats`` rows: all listings, its
+property type, sell/rent and the month it was listed. Saving or deleting a
+``Property`` adds the difference to those rows with ``F()`` updates, so reading
+the statistics is a small constant-size query instead of aggregating the whole
+table. Percentiles come from a log-scale price histogram (about 6% resolution),
+kept as one ``PropertyStatsBucket`` row per bucket.
+"""
+import math
+from collections import Counter, defaultdict
+from datetime import datetime, timezone as dt_timezone
+from decimal import Decimal
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Max, Min, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce, Greatest, Least
+from django.utils import timezone
+from .models import STATS_FIELDS, Property, PropertyStats, PropertyStatsBucket
+
+BUCKETS_PER_DECADE = 40
+PERCENTILES = (25, 50, 75, 90)
+DIMENSION_FIELDS = {"type": "property_type", "listing": "sell_or_rent"}
+
+def month_key(created_at):
+    return created_at.strftime("%Y-%m")
+
+def groups_for(entry):
+    """The (dimension, key) rows a listing with ``entry`` = Property.stats_entry() counts towards."""
+    _, property_type, sell_or_rent, created_at = entry
+    return [
+        ("all", ""),
+        ("type", property_type),
+        ("listing", sell_or_rent),
+        ("month", month_key(created_at)),
+    ]
+
+def bucket_for(price):
+    price = float(price)
+    return -1 if price < 1 else int(math.floor(BUCKETS_PER_DECADE * math.log10(price)))
+
+def bucket_value(bucket):
+    return 0.5 if bucket < 0 else 10 ** ((bucket + 0.5) / BUCKETS_PER_DECADE)
+
+def group_queryset(dimension, key):
+    qs = Property.objects.all()
+    if dimension in DIMENSION_FIELDS:
+        qs = qs.filter(**{DIMENSION_FIELDS[dimension]: key})
+    elif dimension == "month":
+        start = datetime.strptime(key, "%Y-%m").replace(tzinfo=dt_timezone.utc)
+        end = start.replace(year=start.year + start.month // 12, month=start.month % 12 + 1)
+        qs = qs.filter(created_at__gte=start, created_at__lt=end)
+    return qs
+
+def _deltas(added, removed):
+    deltas = defaultdict(lambda: {"count": 0, "sum": Decimal(0), "histogram": Counter(), "removed": set(), "added": []})
+    for sign, entries in ((1, added), (-1, removed)):
+        for entry in entries:
+            price = Decimal(entry[0])
+            for group in groups_for(entry):
+                delta = deltas[group]
+                delta["count"] += sign
+                delta["sum"] += sign * price
+                delta["histogram"][bucket_for(price)] += sign
+                if sign > 0:
+                    delta["added"].append(price)
+                else:
+                    delta["removed"].add(price)
+    return deltas
+
+def _update_or_create(rows, changes, **initial):
+    """
+    Apply ``changes`` to ``rows`` (one row) in a single UPDATE, creating it from
+    ``initial`` if it does not exist yet and ``initial`` is given.
+    """
+    if rows.update(**changes) or not initial:
+        return
+    try:
+        with transaction.atomic():
+            rows.model.objects.create(**initial)
+    except IntegrityError:
+        rows.update(**changes)  # created by a concurrent writer in between
+
+def apply_changes(added=(), removed=()):
+    """
+    Add the listings in ``added`` and subtract those in ``removed`` (both lists of
+    ``Property.stats_entry()`` tuples) from the affected statistics rows.
+
+    Each row gets an ``UPDATE ... SET count = count + n`` rather than being read and
+    written back, so concurrent listing writes never wait on one another for longer
+    than a statement, however hot the "all" and current-month rows are.
+    """
+    now = timezone.now()
+    # Rows are updated in a fixed order so concurrent writers cannot deadlock.
+    for (dimension, key), delta in sorted(_deltas(added, removed).items()):
+        rows = PropertyStats.objects.filter(dimension=dimension, key=key)
+        changes = {"count": F("count") + delta["count"], "price_sum": F("price_sum") + delta["sum"], "updated_at": now}
+        initial = {}
+        if delta["added"]:
+            lo, hi = Value(min(delta["added"])), Value(max(delta["added"]))
+            changes["price_min"] = Least(Coalesce("price_min", lo), lo)
+            changes["price_max"] = Greatest(Coalesce("price_max", hi), hi)
+            if delta["count"] > 0:
+                initial = {
+                    "dimension": dimension, "key": key, "count": delta["count"], "price_sum": delta["sum"],
+                    "price_min": lo.value, "price_max": hi.value,
+                }
+        _update_or_create(rows, changes, **initial)
+        if delta["removed"]:
+            # An extreme went away; only then is the group itself consulted, within the UPDATE.
+            prices = group_queryset(dimension, key).order_by().values("price")
+            rows.filter(Q(price_min__in=delta["removed"]) | Q(price_max__in=delta["removed"])).update(
+                price_min=Subquery(prices.order_by("price")[:1]),
+                price_max=Subquery(prices.order_by("-price")[:1]),
+            )
+            rows.filter(count=0).delete()
+        for bucket, n in sorted(delta["histogram"].items()):
+            if not n:
+                continue
+            buckets = PropertyStatsBucket.objects.filter(dimension=dimension, key=key, bucket=bucket)
+            initial = {"dimension": dimension, "key": key, "bucket": bucket, "count": n} if n > 0 else {}
+            _update_or_create(buckets, {"count": F("count") + n}, **initial)
+            if n < 0:
+                buckets.filter(count=0).delete()
+
+def remember_entry(prop, update_fields=None):
+    """
+    Signal hook before a listing is saved or deleted: set ``prop._stats_entry`` to the
+    values stored for it, read under lock inside the write's transaction (only if the
+    write touches them). An in-memory copy could be stale: another instance may have
+    saved the listing since this one was loaded.
+    """
+    prop._stats_entry = None
+    if prop.pk is None:
+        return
+    if update_fields is not None and not STATS_FIELDS & set(update_fields):
+        return
+    stored = Property.objects.select_for_update().filter(pk=prop.pk)
+    prop._stats_entry = stored.values_list("price", "property_type", "sell_or_rent", "created_at").first()
+
+def record_saved(prop, created):
+    """Signal hook: fold a created or edited listing into the statistics."""
+    old = getattr(prop, "_stats_entry", None)
+    prop._stats_entry = None
+    if created:
+        apply_changes(added=[prop.stats_entry()])
+    elif old is not None:
+        new = prop.stats_entry()
+        if old != new:
+            apply_changes(added=[new], removed=[old])
+    # Otherwise an update_fields save left the statistics fields alone.
+
+def record_deleted(prop):
+    entry = getattr(prop, "_stats_entry", None)
+    prop._stats_entry = None
+    if entry is not None:
+        apply_changes(removed=[entry])
+
+def percentile(row, histogram, p):
+    if not row.count:
+        return None
+    target, seen = row.count * p / 100, 0
+    for bucket in sorted(histogram):
+        seen += histogram[bucket]
+        if seen >= target:
+            value = Decimal(str(round(bucket_value(bucket), 2)))
+            return min(max(value, row.price_min), row.price_max)
+    return row.price_max
+
+def summarize(row, histogram):
+    summary = {
+        "count": row.count,
+        "min": row.price_min,
+        "max": row.price_max,
+        "avg": (row.price_sum / row.count).quantize(Decimal("0.01")) if row.count else None,
+    }
+    for p in PERCENTILES:
+        summary[f"p{p}"] = percentile(row, histogram, p)
+    return summary
+
+def read_stats():
+    """Return every statistics group as ``{"all": {...}, "type": {key: {...}}, ...}``."""
+    result = {"all": None, "type": {}, "listing": {}, "month": {}}
+    histograms = defaultdict(dict)
+    for dimension, key, bucket, n in PropertyStatsBucket.objects.values_list("dimension", "key", "bucket", "count"):
+        histograms[dimension, key][bucket] = n
+    for row in PropertyStats.objects.order_by("dimension", "key"):
+        summary = summarize(row, histograms[row.dimension, row.key])
+        if row.dimension == "all":
+            result["all"] = summary
+        else:
+            result[row.dimension][row.key] = summary
+    return result
+
+@transaction.atomic
+def rebuild(batch_size=2000):
+    """Recompute all statistics from the ``Property`` table. Returns the number of rows written."""
+    PropertyStats.objects.all().delete()
+    PropertyStatsBucket.objects.all().delete()
+    entries = (
+        (row["price"], row["property_type"], row["sell_or_rent"], row["created_at"])
+        for row in Property.objects.values("price", "property_type", "sell_or_rent", "created_at")
+        .iterator(chunk_size=batch_size)
+    )
+    rows, buckets = [], []
+    for (dimension, key), delta in _deltas(entries, ()).items():
+        rows.append(PropertyStats(
+            dimension=dimension, key=key, count=delta["count"], price_sum=delta["sum"],
+            price_min=min(delta["added"]), price_max=max(delta["added"]),
+        ))
+        buckets += (
+            PropertyStatsBucket(dimension=dimension, key=key, bucket=bucket, count=n)
+            for bucket, n in delta["histogram"].items()
+        )
+    PropertyStats.objects.bulk_create(rows, batch_size=batch_size)
+    PropertyStatsBucket.objects.bulk_create(buckets, batch_size=batch_size)
+    return len(rows)
+
+def _aggregates(qs):
+    row = qs.aggregate(n=Count("id"), total=Sum("price"), lo=Min("price"), hi=Max("price"))
+    return (row["n"], row["total"], row["lo"], row["hi"]) if row["n"] else None
+
+def verify():
+    """
+    Compare stored statistics with live aggregates over the ``Property`` table.
+    Returns a list of human-readable mismatches (empty when everything agrees).
+    """
+    groups = {("all", "")}
+    for dimension, field in DIMENSION_FIELDS.items():
+        groups.update((dimension, key) for key in Property.objects.values_list(field, flat=True).distinct())
+    groups.update(
+        ("month", month_key(created_at))
+        for created_at in Property.objects.values_list("created_at", flat=True).iterator(chunk_size=5000)
+    )
+    stored = {(row.dimension, row.key): row for row in PropertyStats.objects.all()}
+    groups.update(stored)
+
+    problems = []
+    for group in sorted(groups):
+        expected = _aggregates(group_queryset(*group))
+        row = stored.get(group)
+        actual = (row.count, row.price_sum, row.price_min, row.price_max) if row else None
+        if expected != actual:
+            problems.append(f"{group[0]}:{group[1]} stored={actual} live={expected}")
+    return problems
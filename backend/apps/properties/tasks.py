@@ -0,0 +1,23 @@
+from apps.jobs.queue import PRIORITY_HIGH, PRIORITY_LOW, task
+from .images import process_image
+from .models import Property
+from .search import index_property
+from .similar import embed_properties
+from .trending import refresh
+
+@task("properties.index_property")
+def index_property_job(property_id):
+    # Lock the listing so two queued re-indexes of it cannot interleave their posting diffs.
+    prop = Property.objects.select_for_update().filter(pk=property_id).first()
+    if prop is not None:
+        index_property(prop)
+
+# Sellers are waiting on their thumbnails, so renders go ahead of other work.
+task("properties.process_image", priority=PRIORITY_HIGH)(process_image)
+
+# Rebuilds the trending feed; queued by the feed once stale, or run from cron. A failed
+# run is not retried, the next stale request queues a fresh one.
+task("properties.refresh_trending", priority=PRIORITY_LOW, max_attempts=1)(refresh)
+
+# Embeds saved or imported listings for the similar-listings index.
+task("properties.embed_properties", priority=PRIORITY_LOW)(embed_properties)
@@ -0,0 +1,900 @@
+import asyncio
+import io
+import json
+from contextlib import ExitStack
+from datetime import timedelta
+from decimal import Decimal
+from unittest import mock
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.files.storage import storages
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import F
+from django.http import QueryDict
+from django.test import AsyncClient, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from PIL import Image
+from rest_framework.exceptions import ValidationError
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient, APIRequestFactory, force_authenticate
+from rest_framework_simplejwt.tokens import AccessToken
+from apps.chats.models import ChatRoom
+from apps.jobs.models import Job
+from config.testing import ApiTestCase, QueryCountTestCase, call_async_view
+from . import async_views
+from .cache import get_stats
+from .bulk import export_rows, import_rows, insert_properties
+from .filters import geo_search, parse_geo_query
+from .images import process_image, thumbnail_url
+from .geo import covering_cells, encode_geohash, haversine_km
+from .counters import flush_view_counts, reconcile_wishlist_counts, view_buffer
+from .models import (
+    ListingFeature, Property, PropertyFeature, PropertyStats, PropertyStatsBucket, PropertyViewBucket, SearchTerm,
+    TrendingListing, Wishlist,
+)
+from .search import index_property, search, unindex_property
+from .serializers import CARD_FIELDS, PropertyCardSerializer, WishlistSerializer
+from .similar import embed_properties, index, rebuild
+from . import stats
+from .trending import CHECK_KEY, pending_refreshes, refresh, schedule_refresh
+from .views import PropertyDetailView, PropertyListCreateView
+
+class PropertyListTests(ApiTestCase):
+    def walk(self, query):
+        """Follow ``next`` from the first page; returns the ids of every page in order."""
+        ids, url = [], f"/api/properties/?page_size=2&{query}"
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200, response.content)
+            ids += [card["id"] for card in response.json()["results"]]
+            url = response.json()["next"]
+        return ids
+
+    def test_every_ordering_pages_without_gaps_or_duplicates(self):
+        seller = self.make_seller()
+        for price in ("300.00", "100.00", "200.00", "100.00", "300.00", "200.00", "100.00"):
+            self.make_property(seller, price=price)
+        rows = list(Property.objects.values_list("id", "price", "created_at"))
+        by_price = [pk for pk, *_ in sorted(rows, key=lambda row: (row[1], row[0]))]
+        by_date = [pk for pk, *_ in sorted(rows, key=lambda row: (row[2], row[0]))]
+        expected = {
+            "price": by_price, "-price": by_price[::-1], "created_at": by_date, "-created_at": by_date[::-1],
+        }
+        for ordering, ids in expected.items():
+            self.assertEqual(self.walk(f"ordering={ordering}"), ids, ordering)
+
+    def test_filters_combine(self):
+        seller = self.make_seller()
+        match = self.make_property(seller, location="Baner, Pune", property_type="villa", price="150.00")
+        self.make_property(seller, location="Pune", property_type="villa", price="900.00")
+        self.make_property(seller, location="Pune", property_type="villa", price="50.00")
+        self.make_property(seller, location="Pune", property_type="apartment", price="150.00")
+        self.make_property(seller, location="Chennai", property_type="villa", price="150.00")
+        query = "location=pune&property_type=Villa&min_price=100&max_price=200"
+        self.assertEqual(self.walk(query), [match.pk])
+
+    def test_invalid_parameters(self):
+        for _ in range(2):
+            self.make_property(self.make_seller())
+        self.assertEqual(self.client.get("/api/properties/?cursor=not-a-cursor").status_code, 404)
+        next_url = self.client.get("/api/properties/?page_size=1&ordering=price").json()["next"]
+        self.assertEqual(self.client.get(next_url).status_code, 200)
+        # A cursor only holds for the ordering it was issued for.
+        self.assertEqual(self.client.get(next_url.replace("ordering=price", "ordering=-price")).status_code, 404)
+        response = self.client.get("/api/properties/?min_price=cheap")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("min_price", response.json())
+
+class PropertyQueryCountTests(QueryCountTestCase):
+    def add_properties(self, n, seller=None):
+        for _ in range(n):
+            self.make_property(seller or self.make_seller())
+
+    def test_property_list(self):
+        self.assertConstantQueries("/api/properties/", self.add_properties)
+
+    def test_user_properties(self):
+        self.assertConstantQueries(
+            "/api/properties/user/", lambda n: self.add_properties(n, seller=self.user)
+        )
+
+    def test_wishlist(self):
+        def populate(n):
+            for _ in range(n):
+                Wishlist.objects.create(user=self.user, property=self.make_property(self.make_seller()))
+        self.assertConstantQueries("/api/properties/wishlist/", populate)
+
+    def test_property_detail(self):
+        prop = self.make_property(self.make_seller())
+        self.assertLessEqual(self.count_queries(f"/api/properties/{prop.pk}/"), 1)
+
+class WishlistTests(ApiTestCase):
+    def test_bulk_add_ids_and_flags(self):
+        props = [self.make_property(self.make_seller()) for _ in range(3)]
+        response = self.client.post(
+            "/api/properties/wishlist/bulk/add/", {"property_ids": [props[0].id, props[1].id, 9999]}, format="json",
+        )
+        self.assertEqual(response.json(), {"added": [props[0].id, props[1].id], "missing": [9999]})
+        self.client.post("/api/properties/wishlist/bulk/add/", {"property_ids": [props[0].id]}, format="json")
+        self.assertEqual(sorted(self.client.get("/api/properties/wishlist/ids/").json()["ids"]), [props[0].id, props[1].id])
+
+        flags = {p["id"]: p["is_wishlisted"] for p in self.client.get("/api/properties/").json()["results"]}
+        self.assertEqual(flags, {props[0].id: True, props[1].id: True, props[2].id: False})
+
+        response = self.client.post("/api/properties/wishlist/bulk/remove/", {"property_ids": [props[0].id]}, format="json")
+        self.assertEqual(response.json(), {"removed": 1})
+        flags = {p["id"]: p["is_wishlisted"] for p in self.client.get("/api/properties/").json()["results"]}
+        self.assertFalse(flags[props[0].id])
+
+    def test_duplicate_add_is_rejected(self):
+        prop = self.make_property(self.make_seller())
+        self.assertEqual(self.client.post("/api/properties/wishlist/add/", {"property": prop.id}).status_code, 201)
+        self.assertEqual(self.client.post("/api/properties/wishlist/add/", {"property": prop.id}).status_code, 400)
+
+class AsyncViewTests(ApiTestCase):
+    """The async read views must answer exactly like the DRF views they stand in for."""
+
+    def assertSameAsSync(self, url, async_view, view, **kwargs):
+        response = call_async_view(async_view, url, self.user, **kwargs)
+        cache.clear()
+        request = APIRequestFactory().get(url)
+        force_authenticate(request, self.user)
+        expected = view.as_view()(request, **kwargs).render()
+        self.assertEqual(response.status_code, expected.status_code)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_matches_sync_views(self):
+        props = [self.make_property(self.make_seller()) for _ in range(3)]
+        Wishlist.objects.create(user=self.user, property=props[0])
+        self.assertSameAsSync("/api/properties/?page_size=2", async_views.property_list_create, PropertyListCreateView)
+        self.assertSameAsSync(
+            f"/api/properties/{props[0].pk}/", async_views.property_detail, PropertyDetailView, pk=props[0].pk,
+        )
+        self.assertSameAsSync("/api/properties/999999/", async_views.property_detail, PropertyDetailView, pk=999999)
+
+    def test_cache_is_not_called_on_the_event_loop(self):
+        prop = self.make_property(self.make_seller())
+        calls = []
+
+        def off_loop(name):
+            real = getattr(LocMemCache, name)
+
+            def method(cache_self, *args, **kwargs):
+                try:
+                    asyncio.get_running_loop()
+                    calls.append(name)
+                except RuntimeError:
+                    pass
+                return real(cache_self, *args, **kwargs)
+            return mock.patch.object(LocMemCache, name, method)
+
+        headers = {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        with ExitStack() as stack:
+            for name in ("get", "get_many", "set", "add", "incr"):
+                stack.enter_context(off_loop(name))
+            for _ in range(2):  # a miss, then a hit
+                call_async_view(async_views.property_list_create, "/api/properties/", headers=headers)
+                call_async_view(async_views.property_detail, f"/api/properties/{prop.pk}/", headers=headers, pk=prop.pk)
+        self.assertEqual(calls, [])
+
+class CounterTests(ApiTestCase):
+    def test_wishlist_count(self):
+        props = [self.make_property(self.make_seller()) for _ in range(2)]
+        self.client.post("/api/properties/wishlist/add/", {"property": props[0].id})
+        self.client.post("/api/properties/wishlist/bulk/add/", {"property_ids": [p.id for p in props]}, format="json")
+        other = APIClient()
+        other.force_authenticate(self.make_seller())
+        other.post("/api/properties/wishlist/add/", {"property": props[0].id})
+        self.assertEqual([p.wishlist_count for p in Property.objects.order_by("id")], [2, 1])
+
+        self.client.post("/api/properties/wishlist/bulk/remove/", {"property_ids": [p.id for p in props]}, format="json")
+        self.assertEqual([p.wishlist_count for p in Property.objects.order_by("id")], [1, 0])
+        ordered = self.client.get("/api/properties/?ordering=-wishlist_count&expand=wishlist_count").json()["results"]
+        self.assertEqual([p["wishlist_count"] for p in ordered], [1, 0])
+
+    def test_views_are_buffered(self):
+        prop = self.make_property(self.make_seller())
+        view_buffer.take()
+        for _ in range(3):
+            self.client.get(f"/api/properties/{prop.id}/")
+        prop.refresh_from_db()
+        self.assertEqual(prop.view_count, 0)
+        flush_view_counts(view_buffer.take())
+        prop.refresh_from_db()
+        self.assertEqual(prop.view_count, 3)
+
+    def test_exit_flush_skips_a_torn_down_database(self):
+        prop = self.make_property(self.make_seller())
+        view_buffer.record(prop.id)
+        with mock.patch("apps.properties.counters.current_database", return_value="realestate_db"), \
+                mock.patch("apps.properties.counters.queue_flush") as queued:
+            view_buffer.flush()
+        queued.assert_not_called()
+        view_buffer.record(prop.id)
+        with mock.patch("apps.properties.counters.queue_flush") as queued:
+            view_buffer.flush()
+        queued.assert_called_once_with({str(prop.id): 1})
+
+    def test_reconcile_fixes_drift(self):
+        prop = self.make_property(self.make_seller())
+        Wishlist.objects.bulk_create([Wishlist(user=self.user, property=prop)])
+        self.assertEqual(reconcile_wishlist_counts(), [(prop.id, 0, 1)])
+        self.assertEqual(reconcile_wishlist_counts(fix=False), [])
+
+    def test_concurrent_bulk_add_counts_once(self):
+        prop = self.make_property(self.make_seller())
+        real_bulk_create = Wishlist.objects.bulk_create
+
+        def bulk_create_after_concurrent_add(objs, *args, **kwargs):
+            # Another request for the same user and listing inserts its row first.
+            real_bulk_create([Wishlist(user=self.user, property=prop)])
+            Property.objects.filter(pk=prop.pk).update(wishlist_count=F("wishlist_count") + 1)
+            return real_bulk_create(objs, *args, **kwargs)
+
+        with mock.patch.object(Wishlist.objects, "bulk_create", bulk_create_after_concurrent_add):
+            response = self.client.post("/api/properties/wishlist/bulk/add/", {"property_ids": [prop.id]}, format="json")
+        self.assertEqual(response.status_code, 200)
+        prop.refresh_from_db()
+        self.assertEqual(prop.wishlist_count, 1)
+
+class TrendingTests(ApiTestCase):
+    def test_scores_rank_and_feed(self):
+        wished, chatted, viewed, stale = [self.make_property(self.make_seller()) for _ in range(4)]
+        Property.objects.filter(pk=viewed.pk).update(property_type="villa")
+        Wishlist.objects.create(user=self.user, property=wished)
+        ChatRoom.objects.create(property=chatted, seller=chatted.seller, buyer=self.user)
+        flush_view_counts({str(viewed.id): 10})
+        old = Wishlist.objects.create(user=self.make_seller(), property=stale)
+        Wishlist.objects.filter(pk=old.pk).update(created_at=timezone.now() - timedelta(days=30))
+
+        self.assertEqual(refresh(), 3)
+        page = self.client.get("/api/properties/trending/?page_size=2").json()
+        self.assertEqual([p["id"] for p in page["results"]], [chatted.id, wished.id])
+        self.assertEqual([p["is_wishlisted"] for p in page["results"]], [False, True])
+        self.assertAlmostEqual(page["results"][0]["trending_score"], 5, places=2)
+        rest = self.client.get(page["next"]).json()
+        self.assertEqual([p["id"] for p in rest["results"]], [viewed.id])
+        self.assertIsNone(rest["next"])
+
+        villas = self.client.get("/api/properties/trending/?property_type=Villa").json()["results"]
+        self.assertEqual([p["id"] for p in villas], [viewed.id])
+
+    def test_older_activity_decays(self):
+        recent, older = [self.make_property(self.make_seller()) for _ in range(2)]
+        Wishlist.objects.create(user=self.user, property=recent)
+        entry = Wishlist.objects.create(user=self.user, property=older)
+        Wishlist.objects.filter(pk=entry.pk).update(created_at=timezone.now() - timedelta(hours=48))
+        PropertyViewBucket.objects.create(property=older, hour=timezone.now() - timedelta(days=10), views=5)
+        refresh()
+        scores = {p["id"]: p["trending_score"] for p in self.client.get("/api/properties/trending/").json()["results"]}
+        self.assertAlmostEqual(scores[older.id] * 2, scores[recent.id], places=2)
+        self.assertFalse(PropertyViewBucket.objects.exists())
+
+    def test_staleness_is_read_from_the_database(self):
+        Wishlist.objects.create(user=self.user, property=self.make_property(self.make_seller()))
+        self.assertTrue(schedule_refresh())
+        self.assertFalse(schedule_refresh())  # already queued, whichever process asks
+        pending_refreshes().update(status="running")
+        self.assertFalse(schedule_refresh())
+        pending_refreshes().delete()
+        refresh()
+        self.assertFalse(schedule_refresh())
+        TrendingListing.objects.update(computed_at=timezone.now() - timedelta(hours=1))
+        self.assertTrue(schedule_refresh())
+
+    def test_feed_checks_staleness_once_per_interval(self):
+        caches["shared"].delete(CHECK_KEY)
+        Wishlist.objects.create(user=self.user, property=self.make_property(self.make_seller()))
+        self.assertEqual(self.client.get("/api/properties/trending/").status_code, 200)
+        self.assertEqual(pending_refreshes().count(), 1)
+        pending_refreshes().delete()
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/properties/trending/")
+        self.assertFalse(any("jobs_job" in query["sql"] for query in ctx.captured_queries))
+
+    def test_empty_feed_defers_the_next_refresh(self):
+        self.assertEqual(refresh(), 0)
+        job = pending_refreshes().get()
+        self.assertGreater(job.run_after, timezone.now() + timedelta(minutes=5))
+        self.assertFalse(schedule_refresh())
+        refresh()
+        self.assertEqual(pending_refreshes().count(), 1)
+
+class SimilarTests(QueryCountTestCase):
+    def listing(self, **fields):
+        prop = self.make_property(self.make_seller())
+        Property.objects.filter(pk=prop.pk).update(**fields)
+        return prop
+
+    def similar(self, prop):
+        index.checked_at = None  # sync on the next request
+        response = self.client.get(f"/api/properties/{prop.id}/similar/")
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()["results"]
+
+    def test_nearest_listings_first(self):
+        base = self.listing(description="sea view flat with balcony", amenities=["Gym", "Pool"])
+        twin = self.listing(description="balcony flat facing the sea", amenities=["pool", "gym"])
+        villa = self.listing(price="90000000.00", property_type="villa", description="farm villa", amenities=[])
+        rental = self.listing(sell_or_rent="rent", description="sea view flat", amenities=["gym"])
+        self.assertEqual(rebuild(), 4)
+        results = self.similar(base)
+        self.assertEqual([p["id"] for p in results], [twin.id, rental.id, villa.id])
+        self.assertGreater(results[0]["similarity"], results[1]["similarity"])
+        self.assertEqual(self.client.get("/api/properties/999999/similar/").status_code, 404)
+
+        # Listings saved after the rebuild are embedded incrementally and picked up on sync.
+        Property.objects.filter(pk=villa.pk).update(
+            price="2500000.00", property_type="apartment", description="sea view flat with balcony",
+            amenities=["gym", "pool"],
+        )
+        embed_properties([villa.pk])
+        self.assertEqual(self.similar(base)[0]["id"], villa.id)
+        villa.delete()
+        self.assertEqual([p["id"] for p in self.similar(base)], [twin.id, rental.id])
+
+    def test_constant_queries(self):
+        base = self.listing()
+        def populate(n):
+            for _ in range(n):
+                self.listing()
+            rebuild()
+            index.checked_at = None
+        self.assertConstantQueries(f"/api/properties/{base.id}/similar/", populate)
+
+class FeatureFilterTests(ApiTestCase):
+    def ids(self, query):
+        response = self.client.get(f"/api/properties/?{query}")
+        self.assertEqual(response.status_code, 200, response.content)
+        return sorted(p["id"] for p in response.json()["results"])
+
+    def test_all_and_any_filters(self):
+        seller = self.make_seller()
+        gym = Property.objects.create(
+            seller=seller, name="Gym", location="Chennai", description="flat", price="100.00",
+            property_type="apartment", amenities=["Parking", "Gym"], security_features=["CCTV"],
+        )
+        pool = Property.objects.create(
+            seller=seller, name="Pool", location="Chennai", description="flat", price="100.00",
+            property_type="apartment", amenities='["parking", "pool"]',  # as stored from multipart posts
+        )
+        self.assertEqual(self.ids("amenities=parking,gym"), [gym.id])
+        self.assertEqual(self.ids("amenities=Parking"), [gym.id, pool.id])
+        self.assertEqual(self.ids("amenities_any=gym,pool"), [gym.id, pool.id])
+        self.assertEqual(self.ids("amenities_any=pool&security_features=cctv"), [])
+        self.assertEqual(self.ids("security_features_any=cctv,guard"), [gym.id])
+        self.assertEqual(self.ids("amenities=sauna"), [])
+
+        pool.amenities = ["pool"]
+        pool.save(update_fields=["amenities"])
+        self.assertEqual(self.ids("amenities=parking"), [gym.id])
+        self.assertEqual(self.client.get(f"/api/properties/{pool.id}/").json()["amenities"], ["pool"])
+
+    def test_names_the_database_folds_together(self):
+        # A collation that treats "café" as "cafe" ignores the insert and returns the other spelling.
+        cafe = ListingFeature.objects.create(kind="amenity", name="cafe")
+        parking = ListingFeature.objects.create(kind="amenity", name="parking")
+        real_filter = ListingFeature.objects.filter
+
+        def accent_insensitive_filter(*args, **kwargs):
+            if "name" in kwargs:
+                kwargs["name"] = kwargs["name"].replace("\u00e9", "e")
+            return real_filter(*args, **kwargs)
+
+        with mock.patch.object(ListingFeature.objects, "bulk_create"), \
+                mock.patch.object(ListingFeature.objects, "filter", accent_insensitive_filter):
+            prop = self.make_property(self.make_seller(), amenities=["Café", "Parking"])
+        linked = PropertyFeature.objects.filter(property=prop).values_list("feature_id", flat=True)
+        self.assertEqual(sorted(linked), [cafe.pk, parking.pk])
+
+    def test_bulk_insert_links_features(self):
+        seller = self.make_seller()
+        insert_properties([
+            Property(seller=seller, name=f"Bulk {n}", location="Pune", description="flat", price="100.00",
+                     property_type="apartment", amenities=["lift"] * n)
+            for n in range(3)
+        ], seller)
+        self.assertEqual(PropertyFeature.objects.filter(feature__name="lift").count(), 2)
+        self.assertEqual(len(self.ids("amenities=lift")), 2)
+
+class SparseFieldsetTests(ApiTestCase):
+    def test_compact_default_and_field_selection(self):
+        prop = self.make_property(self.make_seller())
+        Property.objects.filter(pk=prop.pk).update(images=["https://img.example/a.jpg", "https://img.example/b.jpg"])
+        card = self.client.get("/api/properties/").json()["results"][0]
+        self.assertEqual(
+            set(card), {"id", "name", "location", "price", "property_type", "sell_or_rent", "image", "created_at", "is_wishlisted"},
+        )
+        self.assertEqual(card["image"], "https://img.example/a.jpg")
+
+        expanded = self.client.get("/api/properties/?expand=description,seller_name").json()["results"][0]
+        self.assertEqual((expanded["description"], expanded["seller_name"]), ("Two bedroom flat", "seller1"))
+        picked = self.client.get("/api/properties/?fields=price,amenities").json()["results"][0]
+        self.assertEqual(set(picked), {"id", "price", "amenities", "is_wishlisted"})
+        self.assertEqual(self.client.get("/api/properties/?fields=price,secret").status_code, 400)
+
+    def test_loads_only_needed_columns(self):
+        self.make_property(self.make_seller())
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get("/api/properties/?fields=name")
+        listing_query = next(q["sql"] for q in ctx.captured_queries if "properties_property" in q["sql"])
+        self.assertNotIn("description", listing_query)
+        self.assertNotIn("auth_user", listing_query)
+
+class RowSerializerTests(ApiTestCase):
+    """The .values() fast paths must render exactly the bytes of the DRF serializers they replace."""
+
+    def setUp(self):
+        super().setUp()
+        self.add_rooms(2)
+        ChatRoom.objects.create(property=self.make_property(self.make_seller()), seller=self.user, buyer=self.make_seller())
+        varied = Property.objects.order_by("id").first()
+        varied.name, varied.price, varied.latitude, varied.longitude = "Caf\u00e9 \u2028 \"loft\"", "99.50", "13.0827", "80.2707"
+        varied.images = ["https://img.example/a.jpg", "https://img.example/b.jpg"]
+        varied.image_variants = [{"status": "ready", "sizes": {
+            "1600": {"jpeg": "https://img.example/a.jpg", "webp": "https://img.example/a.webp"},
+            "320": {"jpeg": "https://img.example/a-320.jpg", "webp": "https://img.example/a-320.webp"},
+        }}]
+        varied.save()
+        for prop in Property.objects.all()[:3]:
+            Wishlist.objects.create(user=self.user, property=prop)
+
+    def assertSameBytes(self, url, expected):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        self.assertEqual(response.content, JSONRenderer().render(expected))
+
+    def cards(self, fields=CARD_FIELDS):
+        data = PropertyCardSerializer(Property.objects.order_by("-created_at", "-id"), many=True, fields=fields).data
+        flags = set(Wishlist.objects.filter(user=self.user).values_list("property_id", flat=True))
+        return {"next": None, "results": [{**card, "is_wishlisted": card["id"] in flags} for card in data]}
+
+    def test_property_cards(self):
+        self.assertSameBytes("/api/properties/", self.cards())
+        self.assertSameBytes(
+            "/api/properties/?expand=description,seller_name,images,amenities",
+            self.cards((*CARD_FIELDS, "description", "seller_name", "images", "amenities")),
+        )
+        self.assertSameBytes("/api/properties/?fields=price,latitude,created_at", self.cards(("id", "price", "latitude", "created_at")))
+
+    def test_wishlist(self):
+        expected = WishlistSerializer(Wishlist.objects.filter(user=self.user).select_related("property__seller"), many=True).data
+        self.assertSameBytes("/api/properties/wishlist/", expected)
+
+class GeoSearchTests(ApiTestCase):
+    # Chennai Central, Adyar (~8 km), Tambaram (~25 km) and Bangalore (~290 km)
+    PLACES = {"central": (13.0827, 80.2707), "adyar": (13.0012, 80.2565), "tambaram": (12.9249, 80.1000), "bangalore": (12.9716, 77.5946)}
+
+    def setUp(self):
+        super().setUp()
+        seller = self.make_seller()
+        self.props = {
+            name: self.make_property(seller, name=name, latitude=str(lat), longitude=str(lng))
+            for name, (lat, lng) in self.PLACES.items()
+        }
+
+    def parse(self, query):
+        return parse_geo_query(QueryDict(query))
+
+    def assertInvalid(self, query, key):
+        with self.assertRaises(ValidationError) as ctx:
+            self.parse(query)
+        self.assertIn(key, ctx.exception.detail)
+
+    def test_parse_queries(self):
+        self.assertIsNone(self.parse("location=Chennai"))
+        bbox, center, radius = self.parse("bbox=80,12.9,80.3,13.1")
+        self.assertEqual((bbox, center, radius), ((12.9, 80.0, 13.1, 80.3), (13.0, 80.15), None))
+        bbox, center, radius = self.parse("lat=13.08&lng=80.27&radius_km=10")
+        self.assertEqual((center, radius), ((13.08, 80.27), 10))
+        self.assertAlmostEqual(bbox[2] - bbox[0], 2 * 10 / 111.19, places=3)
+
+    def test_invalid_queries(self):
+        self.assertInvalid("lat=1&lng=2", "radius_km")
+        self.assertInvalid("lat=1&radius_km=5", "lng")
+        self.assertInvalid("lat=north&lng=2&radius_km=5", "lat")
+        self.assertInvalid("lat=91&lng=2&radius_km=5", "detail")
+        self.assertInvalid("lat=1&lng=2&radius_km=501", "radius_km")
+        self.assertInvalid("lat=1&lng=2&radius_km=0", "radius_km")
+        self.assertInvalid("bbox=1,2,3", "bbox")
+        self.assertInvalid("bbox=80,13.1,80.3,12.9", "bbox")
+        self.assertInvalid("bbox=-181,0,0,10", "bbox")
+        self.assertEqual(self.client.get("/api/properties/?lat=1&lng=2").status_code, 400)
+
+    def test_covering_cells(self):
+        bbox = (12.9, 80.0, 13.1, 80.3)
+        cells = covering_cells(bbox)
+        self.assertLessEqual(len(cells), 32)
+        self.assertEqual(len({len(cell) for cell in cells}), 1)
+        for lat, lng in ((12.9, 80.0), (13.0, 80.15), (13.1, 80.3)):
+            self.assertTrue(any(encode_geohash(lat, lng).startswith(cell) for cell in cells), (lat, lng))
+        self.assertEqual(covering_cells((-90, -180, 90, 180)), set("0123456789bcdefghjkmnpqrstuvwxyz"))
+
+    def test_radius_search(self):
+        results = self.client.get("/api/properties/?lat=13.0827&lng=80.2707&radius_km=30").json()["results"]
+        self.assertEqual([p["name"] for p in results], ["central", "adyar", "tambaram"])
+        adyar = haversine_km(*self.PLACES["central"], *self.PLACES["adyar"])
+        self.assertAlmostEqual(results[1]["distance_km"], adyar, places=2)
+        self.assertEqual(self.client.get("/api/properties/?lat=13.0827&lng=80.2707&radius_km=5").json()["results"][0]["name"], "central")
+
+    def test_bbox_search(self):
+        results = self.client.get("/api/properties/?bbox=80.0,12.9,80.3,13.1").json()["results"]
+        self.assertEqual({p["name"] for p in results}, {"central", "adyar", "tambaram"})
+
+    def test_moved_listings_are_geocoded_again(self):
+        prop = self.make_property(self.user, location="Chennai")
+        self.assertEqual((prop.latitude, prop.longitude), (Decimal("13.082700"), Decimal("80.270700")))
+        self.assertEqual(self.client.patch(f"/api/properties/{prop.pk}/", {"location": "Pune"}).status_code, 200)
+        prop.refresh_from_db()
+        self.assertEqual((prop.latitude, prop.longitude), (Decimal("18.520400"), Decimal("73.856700")))
+        self.assertEqual(prop.geohash, encode_geohash(prop.latitude, prop.longitude))
+        moved = {"location": "Mumbai", "latitude": "19.1", "longitude": "72.9"}
+        self.assertEqual(self.client.patch(f"/api/properties/{prop.pk}/", moved).status_code, 200)
+        prop.refresh_from_db()
+        self.assertEqual((prop.latitude, prop.longitude), (Decimal("19.1"), Decimal("72.9")))
+        prop.location = "Somewhere off the map"
+        prop.save(update_fields=["location"])
+        prop.refresh_from_db()
+        self.assertEqual((prop.latitude, prop.longitude, prop.geohash), (None, None, None))
+
+    def test_candidates_are_bounded(self):
+        query = self.parse("lat=13.0827&lng=80.2707&radius_km=500")
+        with CaptureQueriesContext(connection) as ctx:
+            matches = geo_search(Property.objects.all(), query, 2)
+        self.assertEqual([prop.name for prop, _ in matches], ["central", "adyar"])
+        self.assertIn("LIMIT 8", ctx.captured_queries[-1]["sql"])
+
+class ImportExportTests(ApiTestCase):
+    CSV = (
+        "name,location,description,price,property_type,amenities\n"
+        'Flat A,Chennai,Two bedroom flat,100.00,apartment,"[""gym""]"\n'
+        "Flat B,Chennai,Two bedroom flat,not-a-price,apartment,\n"
+        "Flat C,Pune,Studio,200.00,apartment,\n"
+    )
+
+    def upload(self, content, name="listings.csv"):
+        return self.client.post("/api/properties/import/", {"file": SimpleUploadedFile(name, content)}, format="multipart")
+
+    def test_csv_import_reports_invalid_rows(self):
+        response = self.upload(("\ufeff" + self.CSV).encode())
+        self.assertEqual(response.status_code, 200, response.content)
+        report = response.json()
+        self.assertEqual((report["created"], report["failed"]), (2, 1))
+        self.assertEqual((report["errors"][0]["row"], list(report["errors"][0]["errors"])), (2, ["price"]))
+        self.assertEqual(list(Property.objects.filter(seller=self.user).order_by("name").values_list("name", "amenities")),
+                         [("Flat A", ["gym"]), ("Flat C", None)])
+        self.assertEqual(self.client.get("/api/properties/?amenities=gym").json()["results"][0]["name"], "Flat A")
+
+    def test_jsonl_import(self):
+        lines = b'{"name": "Flat A", "location": "Goa", "description": "x", "price": "1.00", "property_type": "villa"}\n[1]\n\n'
+        report = self.upload(lines, "listings.jsonl").json()
+        self.assertEqual((report["created"], report["failed"]), (1, 1))
+        self.assertEqual(report["errors"][0]["errors"], {"detail": ["Row is not a JSON object."]})
+
+    def test_unreadable_files_are_rejected(self):
+        not_utf8 = "Flat D,M\u00fcnchen,x,1.00,villa,\n".encode("latin-1")
+        oversized_field = b'Flat D,Pune,"' + b"x" * 200_000 + b'",1.00,villa,\n'
+        for content in (self.CSV.encode() + not_utf8, self.CSV.encode() + oversized_field):
+            Property.objects.all().delete()
+            response = self.upload(content)
+            self.assertEqual(response.status_code, 400, response.content)
+            self.assertEqual(response.json()["created"], 2)
+            self.assertIn("import stopped", response.json()["detail"])
+            self.assertEqual(Property.objects.filter(seller=self.user).count(), 2)
+        self.assertEqual(self.upload(b"x", "listings.xlsx").status_code, 400)
+        report = self.upload(self.CSV.encode() + b"Flat D,Pu\x00ne,x,1.00,villa,\n").json()
+        self.assertEqual(report["errors"][-1], {"row": 4, "errors": {"location": ["Null characters are not allowed."]}})
+
+    def test_export_round_trips(self):
+        self.upload(self.CSV.encode())
+        response = self.client.get("/api/properties/export/?file_format=jsonl")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([(row["name"], row["price"]) for row in rows], [("Flat A", "100.00"), ("Flat C", "200.00")])
+        csv_lines = b"".join(self.client.get("/api/properties/export/").streaming_content).decode().splitlines()
+        self.assertEqual(len(csv_lines), 3)
+        self.assertTrue(csv_lines[0].startswith("id,seller,name"))
+
+    def test_export_reads_rows_in_key_batches(self):
+        self.upload(self.CSV.encode())
+        self.make_property(self.user, name="Flat E")
+        with CaptureQueriesContext(connection) as queries:
+            rows = [json.loads(line) for line in export_rows(Property.objects.all(), "jsonl", chunk_size=2)]
+        self.assertEqual([row["name"] for row in rows], ["Flat A", "Flat C", "Flat E"])
+        self.assertEqual(len(queries), 2)
+
+    def test_rows_without_returned_keys_are_matched_exactly(self):
+        # As on MySQL: ids are reloaded, and another listing saved meanwhile must not be taken for an imported one.
+        real_bulk_create = Property.objects.bulk_create
+
+        def bulk_create_with_concurrent_save(objs, *args, **kwargs):
+            created = real_bulk_create(objs, *args, **kwargs)
+            self.make_property(self.user, name="Saved meanwhile")
+            for obj in created:
+                obj.pk = None
+            return created
+
+        with mock.patch.object(type(connection.features), "can_return_rows_from_bulk_insert", False), \
+                mock.patch.object(Property.objects, "bulk_create", bulk_create_with_concurrent_save), \
+                mock.patch("apps.properties.bulk.index_new_properties") as indexed:
+            report = import_rows([{"name": "Flat A", "location": "Goa", "description": "x", "price": "1.00", "property_type": "villa"}], self.user)
+        self.assertEqual(report["created"], 1)
+        self.assertEqual([prop.name for prop in indexed.call_args.args[0]], ["Flat A"])
+
+class StatsTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.seller = self.make_seller()
+
+    def test_writes_keep_stats_in_step(self):
+        flat = self.make_property(self.seller, price="1000000.00")
+        self.make_property(self.seller, price="3000000.00")
+        villa = self.make_property(self.seller, price="9000000.00", property_type="villa")
+        flat.price = "2000000.00"
+        flat.save()
+        villa.property_type = "apartment"
+        villa.save()
+        self.make_property(self.seller, price="500000.00", property_type="plot").delete()
+        self.assertEqual(stats.verify(), [])
+        summary = stats.read_stats()
+        self.assertEqual(summary["all"]["count"], 3)
+        self.assertEqual(str(summary["all"]["min"]), "2000000.00")
+        self.assertEqual(str(summary["all"]["max"]), "9000000.00")
+        self.assertEqual(set(summary["type"]), {"apartment"})
+        self.assertFalse(PropertyStatsBucket.objects.filter(count=0).exists())
+
+    def test_deferred_instances(self):
+        prop = self.make_property(self.seller, price="1000000.00")
+        edited = Property.objects.only("id", "price").get(pk=prop.pk)
+        edited.price = "4000000.00"
+        edited.save()
+        self.assertEqual(stats.verify(), [])
+        self.assertEqual(str(stats.read_stats()["all"]["max"]), "4000000.00")
+
+        renamed = Property.objects.only("id", "name").get(pk=prop.pk)
+        renamed.name = "Renamed"
+        with CaptureQueriesContext(connection) as ctx:
+            renamed.save(update_fields=["name"])
+        self.assertFalse(any("stats" in query["sql"] for query in ctx.captured_queries))
+
+        Property.objects.only("id").get(pk=prop.pk).delete()
+        self.assertEqual(stats.verify(), [])
+        self.assertFalse(PropertyStats.objects.exists())
+
+    def test_stale_instances(self):
+        prop = self.make_property(self.seller, price="100.00")
+        other = Property.objects.get(pk=prop.pk)
+        other.price = "200.00"
+        other.save()
+        prop.refresh_from_db()
+        prop.price = "300.00"
+        prop.save()
+        self.assertEqual(stats.verify(), [])
+        other.property_type = "villa"  # still holds price 200 and type apartment
+        other.save()
+        self.assertEqual(stats.verify(), [])
+        prop.delete()
+        self.assertEqual(stats.verify(), [])
+        self.assertFalse(PropertyStats.objects.exists())
+
+    def test_percentiles_and_rebuild(self):
+        for price in ("1000000.00", "2000000.00", "3000000.00", "4000000.00"):
+            self.make_property(self.seller, price=price)
+        incremental = stats.read_stats()
+        self.assertLess(abs(incremental["all"]["p50"] - 2000000), 150000)
+        self.assertEqual(stats.rebuild(), 4)  # all, apartment, sell, this month
+        self.assertEqual(stats.read_stats(), incremental)
+
+class SearchTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        seller = self.make_seller()
+        self.in_name = self.make_property(seller, name="Lakeview villa", description="Quiet street")
+        self.in_description = self.make_property(seller, name="Garden flat", description="Near the lakeview park")
+        self.both = self.make_property(seller, name="Lakeview garden home", description="Big garden")
+        self.other = self.make_property(seller, name="City studio", location="Mumbai", description="Compact")
+        for prop in (self.in_name, self.in_description, self.both, self.other):
+            index_property(prop)
+
+    def test_ranking(self):
+        self.assertEqual(search("lakeview garden"), [self.both, self.in_description, self.in_name])
+        self.assertEqual(search("lakeview"), [self.both, self.in_name, self.in_description])
+        self.assertEqual(search("lakeview", limit=1, offset=1), [self.in_name])
+        self.assertEqual(search("the"), [])
+
+    def test_prefix_and_fuzzy_matches(self):
+        self.assertEqual(search("stud"), [self.other])
+        self.assertEqual(search("mumbia"), [self.other])
+        self.assertEqual(search("xylophone"), [])
+
+    def test_fuzzy_candidates_are_bounded(self):
+        SearchTerm.objects.bulk_create([SearchTerm(term=term, document_count=1) for term in ("mumbaa", "mumbay")])
+        with mock.patch("apps.properties.search.FUZZY_CANDIDATES", 1), \
+                mock.patch("apps.properties.search.difflib.get_close_matches", return_value=[]) as matcher:
+            search("mumbia")
+        self.assertEqual(len(matcher.call_args.args[1]), 1)
+
+    def test_unindex_never_goes_negative(self):
+        unindex_property(self.other)
+        self.assertEqual(SearchTerm.objects.get(term="mumbai").document_count, 0)
+        unindex_property(self.other)
+        self.assertEqual(SearchTerm.objects.get(term="mumbai").document_count, 0)
+        self.assertEqual(search("mumbai"), [])
+
+class ResponseCacheTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        caches["shared"].clear()
+        self.prop = self.make_property(self.make_seller())
+        self.url = f"/api/properties/{self.prop.pk}/"
+
+    def test_hit_and_miss(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first["X-Cache"], "MISS")
+        self.assertIn("Last-Modified", first)
+        second = self.client.get(self.url)
+        self.assertEqual(second["X-Cache"], "HIT")
+        self.assertEqual(second["ETag"], first["ETag"])
+        self.assertEqual(second.json(), first.json())
+        self.assertEqual(get_stats(), {"hits": 1, "misses": 1, "hit_ratio": 0.5})
+
+    def test_etag_revalidation(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(response["ETag"], etag)
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": '"other"'}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={"If-None-Match": "*"}).status_code, 304)
+
+    def test_if_modified_since(self):
+        last_modified = self.client.get(self.url)["Last-Modified"]
+        self.assertEqual(self.client.get(self.url, headers={"If-Modified-Since": last_modified}).status_code, 304)
+        earlier = http_date(timezone.now().timestamp() - 3600)
+        self.assertEqual(self.client.get(self.url, headers={"If-Modified-Since": earlier}).status_code, 200)
+        self.assertEqual(self.client.get(self.url, headers={"If-Modified-Since": "yesterday"}).status_code, 200)
+
+    def test_writes_invalidate(self):
+        etag = self.client.get(self.url)["ETag"]
+        self.client.get("/api/properties/")
+        self.prop.name = "Renamed"
+        self.prop.save()
+        response = self.client.get(self.url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.json()["name"], "Renamed")
+        self.assertEqual(self.client.get("/api/properties/")["X-Cache"], "MISS")
+
+    def test_personalized_list(self):
+        first = self.client.get("/api/properties/")
+        self.assertIn("Authorization", first["Vary"])
+        self.assertNotIn("Last-Modified", first)
+        response = self.client.get("/api/properties/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Cache"], "HIT")
+        Wishlist.objects.create(user=self.user, property=self.prop)
+        # Same cached page, but this user's variant (and so its ETag) changed.
+        response = self.client.get("/api/properties/", headers={"If-None-Match": first["ETag"]})
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_views_share_the_cache(self):
+        etag = self.client.get(self.url)["ETag"]
+        response = call_async_view(
+            async_views.property_detail, self.url, self.user, headers={"If-None-Match": etag}, pk=self.prop.pk,
+        )
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response["X-Cache"], "HIT")
+
+class StreamingTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.ids = [self.make_property(self.user, name=f"Mine {i}").id for i in range(5)]
+
+    def test_ndjson_and_json(self):
+        response = self.client.get("/api/properties/user/?stream=ndjson")
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["id"] for line in lines], self.ids)
+        response = self.client.get("/api/properties/user/?stream=json")
+        self.assertEqual([row["id"] for row in json.loads(b"".join(response.streaming_content))], self.ids)
+
+    async def test_asgi_streams_asynchronously(self):
+        client, headers = AsyncClient(), {"Authorization": f"Bearer {AccessToken.for_user(self.user)}"}
+        with mock.patch("apps.properties.views.UserPropertiesView.stream_batch_size", 2):
+            response = await client.get("/api/properties/user/?stream=ndjson", headers=headers)
+            self.assertTrue(response.is_async)
+            chunks = [chunk async for chunk in response.streaming_content]
+        self.assertEqual(len(chunks), 3)  # two rows per step
+        self.assertEqual([json.loads(line)["id"] for line in b"".join(chunks).decode().splitlines()], self.ids)
+        response = await client.get("/api/properties/export/?file_format=jsonl", headers=headers)
+        self.assertTrue(response.is_async)
+        self.assertEqual(len(b"".join([chunk async for chunk in response.streaming_content]).splitlines()), 5)
+
+@override_settings(STORAGES={
+    "default": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+    "property_images": {"BACKEND": "django.core.files.storage.InMemoryStorage"},
+})
+class ImageUploadTests(ApiTestCase):
+    def setUp(self):
+        super().setUp()
+        self.prop = self.make_property(self.user)
+        self.url = f"/api/properties/{self.prop.pk}/images/"
+
+    def png(self, size=(800, 400), name="photo.png"):
+        buffer = io.BytesIO()
+        Image.new("RGB", size, (200, 120, 40)).save(buffer, "PNG")
+        return SimpleUploadedFile(name, buffer.getvalue(), content_type="image/png")
+
+    def upload(self, *files):
+        return self.client.post(self.url, {"images": list(files)}, format="multipart")
+
+    def run_jobs(self):
+        for job in Job.objects.filter(name="properties.process_image"):
+            process_image(*job.args)
+
+    def test_variants_are_rendered(self):
+        response = self.upload(self.png())
+        self.assertEqual(response.status_code, 202, response.content)
+        [image_id] = response.json()["ids"]
+        self.run_jobs()
+        self.prop.refresh_from_db()
+        [entry] = self.prop.image_variants
+        self.assertEqual(entry["id"], image_id)
+        self.assertEqual(entry["status"], "ready")
+        self.assertEqual((entry["width"], entry["height"]), (800, 400))
+        self.assertEqual(sorted(entry["sizes"], key=int), ["320", "640"])
+        self.assertEqual(set(entry["sizes"]["320"]), {"webp", "jpeg"})
+        self.assertTrue(entry["placeholder"].startswith("data:image/jpeg;base64,"))
+        self.assertEqual(thumbnail_url(entry), entry["sizes"]["320"]["webp"])
+        self.assertEqual(self.prop.images, [entry["sizes"]["640"]["jpeg"]])
+        storage = storages["property_images"]
+        self.assertFalse(storage.exists(f"properties/{self.prop.pk}/{image_id}/original"))
+        self.assertTrue(storage.exists(f"properties/{self.prop.pk}/{image_id}/320.webp"))
+
+    def test_small_images_keep_their_width(self):
+        self.upload(self.png(size=(200, 100)))
+        self.run_jobs()
+        self.prop.refresh_from_db()
+        self.assertEqual(list(self.prop.image_variants[0]["sizes"]), ["200"])
+
+    def test_broken_original_is_marked_failed(self):
+        self.upload(self.png())
+        job = Job.objects.get(name="properties.process_image")
+        storages["property_images"].delete(job.args[2])
+        storages["property_images"].save(job.args[2], SimpleUploadedFile("x", b"not an image"))
+        self.run_jobs()
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.image_variants[0]["status"], "failed")
+        self.assertIsNone(self.prop.images)
+
+    def test_storage_errors_are_retried(self):
+        self.upload(self.png())
+        job = Job.objects.get(name="properties.process_image")
+        storage = storages["property_images"]
+        with mock.patch.object(storage, "save", side_effect=OSError("disk full")), self.assertRaises(OSError):
+            process_image(*job.args)
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.image_variants[0]["status"], "processing")
+        self.assertTrue(storage.exists(job.args[2]))
+        self.run_jobs()
+        self.prop.refresh_from_db()
+        self.assertEqual(self.prop.image_variants[0]["status"], "ready")
+        self.assertFalse(storage.exists(job.args[2]))
+
+    def test_invalid_uploads_are_rejected(self):
+        fake = SimpleUploadedFile("fake.png", b"plain text", content_type="image/png")
+        self.assertEqual(self.upload(fake).status_code, 400)
+        with mock.patch("apps.properties.images.MAX_PIXELS", 1000):
+            response = self.upload(self.png())
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("too large", response.json()["images"])
+        self.assertFalse(Job.objects.filter(name="properties.process_image").exists())
+
+    def test_decompression_bombs_are_rejected(self):
+        with mock.patch.object(Image, "MAX_IMAGE_PIXELS", 100):
+            response = self.upload(self.png(size=(20, 20)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("too large", response.json()["images"])
@@ -0,0 +1,101 @@
+"""
+Trending listings.
+
+A listing's score sums its recent activity (wishlist adds, chat rooms opened
+about it and views, from the hourly PropertyViewBucket rows) over the last
+``WINDOW``, each event weighted by ``WEIGHTS`` and halved every
+``HALF_LIFE_HOURS``. ``refresh`` computes all scores in one pass and replaces
+the ``TrendingListing`` table with the top ``MAX_LISTINGS``, so the feed is an
+index seek on ``rank`` and nothing is scored per request.
+
+``refresh`` runs as the ``properties.refresh_trending`` job, queued by the feed
+itself once the table is older than ``TRENDING_REFRESH_SECONDS``, or from cron
+through ``manage.py refresh_trending``. Both the table's age (``computed_at`` on
+its rows) and whether a refresh is already queued are read from the database, so
+every web and worker process agrees on them. The feed only looks once per
+``CHECK_FRACTION`` of that interval, gated by a key in the "shared" cache, so a
+request costs one cache round trip rather than queries (and a job insert).
+"""
+from collections import defaultdict
+from datetime import timedelta
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.utils import timezone
+from apps.jobs.models import Job
+from apps.jobs.queue import enqueue
+from .models import Property, PropertyViewBucket, TrendingListing, Wishlist
+
+WEIGHTS = {"wishlist": 3.0, "chat": 5.0, "view": 0.2}
+HALF_LIFE_HOURS = 48
+WINDOW = timedelta(days=7)
+MAX_LISTINGS = 1000
+REFRESH_TASK = "properties.refresh_trending"
+CHECK_KEY = "properties:trending:checked"
+CHECK_FRACTION = 10
+
+def decay(age):
+    return 0.5 ** (age.total_seconds() / 3600 / HALF_LIFE_HOURS)
+
+def compute_scores(now):
+    """Return ``{property_id: score}`` for every listing with activity inside the window."""
+    since = now - WINDOW
+    scores = defaultdict(float)
+    wishlists = Wishlist.objects.filter(created_at__gte=since).values_list("property_id", "created_at")
+    for pk, at in wishlists.iterator(chunk_size=5000):
+        scores[pk] += WEIGHTS["wishlist"] * decay(now - at)
+    chats = Property.objects.filter(chatrooms__created_at__gte=since).values_list("id", "chatrooms__created_at")
+    for pk, at in chats.iterator(chunk_size=5000):
+        scores[pk] += WEIGHTS["chat"] * decay(now - at)
+    buckets = PropertyViewBucket.objects.filter(hour__gte=since).values_list("property_id", "hour", "views")
+    for pk, hour, views in buckets.iterator(chunk_size=5000):
+        # Bucket views are spread over the hour; age them from its middle.
+        scores[pk] += WEIGHTS["view"] * views * decay(now - hour - timedelta(minutes=30))
+    return scores
+
+def refresh(now=None):
+    """Recompute the trending table. Returns the number of ranked listings."""
+    now = now or timezone.now()
+    scores = compute_scores(now)
+    top = sorted(scores.items(), key=lambda item: (-item[1], -item[0]))[:MAX_LISTINGS]
+    # Also drops listings deleted since their activity was read.
+    types = dict(Property.objects.filter(pk__in=[pk for pk, _ in top]).values_list("id", "property_type"))
+    ranked = [(pk, score) for pk, score in top if pk in types]
+    rows = [
+        TrendingListing(
+            property_id=pk, property_type=types[pk].lower(), rank=rank, score=round(score, 4), computed_at=now,
+        )
+        for rank, (pk, score) in enumerate(ranked, start=1)
+    ]
+    with transaction.atomic():
+        TrendingListing.objects.all().delete()
+        TrendingListing.objects.bulk_create(rows, batch_size=500)
+        PropertyViewBucket.objects.filter(hour__lt=now - WINDOW).delete()
+        if not rows and not settings.JOBS_RUN_IMMEDIATELY and not pending_refreshes().filter(status="queued").exists():
+            # An empty feed has no rows to date it; a delayed refresh stands in for the
+            # timestamp, so requests do not queue one after another until there is activity.
+            enqueue(REFRESH_TASK, delay=timedelta(seconds=settings.TRENDING_REFRESH_SECONDS))
+    return len(rows)
+
+def computed_at():
+    return TrendingListing.objects.order_by("rank").values_list("computed_at", flat=True).first()
+
+def pending_refreshes():
+    return Job.objects.filter(name=REFRESH_TASK, status__in=("queued", "running"))
+
+def schedule_refresh():
+    """Queue a refresh when the table is stale and none is queued or running yet."""
+    last = computed_at()
+    if last is not None and timezone.now() - last < timedelta(seconds=settings.TRENDING_REFRESH_SECONDS):
+        return False
+    if pending_refreshes().exists():
+        return False
+    enqueue(REFRESH_TASK)
+    return True
+
+def schedule_refresh_if_due():
+    """``schedule_refresh`` for the feed: runs it at most once per check interval, across processes."""
+    interval = max(1, settings.TRENDING_REFRESH_SECONDS // CHECK_FRACTION)
+    if not caches["shared"].add(CHECK_KEY, True, interval):
+        return False
+    return schedule_refresh()
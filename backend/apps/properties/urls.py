@@ -1,14 +1,36 @@
+from django.conf import settings
 from django.urls import path
+from . import async_views
 from .views import (
-    PropertyListCreateView, PropertyDetailView, UserPropertiesView,
-    WishlistListView, AddToWishlistView, RemoveFromWishlistView
+    PropertyListCreateView, PropertyDetailView, UserPropertiesView, PropertySearchView,
+    WishlistListView, AddToWishlistView, RemoveFromWishlistView, PropertyCacheStatsView,
+    PropertyImportView, PropertyExportView, PropertyImageUploadView, PropertyStatsView,
+    WishlistIdsView, BulkAddToWishlistView, BulkRemoveFromWishlistView, TrendingPropertiesView,
+    SimilarPropertiesView,
 )
 
+# Reads are served by async views when ASYNC_VIEWS is on; writes always go to the DRF views.
+if settings.ASYNC_VIEWS:
+    list_create_view, detail_view = async_views.property_list_create, async_views.property_detail
+else:
+    list_create_view, detail_view = PropertyListCreateView.as_view(), PropertyDetailView.as_view()
+
 urlpatterns = [
-    path("", PropertyListCreateView.as_view(), name="property_list_create"),
-    path("<int:pk>/", PropertyDetailView.as_view(), name="property_detail"),
+    path("", list_create_view, name="property_list_create"),
+    path("search/", PropertySearchView.as_view(), name="property_search"),
+    path("trending/", TrendingPropertiesView.as_view(), name="property_trending"),
+    path("<int:pk>/", detail_view, name="property_detail"),
+    path("<int:pk>/similar/", SimilarPropertiesView.as_view(), name="property_similar"),
+    path("<int:pk>/images/", PropertyImageUploadView.as_view(), name="property_image_upload"),
+    path("stats/", PropertyStatsView.as_view(), name="property_stats"),
+    path("cache/stats/", PropertyCacheStatsView.as_view(), name="property_cache_stats"),
+    path("import/", PropertyImportView.as_view(), name="property_import"),
+    path("export/", PropertyExportView.as_view(), name="property_export"),
     path("user/", UserPropertiesView.as_view(), name="user_properties"),
     path("wishlist/", WishlistListView.as_view(), name="wishlist_list"),
+    path("wishlist/ids/", WishlistIdsView.as_view(), name="wishlist_ids"),
     path("wishlist/add/", AddToWishlistView.as_view(), name="wishlist_add"),
+    path("wishlist/bulk/add/", BulkAddToWishlistView.as_view(), name="wishlist_bulk_add"),
+    path("wishlist/bulk/remove/", BulkRemoveFromWishlistView.as_view(), name="wishlist_bulk_remove"),
     path("wishlist/remove/<int:property_id>/", RemoveFromWishlistView.as_view(), name="wishlist_remove"),
 ]
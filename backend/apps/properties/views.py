@@ -1,8 +1,52 @@
-from rest_framework import generics, serializers, permissions
-from rest_framework.permissions import IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework import generics, serializers, permissions, status
+from rest_framework.response import Response
+from rest_framework.permissions import IsAdminUser, IsAuthenticated, IsAuthenticatedOrReadOnly
+from rest_framework.views import APIView
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.shortcuts import get_object_or_404
-from .models import Property, Wishlist
-from .serializers import PropertySerializer, WishlistSerializer
+from rest_framework.parsers import MultiPartParser
+from .models import Property, TrendingListing, Wishlist
+from .serializers import (
+    PropertySerializer, PropertyCardSerializer, PropertyListSerializer, WishlistSerializer, WishlistIdsSerializer,
+    WishlistRowSerializer, card_columns, card_row_serializer, mark_wishlisted, sparse_fields,
+)
+from .images import InvalidImage, queue_uploads
+from .filters import filter_properties, geo_search, parse_geo_query
+from .pagination import KeysetPagination, TrendingPagination
+from .search import search
+from .bulk import UnreadableFile, detect_format, export_rows, import_rows, read_rows, text_stream
+from .streaming import STREAM_CONTENT_TYPES, StreamingListMixin, streaming_response
+from .stats import read_stats
+from .cache import cached_response, detail_cache_key, get_stats, list_cache_key
+from .counters import recount_wishlist_counts, record_view
+from .trending import schedule_refresh_if_due
+from .similar import similar_properties
+
+# Columns list pages read besides the serialized ones: keyset cursors and distance sorting.
+LIST_LOOKUP_COLUMNS = ("created_at", "price", "wishlist_count", "view_count", "latitude", "longitude")
+
+def listing_queryset(params, fields=None):
+    """
+    Public listings filtered by the query string (see filter_properties); with
+    ``fields``, only the columns those card fields need are loaded.
+    """
+    qs = Property.objects.select_related("seller")
+    exclude_user = params.get("exclude_user")
+    if exclude_user:
+        qs = qs.exclude(seller_id=exclude_user)
+    qs = filter_properties(qs, params)
+    if fields is not None:
+        if "seller_name" not in fields:
+            qs = qs.select_related(None)
+        qs = qs.only(*card_columns(fields), *LIST_LOOKUP_COLUMNS)
+    return qs
+
+def listing_rows(params, rows):
+    """``listing_queryset`` as ``.values()`` rows for the row serializer ``rows``."""
+    return listing_queryset(params).values(*dict.fromkeys([*rows.columns, *LIST_LOOKUP_COLUMNS]))
+
+wishlist_rows = WishlistRowSerializer()
 
 # ✅ Create a property (restricted to authenticated users)
 class AddPropertyView(generics.CreateAPIView):
@@ -10,53 +54,179 @@ class AddPropertyView(generics.CreateAPIView):
     serializer_class = PropertySerializer
     permission_classes = [permissions.IsAuthenticated]  # Requires login
 
-# ✅ List all properties & allow adding new ones
+# ✅ List all properties (filtered & keyset-paginated server side) & allow adding new ones
+# (pages hold compact cards; ?fields= / ?expand= choose their fields)
 class PropertyListCreateView(generics.ListCreateAPIView):
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = KeysetPagination
+    cache_timeout = 300
+
+    def get_serializer_class(self):
+        return PropertyCardSerializer if self.request.method == "GET" else PropertySerializer
+
+    def get_serializer(self, *args, **kwargs):
+        if self.request.method == "GET":
+            kwargs.setdefault("fields", sparse_fields(self.request.query_params))
+        return super().get_serializer(*args, **kwargs)
 
     def get_queryset(self):
-        qs = Property.objects.all().order_by('-created_at')
-        exclude_user = self.request.query_params.get("exclude_user")
-        if exclude_user:
-            qs = qs.exclude(seller_id=exclude_user)
-        return qs
+        params = self.request.query_params
+        return listing_queryset(params, sparse_fields(params) if self.request.method == "GET" else None)
+
+    def list(self, request, *args, **kwargs):
+        build = lambda: self.build_list(request, *args, **kwargs)
+        return cached_response(
+            request, list_cache_key(request), build, self.cache_timeout, personalize=self.personalize,
+        )
+
+    def personalize(self, data):
+        # Pages are cached for everyone; the viewer's wishlist flags are added per request.
+        results, variant = mark_wishlisted(data["results"], self.request.user)
+        return {**data, "results": results}, variant
+
+    def build_list(self, request, *args, **kwargs):
+        geo_query = parse_geo_query(request.query_params)
+        if geo_query is None:
+            # Read-only fast path: cards straight from .values() rows, same output as PropertyCardSerializer.
+            rows = card_row_serializer(sparse_fields(request.query_params))
+            page = self.paginate_queryset(listing_rows(request.query_params, rows))
+            return self.get_paginated_response(rows.many(page))
+        # Spatial queries are distance-sorted, so they return one bounded page instead of a cursor.
+        limit = self.paginator.get_page_size(request)
+        matches = geo_search(self.get_queryset(), geo_query, limit)
+        data = self.get_serializer([prop for prop, _ in matches], many=True).data
+        for item, (_, distance) in zip(data, matches):
+            item["distance_km"] = round(distance, 3)
+        return Response({"next": None, "results": data})
 
     def perform_create(self, serializer):
         serializer.save(seller=self.request.user)
 
-# ✅ Fetch properties added by the logged-in user
-class UserPropertiesView(generics.ListAPIView):
-    serializer_class = PropertySerializer
+# ✅ Ranked keyword search over name, location & description
+class PropertySearchView(generics.ListAPIView):
+    serializer_class = PropertyListSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    max_limit = 50
+
+    def list(self, request, *args, **kwargs):
+        query = request.query_params.get("q", "").strip()
+        try:
+            limit = min(max(int(request.query_params.get("limit", 20)), 1), self.max_limit)
+            offset = max(int(request.query_params.get("offset", 0)), 0)
+        except ValueError:
+            raise serializers.ValidationError({"detail": "limit and offset must be integers."})
+        results = search(query, limit=limit, offset=offset) if query else []
+        serializer = self.get_serializer(results, many=True)
+        data, _ = mark_wishlisted(serializer.data, request.user)
+        return Response({"query": query, "results": data})
+
+# ✅ Trending listings, precomputed from recent wishlists, chats & views (?property_type= filters)
+class TrendingPropertiesView(generics.ListAPIView):
+    serializer_class = PropertyListSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    pagination_class = TrendingPagination
+
+    def get_queryset(self):
+        qs = TrendingListing.objects.select_related("property__seller")
+        property_type = self.request.query_params.get("property_type", "").strip()
+        if property_type:
+            qs = qs.filter(property_type=property_type.lower())
+        return qs
+
+    def list(self, request, *args, **kwargs):
+        schedule_refresh_if_due()
+        page = self.paginate_queryset(self.get_queryset())
+        data = self.get_serializer([entry.property for entry in page], many=True).data
+        for item, entry in zip(data, page):
+            item["trending_score"] = entry.score
+        results, _ = mark_wishlisted(data, request.user)
+        return self.get_paginated_response(results)
+
+# ✅ Listings most similar to a given one (content-based nearest neighbours; ?limit= caps the count)
+class SimilarPropertiesView(generics.ListAPIView):
+    serializer_class = PropertyListSerializer
+    permission_classes = [IsAuthenticatedOrReadOnly]
+    max_limit = 50
+
+    def list(self, request, *args, **kwargs):
+        try:
+            limit = min(max(int(request.query_params.get("limit", 10)), 1), self.max_limit)
+        except ValueError:
+            raise serializers.ValidationError({"detail": "limit must be an integer."})
+        matches = similar_properties(self.kwargs["pk"], limit)
+        if matches is None:
+            raise Http404
+        data = self.get_serializer([prop for prop, _ in matches], many=True).data
+        for item, (_, similarity) in zip(data, matches):
+            item["similarity"] = round(similarity, 4)
+        results, _ = mark_wishlisted(data, request.user)
+        return Response({"results": results})
+
+# ✅ Fetch properties added by the logged-in user (?stream=ndjson|json streams row by row)
+class UserPropertiesView(StreamingListMixin, generics.ListAPIView):
+    serializer_class = PropertyListSerializer
     permission_classes = [permissions.IsAuthenticated]
 
     def get_queryset(self):
-        return Property.objects.filter(seller=self.request.user)
+        return Property.objects.filter(seller=self.request.user).select_related("seller")
 
 # ✅ Get details of a specific property (supports update & delete)
 class PropertyDetailView(generics.RetrieveUpdateDestroyAPIView):
-    queryset = Property.objects.all()
+    queryset = Property.objects.select_related("seller")
     serializer_class = PropertySerializer
     permission_classes = [IsAuthenticatedOrReadOnly]
+    cache_timeout = 300
+
+    def retrieve(self, request, *args, **kwargs):
+        build = lambda: super(PropertyDetailView, self).retrieve(request, *args, **kwargs)
+        response = cached_response(request, detail_cache_key(self.kwargs["pk"]), build, self.cache_timeout)
+        if response.status_code in (status.HTTP_200_OK, status.HTTP_304_NOT_MODIFIED):
+            record_view(self.kwargs["pk"])
+        return response
 
     def perform_update(self, serializer):
-        property_obj = self.get_object()
-        if property_obj.seller != self.request.user:
+        # serializer.instance was already loaded by get_object(); don't fetch it again
+        if serializer.instance.seller_id != self.request.user.id:
             raise serializers.ValidationError({"detail": "You can only edit your own properties."})
         serializer.save()
 
     def perform_destroy(self, instance):
-        if instance.seller != self.request.user:
+        if instance.seller_id != self.request.user.id:
             raise serializers.ValidationError("You can only delete your own properties.")
         instance.delete()
 
-# ✅ Fetch wishlist items of the logged-in user
-class WishlistListView(generics.ListAPIView):
+# ✅ Upload images for a property; variants are rendered in the background
+class PropertyImageUploadView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, pk):
+        prop = get_object_or_404(Property, pk=pk)
+        if prop.seller_id != request.user.id:
+            raise serializers.ValidationError({"detail": "You can only add images to your own properties."})
+        uploads = request.FILES.getlist("images")
+        if not uploads:
+            raise serializers.ValidationError({"images": "Upload at least one image file."})
+        try:
+            image_ids = queue_uploads(prop, uploads)
+        except InvalidImage as exc:
+            raise serializers.ValidationError({"images": str(exc)})
+        return Response({"ids": image_ids, "status": "processing"}, status=status.HTTP_202_ACCEPTED)
+
+# ✅ Fetch wishlist items of the logged-in user (?stream=ndjson|json streams row by row)
+class WishlistListView(StreamingListMixin, generics.ListAPIView):
     serializer_class = WishlistSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        return Wishlist.objects.filter(user=self.request.user)
+        return Wishlist.objects.filter(user=self.request.user).select_related("property__seller")
+
+    def list(self, request, *args, **kwargs):
+        if request.query_params.get(self.stream_query_param) in STREAM_CONTENT_TYPES:
+            return super().list(request, *args, **kwargs)
+        # Read-only fast path: rows straight from .values(), same output as WishlistSerializer.
+        return Response(wishlist_rows.many(self.get_queryset().values(*wishlist_rows.columns)))
 
 # ✅ Add property to wishlist
 class AddToWishlistView(generics.CreateAPIView):
@@ -66,9 +236,53 @@ class AddToWishlistView(generics.CreateAPIView):
     def perform_create(self, serializer):
         property_id = self.request.data.get("property")
         prop = get_object_or_404(Property, id=property_id)
-        if Wishlist.objects.filter(user=self.request.user, property=prop).exists():
+        # The (user, property) unique constraint rejects duplicates; no separate exists() query.
+        try:
+            with transaction.atomic():
+                serializer.save(user=self.request.user, property=prop)
+        except IntegrityError:
             raise serializers.ValidationError("Property is already in your wishlist.")
-        serializer.save(user=self.request.user, property=prop)
+
+# ✅ Ids of the properties in the logged-in user's wishlist
+class WishlistIdsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        ids = Wishlist.objects.filter(user=request.user).order_by("-created_at").values_list("property_id", flat=True)
+        return Response({"ids": list(ids)})
+
+# ✅ Add several properties to the wishlist in one transaction (existing entries are kept)
+class BulkAddToWishlistView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WishlistIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        requested = set(serializer.validated_data["property_ids"])
+        found = set(Property.objects.filter(id__in=requested).values_list("id", flat=True))
+        with transaction.atomic():
+            # bulk_create sends no signals, so update the counts here. A concurrent request may
+            # insert some of these first (ignored below), so recount rather than add one.
+            new = found - set(
+                Wishlist.objects.filter(user=request.user, property_id__in=found).values_list("property_id", flat=True)
+            )
+            Wishlist.objects.bulk_create(
+                [Wishlist(user=request.user, property_id=pk) for pk in sorted(new)], ignore_conflicts=True,
+            )
+            recount_wishlist_counts(sorted(new))
+        return Response({"added": sorted(found), "missing": sorted(requested - found)})
+
+# ✅ Remove several properties from the wishlist
+class BulkRemoveFromWishlistView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        serializer = WishlistIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        removed, _ = Wishlist.objects.filter(
+            user=request.user, property_id__in=serializer.validated_data["property_ids"],
+        ).delete()
+        return Response({"removed": removed})
 
 # ✅ Remove property from wishlist
 class RemoveFromWishlistView(generics.DestroyAPIView):
@@ -78,3 +292,53 @@ class RemoveFromWishlistView(generics.DestroyAPIView):
     def get_object(self):
         property_id = self.kwargs.get("property_id")
         return get_object_or_404(Wishlist, user=self.request.user, property_id=property_id)
+
+# ✅ Precomputed price statistics by property type, sell/rent and month
+class PropertyStatsView(APIView):
+    permission_classes = [IsAuthenticatedOrReadOnly]
+
+    def get(self, request):
+        return Response(read_stats())
+
+# ✅ Response cache hit/miss counters (admin only)
+class PropertyCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(get_stats())
+
+# ✅ Bulk import listings for the logged-in user from an uploaded CSV / JSONL file
+class PropertyImportView(APIView):
+    permission_classes = [IsAuthenticated]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            raise serializers.ValidationError({"file": "Upload a CSV or JSONL file."})
+        try:
+            file_format = detect_format(upload.name, request.data.get("file_format"))
+        except ValueError as exc:
+            raise serializers.ValidationError({"file_format": str(exc)})
+        try:
+            report = import_rows(read_rows(text_stream(upload), file_format), request.user)
+        except UnreadableFile as exc:
+            # Rows before the unreadable part are committed; the report says how many.
+            return Response({"detail": str(exc), **exc.report}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(report)
+
+# ✅ Stream the logged-in user's listings as CSV / JSONL
+class PropertyExportView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # "format" is reserved by DRF for renderer selection, hence "file_format".
+        try:
+            file_format = detect_format("", request.query_params.get("file_format", "csv"))
+        except ValueError as exc:
+            raise serializers.ValidationError({"file_format": str(exc)})
+        rows = export_rows(Property.objects.filter(seller=request.user), file_format)
+        content_type = "text/csv" if file_format == "csv" else "application/x-ndjson"
+        response = streaming_response(request, rows, content_type)
+        response["Content-Disposition"] = f'attachment; filename="properties.{file_format}"'
+        return response
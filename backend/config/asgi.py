@@ -1,18 +1,26 @@
 import os
-import django
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
 from django.core.asgi import get_asgi_application
-import apps.chat.routing  # Make sure the path is correct
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
-django.setup()
+# Served through ASGI, the hot read endpoints use their async views (see ASYNC_VIEWS in settings).
+os.environ.setdefault("ASYNC_VIEWS", "True")
+# Each sync_to_async thread would otherwise keep a persistent connection of its own.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
+# Initialise Django before importing anything that touches models.
+django_asgi_app = get_asgi_application()
+
+from channels.routing import ProtocolTypeRouter, URLRouter  # noqa: E402
+from channels.security.websocket import AllowedHostsOriginValidator  # noqa: E402
+from apps.chats.middleware import JWTAuthMiddleware  # noqa: E402
+import apps.chats.routing  # noqa: E402
 
 application = ProtocolTypeRouter({
-    "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
-        URLRouter(
-            apps.chat.routing.websocket_urlpatterns
+    "http": django_asgi_app,
+    "websocket": AllowedHostsOriginValidator(
+        JWTAuthMiddleware(
+            URLRouter(
+                apps.chats.routing.websocket_urlpatterns
+            )
         )
     ),
 })
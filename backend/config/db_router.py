@@ -0,0 +1,128 @@
+"""
+Primary / read-replica database routing.
+
+Replicas are the ``replica*`` aliases built from ``DB_REPLICAS`` in settings. Only
+safe (GET/HEAD/OPTIONS) API requests read from a replica: ``ReplicaRoutingMiddleware``
+picks one per request, and everything else (writes, reads in unsafe requests,
+management commands, job workers, websocket consumers) uses the primary.
+
+Replicas lag behind the primary, so a user who changed something reads from the
+primary for ``DB_REPLICA_STICKY_SECONDS`` afterwards (read-your-writes), and a
+request that writes switches to the primary for the rest of its queries. The
+window is kept in the "shared" cache, so it holds whichever worker serves the
+next read.
+"""
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS, connections
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import UntypedToken
+
+STICKY_KEY = "db:sticky:{user_id}"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# The alias reads go to in the current request; None means the primary.
+_read_alias = ContextVar("read_alias", default=None)
+
+@contextmanager
+def use_primary():
+    """Send the reads in this block (including work handed to sync_to_async) to the primary."""
+    token = _read_alias.set(None)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        _read_alias.set(None)  # read our own write for the rest of the request
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Every alias holds the same data.
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        return db == DEFAULT_DB_ALIAS
+
+def token_user_id(request):
+    """The user id in the request's bearer token. Unverified: it only picks a database."""
+    header = request.headers.get("Authorization", "").split()
+    if len(header) != 2 or header[0] not in api_settings.AUTH_HEADER_TYPES:
+        return None
+    try:
+        return UntypedToken(header[1], verify=False).get(api_settings.USER_ID_CLAIM)
+    except TokenError:
+        return None
+
+def mark_sticky(user_id):
+    caches["shared"].set(STICKY_KEY.format(user_id=user_id), True, settings.DB_REPLICA_STICKY_SECONDS)
+
+def is_sticky(user_id):
+    return caches["shared"].get(STICKY_KEY.format(user_id=user_id)) is not None
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe API requests to a randomly chosen replica, unless the
+    user wrote something within the last ``DB_REPLICA_STICKY_SECONDS``. Successful
+    unsafe requests start that window. A no-op without replicas.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.replicas = settings.DATABASE_REPLICAS
+        self.paths = tuple(settings.DB_REPLICA_PATHS)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        token = _read_alias.set(self.choose(request))
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self.after(request, response)
+        return response
+
+    async def __acall__(self, request):
+        token = _read_alias.set(self.choose(request))
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        self.after(request, response)
+        return response
+
+    def choose(self, request):
+        if not self.replicas or request.method not in SAFE_METHODS or not request.path.startswith(self.paths):
+            return None
+        user_id = token_user_id(request)
+        if user_id is not None and is_sticky(user_id):
+            return None
+        return random.choice(self.replicas)
+
+    def after(self, request, response):
+        if not self.replicas or request.method in SAFE_METHODS or response.status_code >= 400:
+            return
+        if not request.path.startswith(self.paths):
+            return
+        user_id = token_user_id(request)
+        if user_id is not None:
+            mark_sticky(user_id)
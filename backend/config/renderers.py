@@ -0,0 +1,39 @@
+"""
+JSON rendering on orjson.
+
+``FastJSONRenderer`` produces the same bytes as DRF's ``JSONRenderer`` with its
+default (compact, UTF-8, strict) settings, several times faster. Dates, times
+and anything orjson does not know natively go through DRF's ``JSONEncoder``;
+data orjson rejects (non-string keys, integers over 64 bits) and indented
+(browsable / ``; indent=``) responses are rendered by ``JSONRenderer`` itself.
+Two differences remain: floats Python writes in exponent notation (below 1e-4
+or from 1e16) lose the ``+`` and leading zeros of the exponent (``1e16`` instead
+of ``1e+16``, the same number), and NaN / infinity render as ``null`` where
+``JSONRenderer`` raises. None of the API's payloads contain either.
+"""
+import orjson
+from rest_framework.renderers import JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+_default = JSONEncoder().default
+OPTIONS = orjson.OPT_PASSTHROUGH_DATETIME
+
+def dumps(data):
+    """``data`` as JSON bytes, exactly as DRF renders it (see the module docstring)."""
+    try:
+        body = orjson.dumps(data, default=_default, option=OPTIONS)
+    except orjson.JSONEncodeError:
+        return JSONRenderer().render(data)
+    # As JSONRenderer: escape the separators JavaScript does not allow in strings.
+    if b"\xe2\x80" in body:
+        body = body.replace(b"\xe2\x80\xa8", b"\\u2028").replace(b"\xe2\x80\xa9", b"\\u2029")
+    return body
+
+class FastJSONRenderer(JSONRenderer):
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b""
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if indent is not None or self.ensure_ascii or not self.compact or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+        return dumps(data)
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from decouple import config
+from decouple import Csv, config
 from datetime import timedelta
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -26,9 +26,13 @@ INSTALLED_APPS = [
     "cloudinary",
     "apps.accounts",
     "apps.properties",
+    "apps.monitoring",
+    "apps.jobs",
 ]
 
 MIDDLEWARE = [
+    "apps.monitoring.middleware.MetricsMiddleware",  # Per-view latency / SQL / payload metrics
+    "config.db_router.ReplicaRoutingMiddleware",  # Safe API requests read from a replica
     "corsheaders.middleware.CorsMiddleware",  # CORS Headers Middleware
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -60,6 +64,20 @@ TEMPLATES = [
 WSGI_APPLICATION = "config.wsgi.application"
 ASGI_APPLICATION = "config.asgi.application"
 
+# Request metrics (exposed at /metrics in Prometheus text format)
+METRICS_ALLOWED_IPS = config("METRICS_ALLOWED_IPS", default="127.0.0.1", cast=lambda v: [ip.strip() for ip in v.split(",") if ip.strip()])
+# Log requests slower than this (with their slowest SQL); 0 disables the slow log.
+SLOW_REQUEST_THRESHOLD_MS = config("SLOW_REQUEST_THRESHOLD_MS", default=1000, cast=int)
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {"console": {"class": "logging.StreamHandler"}},
+    "loggers": {
+        "apps.monitoring.slow_requests": {"handlers": ["console"], "level": "WARNING"},
+    },
+}
+
 # Database settings  
 DATABASES = {
     "default": {
@@ -71,6 +89,34 @@ DATABASES = {
         "PORT": config("DB_PORT", default="3306"),
     }
 }
+if config("DB_ENGINE", default="mysql") == "sqlite":
+    # Lightweight local setup (e.g. for benchmarks); DB_NAME is the database file.
+    DATABASES["default"] = {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": config("DB_NAME", default=str(BASE_DIR / "db.sqlite3")),
+    }
+# Keep connections open between requests (seconds; 0 closes them after every request)
+# and check they are still alive before reusing one. Under ASGI, sync code runs in
+# per-request threads that cannot share a connection, so config.asgi defaults DB_CONN_MAX_AGE to 0.
+DATABASES["default"]["CONN_MAX_AGE"] = config("DB_CONN_MAX_AGE", default=60, cast=int)
+DATABASES["default"]["CONN_HEALTH_CHECKS"] = True
+
+# Read replicas, comma separated: "host[:port]" for MySQL, or database files with
+# DB_ENGINE=sqlite. Safe API requests read from them (see config/db_router.py).
+DATABASE_REPLICAS = []
+for index, replica in enumerate(config("DB_REPLICAS", default="", cast=Csv()), start=1):
+    alias = f"replica{index}"
+    DATABASES[alias] = {**DATABASES["default"], "TEST": {"MIRROR": "default"}}
+    if DATABASES["default"]["ENGINE"].endswith("sqlite3"):
+        DATABASES[alias]["NAME"] = replica
+    else:
+        host, _, port = replica.partition(":")
+        DATABASES[alias].update(HOST=host, PORT=port or DATABASES["default"]["PORT"])
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ["config.db_router.PrimaryReplicaRouter"]
+# After a write, the user reads from the primary for this long (covers replication lag).
+DB_REPLICA_STICKY_SECONDS = config("DB_REPLICA_STICKY_SECONDS", default=5, cast=int)
+DB_REPLICA_PATHS = ["/api/"]
 
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
@@ -99,22 +145,102 @@ CLOUDINARY_STORAGE = {
     "API_SECRET": config("CLOUDINARY_API_SECRET", default="your_api_secret"),
 }
 
-DEFAULT_FILE_STORAGE = "cloudinary_storage.storage.MediaCloudinaryStorage"
+# "property_images" holds rendered listing image variants. It is the local filesystem
+# by default; set PROPERTY_IMAGE_STORAGE=cloudinary_storage.storage.MediaCloudinaryStorage
+# (or any other storage class) to serve them from a CDN.
+STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    "property_images": {
+        "BACKEND": config("PROPERTY_IMAGE_STORAGE", default="django.core.files.storage.FileSystemStorage"),
+    },
+}
+
+# Serve the hot read endpoints (property list/detail, chatroom list/detail) from async views.
+# They pay off under ASGI (uvicorn/daphne), so config.asgi turns them on unless ASYNC_VIEWS is set;
+# under WSGI and runserver each would run in its own event loop, hence the default here.
+ASYNC_VIEWS = config("ASYNC_VIEWS", default=False, cast=bool)
+
+# Listing views are buffered per process and written in one background job per interval
+# (or once this many listings have pending views).
+PROPERTY_VIEW_FLUSH_SECONDS = config("PROPERTY_VIEW_FLUSH_SECONDS", default=30, cast=int)
+PROPERTY_VIEW_FLUSH_SIZE = config("PROPERTY_VIEW_FLUSH_SIZE", default=500, cast=int)
+
+# The trending feed is recomputed in the background once it is older than this.
+TRENDING_REFRESH_SECONDS = config("TRENDING_REFRESH_SECONDS", default=600, cast=int)
+
+# Each process picks up re-embedded listings for the similar-listings index this often.
+SIMILAR_SYNC_SECONDS = config("SIMILAR_SYNC_SECONDS", default=60, cast=int)
+
+# Background jobs (apps/jobs) are run by `python manage.py run_jobs`. For local development
+# without a worker, JOBS_RUN_IMMEDIATELY runs them in-process right after each commit.
+JOBS_RUN_IMMEDIATELY = config("JOBS_RUN_IMMEDIATELY", default=False, cast=bool)
+
+# Cache used for API response caching. Local memory is per process; set CACHE_BACKEND
+# (e.g. django.core.cache.backends.redis.RedisCache) and CACHE_LOCATION to share it.
+# "shared" holds state every worker must see (token revocations, cached users, read-your-writes
+# windows, response cache versions); it uses the default cache's backend unless SHARED_CACHE_* is
+# set, but never its store: cached pages must not evict revocations. `manage.py check --deploy`
+# rejects a per-process backend for it, which is only correct with a single server process.
+CACHES = {
+    "default": {
+        "BACKEND": config("CACHE_BACKEND", default="django.core.cache.backends.locmem.LocMemCache"),
+        "LOCATION": config("CACHE_LOCATION", default="realestate"),
+    },
+}
+SHARED_CACHE_BACKEND = config("SHARED_CACHE_BACKEND", default=CACHES["default"]["BACKEND"])
+CACHES["shared"] = {
+    "BACKEND": SHARED_CACHE_BACKEND,
+    "LOCATION": config(
+        "SHARED_CACHE_LOCATION",
+        default="realestate-shared" if SHARED_CACHE_BACKEND.endswith(".LocMemCache") else CACHES["default"]["LOCATION"],
+    ),
+}
+if SHARED_CACHE_BACKEND.endswith(".LocMemCache"):
+    # Revocations are kept until the token expires; LocMem's default of 300 entries is far too few.
+    CACHES["shared"]["OPTIONS"] = {"MAX_ENTRIES": config("SHARED_CACHE_MAX_ENTRIES", default=100_000, cast=int)}
 
 # Django REST Framework configuration
 REST_FRAMEWORK = {
-    "DEFAULT_AUTHENTICATION_CLASSES": ("rest_framework_simplejwt.authentication.JWTAuthentication",),
+    "DEFAULT_AUTHENTICATION_CLASSES": ("apps.accounts.authentication.CachedJWTAuthentication",),
+    # orjson-backed, same bytes as DRF's JSONRenderer (see config/renderers.py).
+    "DEFAULT_RENDERER_CLASSES": (
+        "config.renderers.FastJSONRenderer",
+        "rest_framework.renderers.BrowsableAPIRenderer",
+    ),
+    # Token-bucket budgets per user / client IP (see config/throttling.py and THROTTLE_RATES).
+    "DEFAULT_THROTTLE_CLASSES": ("config.throttling.TokenBucketThrottle",),
+    # Reverse proxies whose X-Forwarded-For entry is trusted as the client IP; 0 uses REMOTE_ADDR.
+    "NUM_PROXIES": config("NUM_PROXIES", default=0, cast=int),
+}
+
+# Request budgets per scope, "<requests>/<second|minute|hour|day>": bursts of up to
+# <requests>, refilled evenly over the period. Authenticated requests count per user,
+# anonymous ones (and login/signup) per client IP. An empty rate disables the scope's throttle.
+THROTTLE_RATES = {
+    "read": config("THROTTLE_READ_RATE", default="1200/min"),
+    "write": config("THROTTLE_WRITE_RATE", default="120/min"),
+    "auth": config("THROTTLE_AUTH_RATE", default="20/min"),
+    "chat": config("THROTTLE_CHAT_RATE", default="30/min"),
 }
+# Where buckets live: in process by default (each worker enforces the budgets on its own), or
+# config.throttling.CacheBucketStore to share them across workers through CACHES["default"].
+THROTTLE_STORE = config("THROTTLE_STORE", default="config.throttling.LocalBucketStore")
 
-# Simple JWT settings
+# Simple JWT settings. Revoked token ids are kept in the cache (see apps/accounts/token.py)
+# rather than the token_blacklist app, so BLACKLIST_AFTER_ROTATION needs no extra tables.
 SIMPLE_JWT = {
-    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=3000),
+    "ACCESS_TOKEN_LIFETIME": timedelta(minutes=config("ACCESS_TOKEN_LIFETIME_MINUTES", default=3000, cast=int)),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
     "ROTATE_REFRESH_TOKENS": True,
     "BLACKLIST_AFTER_ROTATION": True,
+    # Tokens carry a hash of the password hash; changing the password invalidates them.
+    "CHECK_REVOKE_TOKEN": True,
     "AUTH_HEADER_TYPES": ("Bearer",),
-    "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "AUTH_TOKEN_CLASSES": ("apps.accounts.token.AccessToken",),
 }
+# Seconds an authenticated user row is served from the cache (dropped on every user save).
+AUTH_USER_CACHE_TIMEOUT = config("AUTH_USER_CACHE_TIMEOUT", default=300, cast=int)
 
 # CORS settings
 CORS_ALLOWED_ORIGINS = [
@@ -122,8 +248,14 @@ CORS_ALLOWED_ORIGINS = [
 ]
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
+# Channel layer for websocket chat. The in-memory layer only works within a single
+# process; multi-process deployments should point CHANNEL_LAYER_BACKEND at a shared
+# layer (e.g. channels_redis.core.RedisChannelLayer with CHANNEL_LAYER_HOSTS).
 CHANNEL_LAYERS = {
     "default": {
-        "BACKEND": "channels.layers.InMemoryChannelLayer",
+        "BACKEND": config("CHANNEL_LAYER_BACKEND", default="channels.layers.InMemoryChannelLayer"),
     },
 }
+CHANNEL_LAYER_HOSTS = config("CHANNEL_LAYER_HOSTS", default="", cast=lambda v: [h.strip() for h in v.split(",") if h.strip()])
+if CHANNEL_LAYER_HOSTS:
+    CHANNEL_LAYERS["default"]["CONFIG"] = {"hosts": CHANNEL_LAYER_HOSTS}
@@ -0,0 +1,81 @@
+"""
+Shared fixtures for the app test suites: an authenticated API client, listings and
+chat rooms, and the query-count assertions the N+1 regression tests use.
+"""
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from apps.chats.models import ChatMessage, ChatRoom
+from apps.properties.counters import view_buffer
+from apps.properties.models import Property
+
+def call_async_view(view, path, user=None, headers=None, **kwargs):
+    """
+    GET ``path`` from an async read view, which the URLconf only routes to when
+    ASYNC_VIEWS is on (under ASGI).
+    """
+    request = RequestFactory().get(path, headers=headers)
+    if user is not None:
+        request._force_auth_user = user
+    return async_to_sync(view)(request, **kwargs)
+
+class ApiTestCase(TestCase):
+    """Each test runs as ``self.user`` ("buyer") through ``self.client``."""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="buyer", password="secret-pass")
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.counter = 0
+
+    def tearDown(self):
+        view_buffer.clear()  # views counted in this test belong to its rolled-back data
+
+    def make_seller(self):
+        self.counter += 1
+        return User.objects.create_user(username=f"seller{self.counter}", password="secret-pass")
+
+    def make_property(self, seller, **fields):
+        return Property.objects.create(**{
+            "seller": seller,
+            "name": f"Listing {self.counter}",
+            "location": "Chennai",
+            "description": "Two bedroom flat",
+            "price": "2500000.00",
+            "property_type": "apartment",
+            "amenities": ["parking"],
+            **fields,
+        })
+
+    def add_rooms(self, n):
+        """``n`` chat rooms of ``self.user`` with new sellers, three messages each."""
+        for _ in range(n):
+            seller = self.make_seller()
+            room = ChatRoom.objects.create(property=self.make_property(seller), seller=seller, buyer=self.user)
+            for sender in (self.user, seller, self.user):
+                ChatMessage.objects.create(chatroom=room, sender=sender, message="Hello")
+
+class QueryCountTestCase(ApiTestCase):
+    """
+    Regression tests for N+1 queries: each endpoint is requested with a small and
+    a larger data set, and the number of SQL queries must not grow with the size.
+    """
+
+    def count_queries(self, url):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, response.content)
+        return len(ctx.captured_queries)
+
+    def assertConstantQueries(self, url, populate, small=2, large=6):
+        populate(small)
+        small_count = self.count_queries(url)
+        populate(large - small)
+        large_count = self.count_queries(url)
+        self.assertEqual(
+            small_count, large_count,
+            f"{url} ran {small_count} queries for {small} rows but {large_count} for {large}",
+        )
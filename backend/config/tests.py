@@ -0,0 +1,184 @@
+import uuid
+from decimal import Decimal
+from django.contrib.auth.models import User
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.exceptions import ErrorDetail
+from rest_framework.renderers import JSONRenderer
+from django.test import RequestFactory, SimpleTestCase, TestCase, override_settings
+from unittest import mock
+from rest_framework.test import APIClient
+from apps.accounts.token import AccessToken
+from apps.properties.async_views import property_list_create
+from .testing import call_async_view
+from .db_router import PrimaryReplicaRouter, ReplicaRoutingMiddleware, use_primary
+from .renderers import FastJSONRenderer
+from .throttling import LocalBucketStore, get_store
+
+router = PrimaryReplicaRouter()
+
+@override_settings(DATABASE_REPLICAS=["replica1"])
+class ReplicaRoutingTests(SimpleTestCase):
+    # Not a TestCase: its per-test transaction would send every read to the primary.
+    databases = {"default"}
+
+    def setUp(self):
+        caches["shared"].clear()
+        self.factory = RequestFactory()
+        self.auth = self.bearer(User(pk=1, username="alice"))
+
+    def bearer(self, user):
+        return {"Authorization": f"Bearer {AccessToken.for_user(user)}"}
+
+    def route(self, method, path, status=200, view=None, headers=None):
+        """Run a request through the middleware; return the alias reads used in the view."""
+        seen = []
+
+        def get_response(request):
+            if view:
+                view()
+            seen.append(router.db_for_read(User))
+            return HttpResponse(status=status)
+
+        request = self.factory.generic(method, path, headers=headers or self.auth)
+        ReplicaRoutingMiddleware(get_response)(request)
+        return seen[0]
+
+    def test_safe_api_reads_use_replica(self):
+        self.assertEqual(self.route("GET", "/api/properties/"), "replica1")
+        self.assertEqual(self.route("POST", "/api/properties/", status=201), "default")
+        self.assertEqual(self.route("GET", "/admin/"), "default")
+        self.assertEqual(router.db_for_read(User), "default")  # outside requests
+
+    def test_reads_after_a_write_are_sticky(self):
+        other = self.bearer(User(pk=2, username="bob"))
+        self.route("POST", "/api/properties/", status=400)
+        self.assertEqual(self.route("GET", "/api/properties/"), "replica1")
+        self.route("POST", "/api/properties/", status=201)
+        self.assertEqual(self.route("GET", "/api/properties/"), "default")
+        self.assertEqual(self.route("GET", "/api/properties/", headers=other), "replica1")
+
+    def test_sticky_window_is_seen_by_other_workers(self):
+        # Each worker keeps its own response cache, but all read the same shared cache.
+        shared = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": "sticky-test"}
+        worker = lambda name: {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache", "LOCATION": name}, "shared": shared}
+        with override_settings(CACHES=worker("worker-a")):
+            self.route("POST", "/api/properties/", status=201)
+        with override_settings(CACHES=worker("worker-b")):
+            self.assertEqual(self.route("GET", "/api/properties/"), "default")
+            caches["shared"].clear()
+
+    def test_write_switches_request_to_primary(self):
+        self.assertEqual(self.route("GET", "/api/chats/rooms/1/messages/", view=lambda: router.db_for_write(User)), "default")
+
+    def test_transactions_and_use_primary_read_primary(self):
+        def atomic_read():
+            with transaction.atomic():
+                self.assertEqual(router.db_for_read(User), "default")
+            with use_primary():
+                self.assertEqual(router.db_for_read(User), "default")
+            self.assertEqual(router.db_for_read(User), "replica1")
+        self.route("GET", "/api/properties/", view=atomic_read)
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_no_replicas(self):
+        self.assertEqual(self.route("GET", "/api/properties/"), "default")
+
+class FastJSONRendererTests(SimpleTestCase):
+    def test_same_bytes_as_json_renderer(self):
+        now = timezone.now().replace(microsecond=123456)
+        samples = [
+            {"id": 1, "price": "10.00", "ok": True, "none": None, "score": 0.1234, "nested": [{"a": []}]},
+            {"at": now, "naive": now.replace(tzinfo=None), "day": now.date(), "time": now.time()},
+            {"decimal": Decimal("1.50"), "uuid": uuid.uuid4(), "lazy": gettext_lazy("Not found."), "error": ErrorDetail("Bad", code="x")},
+            {"text": "caf\u00e9 \u2028 \u2029 \"quoted\" \\ </script>", "emoji": "\U0001F3E0"},
+            {1: "int keys", "big": 2 ** 70},  # orjson rejects both; falls back
+            [], "plain", 0,
+        ]
+        for data in samples:
+            self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data), data)
+        self.assertEqual(
+            FastJSONRenderer().render({"a": 1}, "application/json; indent=2"),
+            JSONRenderer().render({"a": 1}, "application/json; indent=2"),
+        )
+
+class ThrottleTests(TestCase):
+    def setUp(self):
+        get_store().clear()
+        self.alice = User.objects.create_user(username="alice", password="secret-pass")
+        self.bob = User.objects.create_user(username="bob", password="secret-pass")
+
+    def tearDown(self):
+        get_store().clear()
+
+    def client_for(self, user=None, ip="10.0.0.1"):
+        client = APIClient(REMOTE_ADDR=ip)
+        if user:
+            client.force_authenticate(user)
+        return client
+
+    def test_bucket_refills_evenly(self):
+        store = LocalBucketStore()
+        with mock.patch("config.throttling.time.monotonic", return_value=100.0) as clock:
+            self.assertEqual([store.take("k", 2, 1.0) for _ in range(2)], [0, 0])
+            self.assertAlmostEqual(store.take("k", 2, 1.0), 1.0)
+            clock.return_value = 100.5
+            self.assertAlmostEqual(store.take("k", 2, 1.0), 0.5)
+            clock.return_value = 101.0
+            self.assertEqual(store.take("k", 2, 1.0), 0)
+            clock.return_value = 1000.0  # never more than the capacity
+            self.assertEqual([store.take("k", 2, 1.0) == 0 for _ in range(3)], [True, True, False])
+
+    def test_least_recently_used_buckets_are_dropped(self):
+        store = LocalBucketStore(max_buckets=2)
+        for key in ("a", "b", "a", "c"):
+            store.take(key, 1, 1.0)
+        self.assertEqual(list(store.buckets), ["a", "c"])
+
+    @override_settings(THROTTLE_RATES={"read": "2/min"})
+    def test_reads_are_limited_per_user(self):
+        alice = self.client_for(self.alice)
+        # The async list view and the DRF views draw from the same bucket.
+        async_list = lambda: call_async_view(property_list_create, "/api/properties/", self.alice)
+        self.assertEqual(async_list().status_code, 200)
+        self.assertEqual(alice.get("/api/properties/wishlist/").status_code, 200)
+        for response in (async_list(), alice.get("/api/properties/")):
+            self.assertEqual(response.status_code, 429)
+            self.assertEqual(response["Retry-After"], "30")
+        self.assertEqual(self.client_for(self.bob).get("/api/properties/").status_code, 200)
+
+    @override_settings(THROTTLE_RATES={"read": "1/min"})
+    def test_anonymous_reads_are_limited_per_ip(self):
+        self.assertEqual(self.client_for().get("/api/properties/").status_code, 200)
+        self.assertEqual(self.client_for().get("/api/properties/").status_code, 429)
+        self.assertEqual(self.client_for(ip="10.0.0.2").get("/api/properties/").status_code, 200)
+
+    @override_settings(THROTTLE_RATES={"read": "1/min", "write": "1/min", "chat": "1/min"})
+    def test_scopes_have_separate_budgets(self):
+        alice = self.client_for(self.alice)
+        self.assertEqual(alice.get("/api/properties/").status_code, 200)
+        self.assertNotEqual(alice.post("/api/chats/rooms/create/", {}).status_code, 429)
+        self.assertEqual(alice.post("/api/chats/rooms/create/", {}).status_code, 429)
+        self.assertNotEqual(alice.post("/api/chats/messages/send/", {"chatroom": 0}).status_code, 429)
+        self.assertEqual(alice.post("/api/chats/messages/send/", {"chatroom": 0}).status_code, 429)
+
+    @override_settings(THROTTLE_RATES={"auth": "2/min"})
+    def test_login_is_limited_per_ip(self):
+        client = self.client_for(ip="10.0.0.3")
+        attempts = [
+            client.post("/api/auth/login/", {"username": "alice", "password": "guess"}, format="json").status_code
+            for _ in range(3)
+        ]
+        self.assertEqual(attempts, [401, 401, 429])
+        response = self.client_for(ip="10.0.0.4").post(
+            "/api/auth/login/", {"username": "alice", "password": "secret-pass"}, format="json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    @override_settings(THROTTLE_RATES={})
+    def test_scopes_without_a_rate_are_not_limited(self):
+        alice = self.client_for(self.alice)
+        self.assertEqual({alice.get("/api/properties/").status_code for _ in range(5)}, {200})
@@ -0,0 +1,130 @@
+"""
+Token-bucket request throttling.
+
+Every scope in ``settings.THROTTLE_RATES`` ("read", "write", "auth", "chat") has a
+rate like ``"120/min"``: a bucket holds up to 120 tokens, refilled evenly at two
+per second, and each request takes one. Bursts up to the capacity pass untouched;
+a sustained flood is held to the refill rate and answered with 429 and a
+Retry-After of the time until the next token. Authenticated requests draw from a
+bucket per user and anonymous ones from a bucket per client IP; login and signup
+("auth") always count per IP, since the caller is not known yet.
+
+Buckets live in ``settings.THROTTLE_STORE``. ``LocalBucketStore`` keeps them in
+process (a dict under a lock, a few microseconds per check), so each worker
+enforces the budget on its own; ``CacheBucketStore`` shares them through the
+default cache for a budget across workers, at the cost of a cache round trip.
+A scope without a rate is not throttled.
+"""
+import math
+import threading
+import time
+from functools import lru_cache
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.module_loading import import_string
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.throttling import BaseThrottle
+
+PERIODS = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+
+@lru_cache(maxsize=None)
+def parse_rate(rate):
+    """``"<requests>/<second|minute|hour|day>"`` -> ``(capacity, tokens per second)``, or None for no limit."""
+    if not rate:
+        return None
+    count, period = rate.split("/")
+    capacity = int(count)
+    return capacity, capacity / PERIODS[period.strip()[0].lower()]
+
+class LocalBucketStore:
+    """In-process buckets; the least recently used are dropped beyond ``max_buckets`` (they would be near full anyway)."""
+
+    def __init__(self, max_buckets=100_000):
+        self.max_buckets = max_buckets
+        self.buckets = {}  # key -> (tokens, monotonic time of the last take), oldest first
+        self.lock = threading.Lock()
+
+    def take(self, key, capacity, refill):
+        """Take a token from ``key``'s bucket; return 0 if there was one, else the seconds until there is."""
+        with self.lock:
+            now = time.monotonic()
+            tokens, stamp = self.buckets.pop(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - stamp) * refill)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / refill
+            self.buckets[key] = (tokens - 1 if not wait else tokens, now)
+            while len(self.buckets) > self.max_buckets:
+                del self.buckets[next(iter(self.buckets))]
+        return wait
+
+    async def atake(self, key, capacity, refill):
+        return self.take(key, capacity, refill)
+
+    def clear(self):
+        with self.lock:
+            self.buckets.clear()
+
+class CacheBucketStore:
+    """
+    Buckets in the default cache, shared by every process using it. The read and
+    write are not atomic, so concurrent requests for one key may each get the last
+    token: the limit is approximate, off by at most the number of workers.
+    """
+    prefix = "throttle:"
+
+    def take(self, key, capacity, refill):
+        now = time.time()
+        tokens, stamp = cache.get(self.prefix + key, (capacity, now))
+        tokens = min(capacity, tokens + max(0.0, now - stamp) * refill)
+        wait = 0.0 if tokens >= 1 else (1 - tokens) / refill
+        # Once the bucket would have refilled, a missing entry means the same thing.
+        cache.set(self.prefix + key, (tokens - 1 if not wait else tokens, now), math.ceil(capacity / refill) + 1)
+        return wait
+
+    async def atake(self, key, capacity, refill):
+        return await sync_to_async(self.take)(key, capacity, refill)
+
+_stores = {}
+
+def get_store():
+    path = settings.THROTTLE_STORE
+    if path not in _stores:
+        _stores[path] = import_string(path)()
+    return _stores[path]
+
+def bucket_key(scope, user, ident=None):
+    """Authenticated users get a bucket of their own; anonymous callers, and all "auth" requests, one per client IP."""
+    if scope != "auth" and user is not None and user.is_authenticated:
+        return f"{scope}:user:{user.pk}"
+    return f"{scope}:ip:{ident}"
+
+def take(scope, key):
+    """Seconds ``key`` has to wait for a ``scope`` request; 0 if it may go ahead now."""
+    limit = parse_rate(settings.THROTTLE_RATES.get(scope))
+    return get_store().take(key, *limit) if limit else 0.0
+
+async def atake(scope, key):
+    limit = parse_rate(settings.THROTTLE_RATES.get(scope))
+    return await get_store().atake(key, *limit) if limit else 0.0
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    DRF throttle for every API view. The scope is the view's ``throttle_scope``,
+    else "read" for safe methods and "write" for the rest.
+    """
+
+    def get_scope(self, request, view):
+        return getattr(view, "throttle_scope", None) or ("read" if request.method in SAFE_METHODS else "write")
+
+    def allow_request(self, request, view):
+        scope = self.get_scope(request, view)
+        self.delay = take(scope, bucket_key(scope, request.user, self.get_ident(request)))
+        return not self.delay
+
+    async def aallow_request(self, request, scope):
+        """``allow_request`` for the async views, which have no DRF view instance."""
+        self.delay = await atake(scope, bucket_key(scope, request.user, self.get_ident(request)))
+        return not self.delay
+
+    def wait(self):
+        return self.delay
@@ -1,10 +1,17 @@
+from django.conf import settings
+from django.conf.urls.static import static
 from django.contrib import admin
 from django.urls import path, include
+from apps.monitoring.views import metrics_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/auth/", include("apps.accounts.urls")),  # JWT Authentication URLs
     path("api/properties/", include("apps.properties.urls")),  # Property-related APIs
     path("api/chats/", include("apps.chats.urls")),
+    path("metrics", metrics_view, name="metrics"),  # Prometheus scrape endpoint
 
 ]
+
+# Serve locally stored uploads (e.g. rendered property images) during development.
+urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
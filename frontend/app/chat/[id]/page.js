@@ -14,8 +14,26 @@ export default function ChatRoomDetail() {
 
   useEffect(() => {
     fetchChatroom();
-    const interval = setInterval(fetchChatroom, 5000);
-    return () => clearInterval(interval);
+
+    // Live updates are pushed over a websocket instead of polling the room.
+    const token = localStorage.getItem("accessToken");
+    if (!token) return;
+    const socket = new WebSocket(`ws://localhost:8000/ws/chats/rooms/${id}/?token=${token}`);
+    socket.onmessage = (event) => {
+      const data = JSON.parse(event.data);
+      if (data.type === "message.created") {
+        setChatroom((prev) =>
+          prev && !prev.messages.some((msg) => msg.id === data.message.id)
+            ? { ...prev, messages: [...prev.messages, data.message] }
+            : prev
+        );
+      } else if (data.type === "message.deleted") {
+        setChatroom((prev) =>
+          prev ? { ...prev, messages: prev.messages.filter((msg) => msg.id !== data.message_id) } : prev
+        );
+      }
+    };
+    return () => socket.close();
   }, [id]);
 
   const fetchChatroom = async () => {
@@ -25,10 +43,12 @@ export default function ChatRoomDetail() {
       return;
     }
     try {
-      const res = await axios.get(`http://localhost:8000/api/chats/rooms/${id}/`, {
-        headers: { Authorization: `Bearer ${token}` },
-      });
-      setChatroom(res.data);
+      const headers = { Authorization: `Bearer ${token}` };
+      const [roomRes, messagesRes] = await Promise.all([
+        axios.get(`http://localhost:8000/api/chats/rooms/${id}/`, { headers }),
+        axios.get(`http://localhost:8000/api/chats/rooms/${id}/messages/`, { headers }),
+      ]);
+      setChatroom({ ...roomRes.data, messages: messagesRes.data.results });
     } catch (err) {
       console.error("Error fetching chatroom:", err.response?.data || err);
     }
@@ -43,10 +63,11 @@ export default function ChatRoomDetail() {
         { chatroom: id, message: newMessage, reply_to: replyTo ? replyTo.id : null },
         { headers: { Authorization: `Bearer ${token}` } }
       );
-      setChatroom((prev) => ({
-        ...prev,
-        messages: [...prev.messages, res.data],
-      }));
+      setChatroom((prev) =>
+        prev.messages.some((msg) => msg.id === res.data.id)
+          ? prev
+          : { ...prev, messages: [...prev.messages, res.data] }
+      );
       setNewMessage("");
       setReplyTo(null);
     } catch (err) {
@@ -77,10 +77,7 @@ export default function ChatRoomList() {
                     : room.seller?.username || "User";
 
                 // Show a preview of the last message (if available)
-                const lastMessage =
-                  room.messages && room.messages.length > 0
-                    ? room.messages[room.messages.length - 1]
-                    : null;
+                const lastMessage = room.last_message;
                 const lastMessagePreview = lastMessage
                   ? `${lastMessage.sender?.username || "Unknown"}: ${lastMessage.message.slice(0, 30)}...`
                   : "Start a conversation";
@@ -106,6 +103,11 @@ export default function ChatRoomList() {
                       <p className="text-gray-900 font-medium">{partnerName}</p>
                       <p className="text-gray-600 text-sm">{lastMessagePreview}</p>
                     </div>
+                    {room.unread_count > 0 && (
+                      <span className="px-2 py-1 text-xs font-semibold text-white bg-[#6254b6] rounded-full">
+                        {room.unread_count}
+                      </span>
+                    )}
                     <span className="text-sm text-gray-400">➡</span>
                   </motion.li>
                 );
@@ -8,11 +8,13 @@ import Footer from "../components/Footer";
 import EMICalculator from "../components/EMICalculator";
 
 export default function Home() {
-  const [allProperties, setAllProperties] = useState([]);
-  const [filteredProperties, setFilteredProperties] = useState([]);
+  const [properties, setProperties] = useState([]);
+  const [nextUrl, setNextUrl] = useState(null);
   const [wishlistIds, setWishlistIds] = useState([]);
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [errorMsg, setErrorMsg] = useState("");
+  const [userId, setUserId] = useState(null);
   const router = useRouter();
 
   // Filters
@@ -27,66 +29,67 @@ export default function Home() {
       return;
     }
 
-    let userId = null;
     try {
       const decoded = jwtDecode(token);
-      userId = decoded.user_id;
+      setUserId(decoded.user_id);
     } catch (error) {
       console.error("Error decoding token:", error);
     }
 
-    setLoading(true);
-
     axios
-      .get("http://127.0.0.1:8000/api/properties/", {
+      .get("http://127.0.0.1:8000/api/properties/wishlist/ids/", {
         headers: { Authorization: `Bearer ${token}` },
       })
-      .then((res) => {
-        let properties = res.data;
-        if (userId) {
-          properties = properties.filter((prop) => prop.seller !== userId);
-        }
-        setAllProperties(properties);
-        setFilteredProperties(properties);
-      })
-      .catch(() => setErrorMsg("Failed to load properties."))
-      .finally(() => setLoading(false));
-
-    axios
-      .get("http://127.0.0.1:8000/api/properties/wishlist/", {
-        headers: { Authorization: `Bearer ${token}` },
-      })
-      .then((res) => {
-        const wishlistPropertyIds = res.data.map((item) => item.property.id);
-        setWishlistIds(wishlistPropertyIds);
-      })
+      .then((res) => setWishlistIds(res.data.ids))
       .catch((error) => console.error("Error fetching wishlist:", error));
   }, [router]);
 
+  // Filtering, sorting and paging happen on the server; refetch the first page when filters change.
   useEffect(() => {
-    let updatedList = [...allProperties];
-
-    if (locationQuery.trim() !== "") {
-      updatedList = updatedList.filter((prop) =>
-        prop.location.toLowerCase().includes(locationQuery.toLowerCase())
-      );
-    }
+    const token = localStorage.getItem("accessToken");
+    if (!token) return;
 
-    if (propertyType) {
-      updatedList = updatedList.filter(
-        (prop) =>
-          prop.property_type.toLowerCase() === propertyType.toLowerCase()
-      );
-    }
+    const params = {};
+    if (userId) params.exclude_user = userId;
+    if (locationQuery.trim() !== "") params.location = locationQuery.trim();
+    if (propertyType) params.property_type = propertyType;
+    if (sortOption === "price_asc") params.ordering = "price";
+    else if (sortOption === "price_desc") params.ordering = "-price";
+
+    const timer = setTimeout(() => {
+      axios
+        .get("http://127.0.0.1:8000/api/properties/", {
+          headers: { Authorization: `Bearer ${token}` },
+          params,
+        })
+        .then((res) => {
+          setProperties(res.data.results);
+          setNextUrl(res.data.next);
+        })
+        .catch(() => setErrorMsg("Failed to load properties."))
+        .finally(() => setLoading(false));
+    }, 300);
+
+    return () => clearTimeout(timer);
+  }, [locationQuery, propertyType, sortOption, userId]);
+
+  const loadMore = async () => {
+    const token = localStorage.getItem("accessToken");
+    if (!nextUrl || !token) return;
 
-    if (sortOption === "price_asc") {
-      updatedList.sort((a, b) => parseFloat(a.price) - parseFloat(b.price));
-    } else if (sortOption === "price_desc") {
-      updatedList.sort((a, b) => parseFloat(b.price) - parseFloat(a.price));
+    setLoadingMore(true);
+    try {
+      const res = await axios.get(nextUrl, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      setProperties((prev) => [...prev, ...res.data.results]);
+      setNextUrl(res.data.next);
+    } catch (error) {
+      setErrorMsg("Failed to load properties.");
+    } finally {
+      setLoadingMore(false);
     }
-
-    setFilteredProperties(updatedList);
-  }, [locationQuery, propertyType, sortOption, allProperties]);
+  };
 
   const onToggleWishlist = async (propertyId, isCurrentlyWishlisted) => {
     const token = localStorage.getItem("accessToken");
@@ -168,7 +171,7 @@ onChange={(e) => setLocationQuery(e.target.value)}
             🏡 Explore Properties
           </h1>
           <div className="grid grid-cols-1 gap-6 md:grid-cols-2 lg:grid-cols-2">
-            {filteredProperties.map((property) => (
+            {properties.map((property) => (
               <PropertyCard
                 key={property.id}
                 property={property}
@@ -177,6 +180,17 @@ onChange={(e) => setLocationQuery(e.target.value)}
               />
             ))}
           </div>
+          {nextUrl && (
+            <div className="flex justify-center mt-6">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-3 font-semibold text-white bg-blue-600 rounded-md hover:bg-blue-700 disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
         </div>
 
         {/* Right Section - Fixed EMI Calculator */}
@@ -46,8 +46,11 @@ api.interceptors.response.use(
           refresh: refreshToken,
         });
 
-        // Store the new access token
+        // Store the new access token (and the rotated refresh token; the old one is revoked)
         localStorage.setItem("accessToken", response.data.access);
+        if (response.data.refresh) {
+          localStorage.setItem("refreshToken", response.data.refresh);
+        }
         api.defaults.headers.Authorization = `Bearer ${response.data.access}`;
 
         // Retry original request with new token
@@ -14,6 +14,9 @@ export async function refreshAccessToken() {
     if (response.ok) {
         const data = await response.json();
         localStorage.setItem("accessToken", data.access);
+        if (data.refresh) {
+            localStorage.setItem("refreshToken", data.refresh);
+        }
         return data.access;
     } else {
         localStorage.removeItem("accessToken");